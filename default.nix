@@ -5,6 +5,7 @@
   poetry-core,
   setuptools,
   fabulous-fpga,
+  numpy,
 }:
 let
   self = buildPythonPackage {
@@ -29,6 +30,7 @@ let
 
     propagatedBuildInputs = self.includedTools ++ [
       librelane
+      numpy
     ];
   };
 in
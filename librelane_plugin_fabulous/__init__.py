@@ -1,3 +1,4 @@
 from .fabulous_tile import FABulousTile, FABulousIOPlacement
+from .fabulous_tile_sweep import FABulousTileSizeSweep
 from .fabulous_fabric import FABulousFabric, FABulousPower, FABulousManualIOPlacement
 from .__version__ import __version__  # Plugins must expose __version__
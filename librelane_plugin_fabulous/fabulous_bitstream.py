@@ -0,0 +1,328 @@
+import re
+import pickle
+import dataclasses
+from typing import List, Tuple, Dict, Any
+
+import numpy as np
+
+# Written before the frames to synchronize the configuration port
+SYNC_HEADER = bytes.fromhex("00AAFF01000000010000000000000000FAB0FAB1")
+
+tile_rx = re.compile(r"^X(\d+)Y(\d+)$")
+annotation_rx = re.compile(r"\{.*?\}")
+fasm_line_rx = re.compile(
+    r"^([A-Za-z_][\w.$]*)(?:\[(\d+)(?::(\d+))?\])?(?:\s*=\s*(\S+))?$"
+)
+fasm_value_rx = re.compile(r"^(?:\d+)?'([bodh])([0-9a-fA-F_]+)$")
+
+BASES = {"b": 2, "o": 8, "d": 10, "h": 16}
+
+
+def parse_fasm_value(value: str) -> int:
+    """
+    Parses the value of a FASM feature, either a plain decimal
+    number or a Verilog-style literal such as ``4'b1010``.
+    """
+    if value.isdigit():
+        return int(value)
+
+    match = fasm_value_rx.match(value)
+    if match is None:
+        raise ValueError(f"Invalid FASM value '{value}'")
+    (base, digits) = match.groups()
+    return int(digits.replace("_", ""), BASES[base])
+
+
+def read_fasm(fasm: str) -> List[str]:
+    """
+    Returns the features set by a FASM file in canonical form, as the fasm
+    package writes them: one feature per set bit, with the address omitted
+    for bit 0. Features that are cleared are dropped.
+    """
+    features = []
+    with open(fasm, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = annotation_rx.sub("", line.split("#", 1)[0]).strip()
+            if not line:
+                continue
+
+            match = fasm_line_rx.match(line)
+            if match is None:
+                raise ValueError(f"{fasm}:{line_number}: invalid FASM line '{line}'")
+            (feature, end, start, value) = match.groups()
+            value = 1 if value is None else parse_fasm_value(value)
+
+            if start is None:
+                if value not in [0, 1]:
+                    raise ValueError(
+                        f"{fasm}:{line_number}: value {value} is too wide for a single bit"
+                    )
+                if value and end is not None and int(end) != 0:
+                    features.append(f"{feature}[{end}]")
+                elif value:
+                    features.append(feature)
+                continue
+
+            (start, end) = (int(start), int(end))
+            if value >> (end - start + 1):
+                raise ValueError(
+                    f"{fasm}:{line_number}: value {value} is too wide for [{end}:{start}]"
+                )
+            for address in range(start, end + 1):
+                if (value >> (address - start)) & 1:
+                    features.append(
+                        f"{feature}[{address}]" if address != 0 else feature
+                    )
+
+    return features
+
+
+@dataclasses.dataclass
+class BitstreamIndex:
+    """
+    A flat index of the bitstream specification of a fabric. The bits each
+    feature sets are stored as ranges of two arrays, the bit index within all
+    configuration bits of the fabric and its value, so that a whole FASM file
+    can be resolved with a few NumPy operations.
+    """
+
+    tiles: List[str]
+    tile_types: List[str]
+    frames: int
+    frame_bits: int
+    # The range of each feature in bits and values, by "<tile>.<feature>"
+    features: Dict[str, int] = dataclasses.field(repr=False)
+    offsets: np.ndarray = dataclasses.field(repr=False)
+    bits: np.ndarray = dataclasses.field(repr=False)
+    values: np.ndarray = dataclasses.field(repr=False)
+    # Frames of each tile that are used by its tile type
+    frame_masks: np.ndarray = dataclasses.field(repr=False)
+    # Tiles whose frames are part of the bitstream
+    configured: np.ndarray = dataclasses.field(repr=False)
+
+    @property
+    def tile_bits(self) -> int:
+        return self.frames * self.frame_bits
+
+    @classmethod
+    def from_spec(Self, spec: Dict[str, Any], masked: bool = True) -> "BitstreamIndex":
+        """
+        Builds the index from a bitstream specification as generated by
+        FABulous. ``masked`` selects ``TileSpecs`` over ``TileSpecs_No_Mask``.
+        """
+        frames = spec["ArchSpecs"]["MaxFramesPerCol"]
+        frame_bits = spec["ArchSpecs"]["FrameBitsPerRow"]
+        tile_specs = spec["TileSpecs" if masked else "TileSpecs_No_Mask"]
+
+        tiles = list(spec["TileMap"])
+        tile_types = [spec["TileMap"][tile] for tile in tiles]
+
+        frame_masks = np.zeros((len(tiles), frames), dtype=bool)
+        configured = np.zeros(len(tiles), dtype=bool)
+        for i, tile_type in enumerate(tile_types):
+            frame_map = spec["FrameMap"].get(tile_type)
+            if tile_type == "NULL" or not frame_map:
+                continue
+            configured[i] = True
+            frame_masks[i] = [frame_map[frame] != 0 for frame in range(frames)]
+
+        features: Dict[str, int] = {}
+        offsets = [0]
+        bits = []
+        values = []
+        for i, tile in enumerate(tiles):
+            base = i * frames * frame_bits
+            for feature, feature_bits in tile_specs.get(tile, {}).items():
+                features[f"{tile}.{feature}"] = len(offsets) - 1
+                for bit, value in (feature_bits or {}).items():
+                    bits.append(base + int(bit))
+                    values.append(int(value))
+                offsets.append(len(bits))
+
+        # The specification may name bit 0 explicitly
+        for feature, i in list(features.items()):
+            if feature.endswith("[0]"):
+                features.setdefault(feature[:-3], i)
+
+        return Self(
+            tiles=tiles,
+            tile_types=tile_types,
+            frames=frames,
+            frame_bits=frame_bits,
+            features=features,
+            offsets=np.array(offsets, dtype=np.int64),
+            bits=np.array(bits, dtype=np.int64),
+            values=np.array(values, dtype=np.uint8),
+            frame_masks=frame_masks,
+            configured=configured,
+        )
+
+    @classmethod
+    def load(Self, path: str) -> "BitstreamIndex":
+        with open(path, "rb") as f:
+            return Self(**pickle.load(f))
+
+    def save(self, path: str):
+        fields = {
+            field.name: getattr(self, field.name) for field in dataclasses.fields(self)
+        }
+        with open(path, "wb") as f:
+            pickle.dump(fields, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def resolve(self, features: List[str]) -> Tuple[np.ndarray, List[str]]:
+        """
+        Returns the configuration bits of all tiles, one row per tile, with the
+        features set in order, and the features that aren't in the index.
+        Clock features are ignored like in the FABulous bitstream generator.
+        """
+        ids = []
+        unknown = []
+        for feature in features:
+            if "CLK" in feature:
+                continue
+            i = self.features.get(feature)
+            if i is None:
+                # Only the tile, the BEL or switch matrix and the feature count
+                i = self.features.get(".".join(feature.split(".", 3)[:3]))
+            if i is None:
+                unknown.append(feature)
+            else:
+                ids.append(i)
+
+        ids = np.array(ids, dtype=np.int64)
+        starts = self.offsets[ids]
+        lengths = self.offsets[ids + 1] - starts
+        positions = np.arange(lengths.sum()) + np.repeat(
+            starts - (np.cumsum(lengths) - lengths), lengths
+        )
+
+        # A later feature overrides the bits of an earlier one
+        bits = self.bits[positions][::-1]
+        values = self.values[positions][::-1]
+        (unique_bits, last) = np.unique(bits, return_index=True)
+
+        configuration = np.zeros(len(self.tiles) * self.tile_bits, dtype=np.uint8)
+        configuration[unique_bits] = values[last]
+
+        return (configuration.reshape(len(self.tiles), self.tile_bits), unknown)
+
+    def get_frames(self, configuration: np.ndarray) -> np.ndarray:
+        """
+        Returns the frames of each tile as (tiles, frames, frame bits) bits,
+        with the most significant bit first and the unused frames cleared.
+        """
+        frames = configuration.reshape(len(self.tiles), self.frames, self.frame_bits)
+        return np.where(self.frame_masks[:, :, None], frames[:, :, ::-1], 0)
+
+    def get_columns(self) -> Dict[int, List[int]]:
+        """
+        Returns the configured tiles of each column, from top to bottom.
+        """
+        columns: Dict[int, List[int]] = {}
+        for i, tile in enumerate(self.tiles):
+            x = int(tile_rx.match(tile).group(1))
+            columns.setdefault(x, [])
+            if self.configured[i]:
+                columns[x].append(i)
+        return columns
+
+    def get_frame_selects(self, x: int) -> np.ndarray:
+        """
+        Returns the frame select words of a column as (frames, 4) bytes.
+        """
+        select = 1 << np.arange(self.frames, dtype=np.uint32)
+        words = (((x & 0x1F) << 27) | select).astype(">u4")
+        return words.view(np.uint8).reshape(self.frames, 4)
+
+    def pack(self, configuration: np.ndarray) -> bytes:
+        """
+        Packs the configuration bits into the binary bitstream: for each column
+        and frame, the frame select word followed by the frame data of the
+        configured tiles of the column, from top to bottom.
+        """
+        frame_bytes = np.packbits(self.get_frames(configuration), axis=2)
+        columns = self.get_columns()
+
+        chunks = [SYNC_HEADER]
+        for x in range(max(columns, default=-1) + 1):
+            tiles = columns.get(x, [])
+            data = frame_bytes[tiles].transpose(1, 0, 2).reshape(self.frames, -1)
+            chunks.append(
+                np.concatenate([self.get_frame_selects(x), data], axis=1).tobytes()
+            )
+
+        return b"".join(chunks)
+
+    def unpack(self, bitstream: bytes) -> np.ndarray:
+        """
+        Returns the configuration bits of all tiles in a binary
+        bitstream as written by ``pack``, one row per tile.
+        """
+        if not bitstream.startswith(SYNC_HEADER):
+            raise ValueError("The bitstream doesn't start with the sync header")
+
+        data = np.frombuffer(bitstream, dtype=np.uint8, offset=len(SYNC_HEADER))
+        row_bytes = (self.frame_bits + 7) // 8
+        columns = self.get_columns()
+
+        frame_bytes = np.zeros((len(self.tiles), self.frames, row_bytes), np.uint8)
+        offset = 0
+        for x in range(max(columns, default=-1) + 1):
+            tiles = columns.get(x, [])
+            size = self.frames * (4 + len(tiles) * row_bytes)
+            if offset + size > len(data):
+                raise ValueError(f"The bitstream ends within column {x}")
+
+            chunk = data[offset : offset + size].reshape(self.frames, -1)
+            offset += size
+            if not np.array_equal(chunk[:, :4], self.get_frame_selects(x)):
+                raise ValueError(f"Unexpected frame select words in column {x}")
+            tile_frames = chunk[:, 4:].reshape(self.frames, len(tiles), row_bytes)
+            frame_bytes[tiles] = tile_frames.transpose(1, 0, 2)
+
+        if offset != len(data):
+            raise ValueError("Unexpected data after the last column")
+
+        frames = np.unpackbits(frame_bytes, axis=2)[:, :, : self.frame_bits]
+        return np.ascontiguousarray(frames[:, :, ::-1]).reshape(
+            len(self.tiles), self.tile_bits
+        )
+
+    def write_frame_map(self, configuration: np.ndarray, path: str):
+        """
+        Writes the frames of the configured tiles as CSV:
+        tile, tile type, frame index and the frame bits.
+        """
+        characters = (self.get_frames(configuration) + ord("0")).astype(np.uint8)
+        lines = []
+        for i in np.flatnonzero(self.configured):
+            for frame in range(self.frames):
+                lines.append(
+                    f"{self.tiles[i]},{self.tile_types[i]},{frame},"
+                    + characters[i, frame].tobytes().decode()
+                )
+
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def write_emulation_defines(self, configuration: np.ndarray, path: str):
+        """
+        Writes the configuration bits of each tile as the
+        ``Tile_X<x>Y<y>_Emulate_Bitstream`` define that the
+        fabric passes to the tile in emulation mode.
+        """
+        characters = (configuration[:, ::-1] + ord("0")).astype(np.uint8)
+        with open(path, "w") as f:
+            for i, tile in enumerate(self.tiles):
+                if self.tile_types[i] == "NULL":
+                    continue
+                f.write(
+                    f"`define Tile_{tile}_Emulate_Bitstream {self.tile_bits}'b"
+                    + characters[i].tobytes().decode()
+                    + "\n"
+                )
+
+
+def load_spec(path: str) -> Dict[str, Any]:
+    with open(path, "rb") as f:
+        return pickle.load(f)
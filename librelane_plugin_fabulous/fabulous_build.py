@@ -0,0 +1,436 @@
+import os
+import sys
+import json
+import time
+import click
+import hashlib
+import pathlib
+import subprocess
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from typing import List, Literal, Optional, Dict, Tuple
+
+from librelane.logging import (
+    info,
+    success,
+    err,
+)
+
+from fabulous.fabric_generator.parser import parse_csv
+
+from .fabulous_context import new_context, use_context
+
+# Directories of a tile that are outputs of a build, not inputs
+BUILD_OUTPUT_DIRS = {"macro", "runs", ".cache"}
+
+# Macro views that the fabric flow needs for every tile
+REQUIRED_VIEWS = [("gds", "gds"), ("lef", "lef"), ("nl", "nl.v")]
+
+
+@dataclass
+class BuildNode:
+    """
+    A node of the build graph. Subtiles are not hardened on their own,
+    they only contribute their sources to the supertile.
+    """
+
+    name: str
+    kind: Literal["subtile", "tile", "supertile", "fabric"]
+    directory: str
+    config: Optional[str] = None
+    dependencies: List[str] = field(default_factory=list)
+    sources: List[str] = field(default_factory=list)
+    status: str = "pending"
+    fingerprint: Optional[str] = None
+    start: Optional[float] = None
+    end: Optional[float] = None
+
+
+def resolve_config_path(value: str, config_dir: str) -> str:
+    """
+    Resolves a path of a LibreLane configuration file.
+    """
+    if value.startswith("dir::"):
+        value = value[len("dir::") :]
+    return os.path.abspath(os.path.join(config_dir, value))
+
+
+def get_build_graph(fabric_config: str) -> Dict[str, BuildNode]:
+    """
+    Builds the dependency graph subtiles → supertiles → fabric
+    from the fabric configuration and the tile libraries.
+    """
+    fabric_dir = os.path.dirname(os.path.abspath(fabric_config))
+    with open(fabric_config, "r") as f:
+        config = json.load(f)
+
+    fabric_csv = resolve_config_path(config["FABULOUS_FABRIC_CONFIG"], fabric_dir)
+    tile_libraries = config["FABULOUS_TILE_LIBRARY"]
+    if isinstance(tile_libraries, str):
+        tile_libraries = [tile_libraries]
+    tile_libraries = [resolve_config_path(lib, fabric_dir) for lib in tile_libraries]
+
+    def get_tile_dir(tile_name: str) -> str:
+        for tile_library in tile_libraries:
+            if os.path.isdir(os.path.join(tile_library, tile_name)):
+                return os.path.join(tile_library, tile_name)
+        raise click.ClickException(
+            f"Could not find {tile_name} in any of the tile libraries!"
+        )
+
+    with use_context(new_context(os.getcwd())):
+        fabric = parse_csv.parseFabricCSV(pathlib.Path(fabric_csv))
+
+    def get_sources(tile) -> List[str]:
+        sources = [str(bel.src) for bel in tile.bels]
+        if tile.matrixDir and os.path.isfile(tile.matrixDir):
+            sources.append(str(tile.matrixDir))
+        return sources
+
+    nodes: Dict[str, BuildNode] = {}
+    subtile_to_supertile = {}
+
+    for supertile_name, supertile in fabric.superTileDic.items():
+        directory = get_tile_dir(supertile_name)
+        node = BuildNode(
+            name=supertile_name,
+            kind="supertile",
+            directory=directory,
+            config=os.path.join(directory, "config.json"),
+        )
+        for tile in supertile.tiles:
+            subtile_to_supertile[tile.name] = supertile_name
+            nodes[tile.name] = BuildNode(
+                name=tile.name,
+                kind="subtile",
+                directory=os.path.join(directory, tile.name),
+                sources=get_sources(tile),
+            )
+            node.dependencies.append(tile.name)
+        nodes[supertile_name] = node
+
+    fabric_node = BuildNode(
+        name=config["DESIGN_NAME"],
+        kind="fabric",
+        directory=fabric_dir,
+        config=os.path.abspath(fabric_config),
+        sources=[fabric_csv],
+    )
+
+    for row in fabric.tile:
+        for tile in row:
+            if tile is None:
+                continue
+            name = subtile_to_supertile.get(tile.name, tile.name)
+            if name not in nodes:
+                directory = get_tile_dir(name)
+                nodes[name] = BuildNode(
+                    name=name,
+                    kind="tile",
+                    directory=directory,
+                    config=os.path.join(directory, "config.json"),
+                    sources=get_sources(tile),
+                )
+            if name not in fabric_node.dependencies:
+                fabric_node.dependencies.append(name)
+
+    nodes[fabric_node.name] = fabric_node
+
+    return nodes
+
+
+def get_fingerprint(
+    node: BuildNode, nodes: Dict[str, BuildNode], pdk: Optional[str]
+) -> str:
+    """
+    Returns a fingerprint of the inputs of a node: all files in its directory
+    except for the build outputs and the subtiles, its sources outside of the
+    directory and the fingerprints of its dependencies.
+    """
+    fingerprint = hashlib.sha256()
+    fingerprint.update(f"{node.kind}:{node.name}:{pdk}".encode())
+
+    excluded = set(BUILD_OUTPUT_DIRS)
+    if node.kind == "fabric":
+        # The fabric directory also holds the run directories of the fabric
+        files = [node.config]
+    else:
+        excluded |= set(node.dependencies)
+        files = []
+        for root, dirs, filenames in os.walk(node.directory):
+            if root == node.directory:
+                dirs[:] = [d for d in dirs if d not in excluded]
+            else:
+                dirs[:] = [d for d in dirs if d not in BUILD_OUTPUT_DIRS]
+            files.extend(os.path.join(root, filename) for filename in filenames)
+
+    files += [
+        source
+        for source in node.sources
+        if not os.path.abspath(source).startswith(node.directory + os.sep)
+    ]
+
+    for file in sorted(set(os.path.abspath(file) for file in files)):
+        if not os.path.isfile(file) or file.endswith(".tmp"):
+            continue
+        fingerprint.update(os.path.relpath(file, node.directory).encode())
+        with open(file, "rb") as f:
+            fingerprint.update(hashlib.sha256(f.read()).digest())
+
+    for dependency in node.dependencies:
+        fingerprint.update(get_fingerprint(nodes[dependency], nodes, pdk).encode())
+
+    return fingerprint.hexdigest()
+
+
+def get_build_file(node: BuildNode, pdk: Optional[str], ext: str) -> str:
+    """
+    Returns the path of a bookkeeping file of the build, e.g. the log.
+    """
+    return os.path.join(node.directory, ".cache", "build", f"{pdk}.{ext}")
+
+
+def has_views(node: BuildNode, pdk: Optional[str]) -> bool:
+    """
+    Checks if all macro views the fabric needs exist for a tile.
+    """
+    return all(
+        os.path.isfile(
+            os.path.join(node.directory, "macro", str(pdk), view, f"{node.name}.{ext}")
+        )
+        for (view, ext) in REQUIRED_VIEWS
+    )
+
+
+def is_stale(node: BuildNode, nodes: Dict[str, BuildNode], pdk: Optional[str]) -> bool:
+    if node.kind != "fabric" and not has_views(node, pdk):
+        return True
+
+    fingerprint_file = get_build_file(node, pdk, "fingerprint")
+    if not os.path.isfile(fingerprint_file):
+        return True
+
+    with open(fingerprint_file, "r") as f:
+        return f.read().strip() != get_fingerprint(node, nodes, pdk)
+
+
+def get_total_memory() -> float:
+    """
+    Returns the physical memory of the machine in GiB.
+    """
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024**3
+    except (ValueError, OSError, AttributeError):
+        return 16.0
+
+
+@click.command()
+@click.argument("fabric_config", type=click.Path(exists=True, dir_okay=False))
+@click.option("-p", "--pdk", required=True, help="The PDK to harden the tiles for.")
+@click.option("--scl", default=None, help="The standard cell library to use.")
+@click.option("--pdk-root", default=None, help="The PDK root folder.")
+@click.option("--manual-pdk", is_flag=True, help="Don't use Ciel for the PDK.")
+@click.option(
+    "--cpus",
+    type=int,
+    default=os.cpu_count() or 1,
+    show_default=True,
+    help="The CPU budget of the build.",
+)
+@click.option(
+    "--cpus-per-tile",
+    type=int,
+    default=4,
+    show_default=True,
+    help="The number of CPUs a single tile flow may use.",
+)
+@click.option(
+    "--memory",
+    type=float,
+    default=get_total_memory(),
+    help="The memory budget of the build in GiB. [default: physical memory]",
+)
+@click.option(
+    "--memory-per-tile",
+    type=float,
+    default=4.0,
+    show_default=True,
+    help="The memory estimate of a single tile flow in GiB.",
+)
+@click.option("--force", is_flag=True, help="Rebuild all tiles and the fabric.")
+@click.option("--tiles-only", is_flag=True, help="Don't run the fabric flow.")
+def cli(
+    fabric_config,
+    pdk,
+    scl,
+    pdk_root,
+    manual_pdk,
+    cpus,
+    cpus_per_tile,
+    memory,
+    memory_per_tile,
+    force,
+    tiles_only,
+):
+    """
+    Hardens all stale tiles of a fabric in parallel and then the fabric itself.
+
+    FABRIC_CONFIG is the configuration file of the FABulousFabric flow. The
+    tiles are taken from the tile map of its fabric CSV and are looked up in
+    its tile libraries. A tile is stale if its macro views are missing or if
+    its inputs changed since the last successful build.
+    """
+    nodes = get_build_graph(fabric_config)
+    fabric_node = [node for node in nodes.values() if node.kind == "fabric"][0]
+
+    if tiles_only:
+        fabric_node.status = "skipped"
+
+    for node in nodes.values():
+        if node.kind == "subtile":
+            node.status = "source"
+        elif node.status == "pending":
+            if not force and not is_stale(node, nodes, pdk):
+                node.status = "up to date"
+
+    # Everything that depends on a stale node is stale as well
+    for node in nodes.values():
+        if node.kind == "fabric" and node.status == "up to date":
+            if any(nodes[d].status == "pending" for d in node.dependencies):
+                node.status = "pending"
+
+    stale = [node.name for node in nodes.values() if node.status == "pending"]
+    info(f"Build graph: {len(nodes)} nodes, {len(stale)} stale: {stale}")
+
+    def get_command(node: BuildNode) -> List[str]:
+        flow = "FABulousFabric" if node.kind == "fabric" else "FABulousTile"
+        command = [sys.executable, "-m", "librelane", "--flow", flow, "--pdk", pdk]
+        if scl is not None:
+            command += ["--scl", scl]
+        if pdk_root is not None:
+            command += ["--pdk-root", pdk_root]
+        if manual_pdk:
+            command += ["--manual-pdk"]
+        command += [node.config]
+        return command
+
+    def run_node(node: BuildNode, node_cpus: int) -> int:
+        log_file = get_build_file(node, pdk, "log")
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+        env = os.environ.copy()
+        env["_OPENLANE_MAX_CORES"] = str(node_cpus)
+
+        with open(log_file, "w") as log:
+            return subprocess.run(
+                get_command(node),
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                env=env,
+            ).returncode
+
+    def is_ready(node: BuildNode) -> bool:
+        return node.status == "pending" and all(
+            nodes[d].status in ["source", "up to date", "done"]
+            for d in node.dependencies
+        )
+
+    def block_dependents(name: str):
+        for node in nodes.values():
+            if name in node.dependencies and node.status == "pending":
+                node.status = "blocked"
+                block_dependents(node.name)
+
+    running: Dict[Future, Tuple[BuildNode, int, float]] = {}
+    used_cpus = 0
+    used_memory = 0.0
+
+    with ThreadPoolExecutor(max_workers=max(1, cpus)) as tpe:
+        while True:
+            for node in nodes.values():
+                if not is_ready(node):
+                    continue
+
+                # The fabric uses all of the budget
+                if node.kind == "fabric":
+                    (node_cpus, node_memory) = (cpus, memory)
+                else:
+                    node_cpus = min(cpus_per_tile, cpus)
+                    node_memory = memory_per_tile
+
+                # At least one node always runs, even if it exceeds the budget
+                if running and (
+                    used_cpus + node_cpus > cpus or used_memory + node_memory > memory
+                ):
+                    continue
+
+                info(f"Starting {node.kind} {node.name}")
+                node.status = "running"
+                node.start = time.time()
+                used_cpus += node_cpus
+                used_memory += node_memory
+                future = tpe.submit(run_node, node, node_cpus)
+                running[future] = (node, node_cpus, node_memory)
+
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                (node, node_cpus, node_memory) = running.pop(future)
+                used_cpus -= node_cpus
+                used_memory -= node_memory
+                node.end = time.time()
+
+                if future.result() == 0 and (
+                    node.kind == "fabric" or has_views(node, pdk)
+                ):
+                    node.status = "done"
+                    # Record the inputs after the build, as the flow
+                    # promotes the generated sources to the tile directory
+                    node.fingerprint = get_fingerprint(node, nodes, pdk)
+                    with open(get_build_file(node, pdk, "fingerprint"), "w") as f:
+                        f.write(node.fingerprint)
+                    success(f"Finished {node.kind} {node.name}")
+                else:
+                    node.status = "failed"
+                    err(
+                        f"Failed to build {node.kind} {node.name}, see {get_build_file(node, pdk, 'log')}"
+                    )
+                    block_dependents(node.name)
+
+    # Report
+    report = []
+    info("Build summary:")
+    for node in nodes.values():
+        if node.kind == "subtile":
+            continue
+        duration = None
+        if node.start is not None and node.end is not None:
+            duration = node.end - node.start
+        report.append(
+            {
+                "name": node.name,
+                "kind": node.kind,
+                "status": node.status,
+                "dependencies": node.dependencies,
+                "duration": duration,
+            }
+        )
+        summary = f"{node.kind} {node.name}: {node.status}"
+        if duration is not None:
+            summary += f" ({duration:.1f} s)"
+        info(summary)
+
+    report_path = os.path.join(fabric_node.directory, f"build_report.{pdk}.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=4)
+    info(f"Wrote the build report to {report_path}")
+
+    failed = [node.name for node in nodes.values() if node.status == "failed"]
+    if failed:
+        raise click.ClickException(f"Failed to build: {failed}")
+
+
+if __name__ == "__main__":
+    cli()
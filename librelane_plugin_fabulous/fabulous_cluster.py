@@ -0,0 +1,613 @@
+import re
+import json
+import hashlib
+import dataclasses
+from typing import List, Tuple, Union, Optional, Dict, Any, Set
+
+from librelane.flows import FlowError
+
+# A bit of the netlist as referenced in Verilog: either a constant such as
+# "1'b0" or a (name, index) pair, the index being None for scalars
+BitReference = Union[str, Tuple[str, Optional[int]]]
+
+CONSTANTS = {"0": "1'b0", "1": "1'b1", "x": "1'bx", "z": "1'bz"}
+
+identifier_rx = re.compile(r"^[A-Za-z_][A-Za-z0-9_$]*$")
+
+
+@dataclasses.dataclass
+class Cluster:
+    """
+    A rectangular region of the tile map that is hardened as one macro.
+    The coordinates are FABulous tile coordinates of the top left tile.
+    """
+
+    x: int
+    y: int
+    columns: int
+    rows: int
+    tiles: List[Tuple[str, int, int]] = dataclasses.field(default_factory=list)
+    module: Optional[str] = None
+    connections: Dict[str, List[BitReference]] = dataclasses.field(
+        default_factory=dict
+    )
+
+    @property
+    def instance_name(self) -> str:
+        return f"Cluster_X{self.x}Y{self.y}_{self.module}"
+
+
+def partition_placement(
+    placement: Dict[str, Any],
+    sizes: Dict[str, Tuple[int, int]],
+    cluster_size: Tuple[int, int],
+    fabric_size: Tuple[int, int],
+) -> List[Cluster]:
+    """
+    Partitions the tile instances of a placement grid description into
+    clusters of cluster_size (columns, rows) tiles. Clusters at the right
+    and bottom edges of the fabric may be smaller. sizes maps supertiles
+    to their size in tiles, which must not cross a cluster boundary.
+    """
+    (cluster_columns, cluster_rows) = cluster_size
+    (fabric_columns, fabric_rows) = fabric_size
+
+    if cluster_columns < 1 or cluster_rows < 1:
+        raise FlowError(f"Invalid cluster size {cluster_columns}x{cluster_rows}")
+
+    clusters: Dict[Tuple[int, int], Cluster] = {}
+    for master, data in placement["macros"].items():
+        (columns, rows) = sizes.get(master, (1, 1))
+        for x, y in data["tiles"]:
+            (cx, cy) = (x // cluster_columns, y // cluster_rows)
+            if (x + columns - 1) // cluster_columns != cx or (
+                y + rows - 1
+            ) // cluster_rows != cy:
+                raise FlowError(
+                    f"Tile_X{x}Y{y}_{master} crosses the boundary of a {cluster_columns}x{cluster_rows} cluster, choose a cluster size that is aligned to the supertiles"
+                )
+            if (cx, cy) not in clusters:
+                (cluster_x, cluster_y) = (cx * cluster_columns, cy * cluster_rows)
+                clusters[(cx, cy)] = Cluster(
+                    x=cluster_x,
+                    y=cluster_y,
+                    columns=min(cluster_columns, fabric_columns - cluster_x),
+                    rows=min(cluster_rows, fabric_rows - cluster_y),
+                )
+            clusters[(cx, cy)].tiles.append((master, x, y))
+
+    return [clusters[key] for key in sorted(clusters, key=lambda key: key[::-1])]
+
+
+def get_window(
+    placement: Dict[str, Any],
+    sizes: Dict[str, Tuple[int, int]],
+    window: Tuple[int, int, int, int],
+) -> Cluster:
+    """
+    Returns the tile instances of a placement grid description inside
+    window, given as the (x, y) coordinates of its top left and bottom
+    right tile. Supertiles must be fully inside or outside the window.
+    """
+    (x0, y0, x1, y1) = window
+    if x0 > x1 or y0 > y1 or x0 < 0 or y0 < 0:
+        raise FlowError(f"Invalid window {list(window)}")
+
+    cluster = Cluster(x=x0, y=y0, columns=x1 - x0 + 1, rows=y1 - y0 + 1)
+    for master, data in placement["macros"].items():
+        (columns, rows) = sizes.get(master, (1, 1))
+        for x, y in data["tiles"]:
+            inside = [
+                x0 <= tile_x <= x1 and y0 <= tile_y <= y1
+                for tile_x in range(x, x + columns)
+                for tile_y in range(y, y + rows)
+            ]
+            if all(inside):
+                cluster.tiles.append((master, x, y))
+            elif any(inside):
+                raise FlowError(
+                    f"Tile_X{x}Y{y}_{master} crosses the boundary of the window {list(window)}"
+                )
+
+    if len(cluster.tiles) == 0:
+        raise FlowError(f"The window {list(window)} contains no tiles")
+
+    return cluster
+
+
+def get_cluster_placement(
+    placement: Dict[str, Any],
+    cluster: Cluster,
+    origin: Tuple[Any, Any] = (0, 0),
+) -> Dict[str, Any]:
+    """
+    Returns the placement grid description of the tiles of a cluster,
+    relative to the cluster and with its bottom left corner at origin.
+    """
+    left = placement["column_offsets"][cluster.x]
+    bottom = placement["row_offsets"][cluster.y + cluster.rows - 1]
+
+    cluster_placement = {
+        "origin": list(origin),
+        "column_offsets": [
+            offset - left
+            for offset in placement["column_offsets"][
+                cluster.x : cluster.x + cluster.columns
+            ]
+        ],
+        "row_offsets": [
+            offset - bottom
+            for offset in placement["row_offsets"][cluster.y : cluster.y + cluster.rows]
+        ],
+        "orientation": placement["orientation"],
+        "macros": {},
+    }
+    for master, x, y in cluster.tiles:
+        cluster_placement["macros"].setdefault(
+            master, {"rows": placement["macros"][master]["rows"], "tiles": []}
+        )["tiles"].append([x - cluster.x, y - cluster.y])
+
+    return cluster_placement
+
+
+def escape(name: str) -> str:
+    """
+    Returns name as a Verilog identifier, escaping it if needed.
+    """
+    if identifier_rx.match(name):
+        return name
+    return f"\\{name} "
+
+
+def get_expression(references: List[BitReference]) -> str:
+    """
+    Returns a Verilog expression of a list of bits (LSB first),
+    merging consecutive bits of the same vector into part selects.
+    """
+    runs: List[List[Any]] = []
+    for reference in reversed(references):
+        if isinstance(reference, str):
+            runs.append([reference, None, None])
+            continue
+        (name, index) = reference
+        if (
+            index is not None
+            and runs
+            and runs[-1][0] == name
+            and runs[-1][2] is not None
+            and runs[-1][2] - 1 == index
+        ):
+            runs[-1][2] = index
+        else:
+            runs.append([name, index, index])
+
+    parts = []
+    for name, msb, lsb in runs:
+        if msb is None:
+            parts.append(name if name in CONSTANTS.values() else escape(name))
+        elif msb == lsb:
+            parts.append(f"{escape(name)}[{msb}]")
+        else:
+            parts.append(f"{escape(name)}[{msb}:{lsb}]")
+
+    if len(parts) == 1:
+        return parts[0]
+    return "{" + ", ".join(parts) + "}"
+
+
+def get_declaration(kind: str, name: str, width: int, offset: int = 0) -> str:
+    if width == 1 and offset == 0:
+        return f"{kind} {escape(name)};"
+    return f"{kind} [{offset + width - 1}:{offset}] {escape(name)};"
+
+
+def get_parameter(value: Any) -> str:
+    # Yosys writes numeric parameters as binary strings
+    if isinstance(value, str) and value and set(value) <= {"0", "1", "x", "z"}:
+        return f"{len(value)}'b{value}"
+    if isinstance(value, int):
+        return str(value)
+    return json.dumps(str(value))
+
+
+def get_instance(
+    module: str,
+    name: str,
+    connections: Dict[str, str],
+    parameters: Optional[Dict[str, Any]] = None,
+) -> List[str]:
+    lines = []
+    if parameters:
+        lines.append(f"    {escape(module)} #(")
+        lines.append(
+            ",\n".join(
+                f"        .{escape(key)}({get_parameter(value)})"
+                for key, value in parameters.items()
+            )
+        )
+        lines.append(f"    ) {escape(name)} (")
+    else:
+        lines.append(f"    {escape(module)} {escape(name)} (")
+    lines.append(
+        ",\n".join(
+            f"        .{escape(port)}({expression})"
+            for port, expression in connections.items()
+        )
+    )
+    lines.append("    );")
+    return lines
+
+
+def get_top_references(module: Dict[str, Any]) -> Tuple[
+    Dict[Any, BitReference],
+    List[str],
+    List[str],
+]:
+    """
+    Names every bit of the top module. Ports are preferred,
+    then public net names, then hidden ones.
+
+    Returns the name of each bit, the wire declarations and the
+    assignments needed for ports that alias other ports or constants.
+    """
+    references: Dict[Any, BitReference] = {}
+    declarations: List[str] = []
+    assignments: List[str] = []
+
+    for port_name, port in module["ports"].items():
+        bits = port["bits"]
+        offset = port.get("offset", 0)
+        for i, bit in enumerate(bits):
+            reference = (port_name, None if len(bits) == 1 else offset + i)
+            if isinstance(bit, str):
+                if port["direction"] == "output":
+                    assignments.append(
+                        f"assign {get_expression([reference])} = {CONSTANTS[bit]};"
+                    )
+                continue
+            if bit not in references:
+                references[bit] = reference
+            elif port["direction"] == "output":
+                assignments.append(
+                    f"assign {get_expression([reference])} = {get_expression([references[bit]])};"
+                )
+            else:
+                assignments.append(
+                    f"assign {get_expression([references[bit]])} = {get_expression([reference])};"
+                )
+
+    netnames = sorted(
+        module["netnames"].items(),
+        key=lambda item: (item[1].get("hide_name", 0), item[0]),
+    )
+    for net_name, net in netnames:
+        if net_name in module["ports"]:
+            continue
+        bits = net["bits"]
+        offset = net.get("offset", 0)
+        used = False
+        for i, bit in enumerate(bits):
+            if isinstance(bit, str) or bit in references:
+                continue
+            references[bit] = (net_name, None if len(bits) == 1 else offset + i)
+            used = True
+        if used:
+            declarations.append(get_declaration("wire", net_name, len(bits), offset))
+
+    return (references, declarations, assignments)
+
+
+@dataclasses.dataclass
+class Netlist:
+    """
+    The flat top-level netlist of a fabric, as written by Yosys'
+    ``write_json``, with the tiles as black boxes.
+    """
+
+    top: str
+    module: Dict[str, Any]
+    port_bits: Set[Any]
+    users: Dict[Any, Set[str]]
+
+    @classmethod
+    def load(cls, netlist_json: str, top: str) -> "Netlist":
+        with open(netlist_json, "r") as f:
+            design = json.load(f)
+
+        if top not in design["modules"]:
+            raise FlowError(f"Could not find module {top} in {netlist_json}")
+
+        module = design["modules"][top]
+
+        port_bits: Set[Any] = set()
+        for port in module["ports"].values():
+            port_bits.update(bit for bit in port["bits"] if not isinstance(bit, str))
+
+        users: Dict[Any, Set[str]] = {}
+        for cell_name, cell in module["cells"].items():
+            for bits in cell["connections"].values():
+                for bit in bits:
+                    if not isinstance(bit, str):
+                        users.setdefault(bit, set()).add(cell_name)
+
+        return cls(top=top, module=module, port_bits=port_bits, users=users)
+
+    def get_routing_demand(
+        self, rects: Dict[str, Tuple[int, int, int, int]]
+    ) -> Dict[str, int]:
+        """
+        Counts the nets of the top module by how they are connected, given
+        the (x, y, columns, rows) of each tile instance on the tile grid:
+
+        * abutted: between two neighbouring tiles
+        * pinned: to a single tile, the pin is placed on the tile pin
+        * unconnected: not connected to any pin
+        * routed: everything else, which needs top-level routing
+
+        Tile pins tied to constants are counted as "tied",
+        as they need tie cells and routing as well.
+        """
+
+        def is_adjacent(a, b) -> bool:
+            (ax, ay, a_columns, a_rows) = a
+            (bx, by, b_columns, b_rows) = b
+            overlap_x = ax < bx + b_columns and bx < ax + a_columns
+            overlap_y = ay < by + b_rows and by < ay + a_rows
+            return (
+                overlap_y and (ax + a_columns == bx or bx + b_columns == ax)
+            ) or (overlap_x and (ay + a_rows == by or by + b_rows == ay))
+
+        counts = {
+            "nets": 0,
+            "abutted": 0,
+            "pinned": 0,
+            "unconnected": 0,
+            "routed": 0,
+            "tied": 0,
+        }
+
+        for bit, users in self.users.items():
+            counts["nets"] += 1
+            cells = sorted(users)
+            if len(cells) == 1:
+                counts["pinned" if bit in self.port_bits else "unconnected"] += 1
+            elif (
+                len(cells) == 2
+                and cells[0] in rects
+                and cells[1] in rects
+                and is_adjacent(rects[cells[0]], rects[cells[1]])
+            ):
+                counts["abutted"] += 1
+            else:
+                counts["routed"] += 1
+
+        for cell in self.module["cells"].values():
+            for bits in cell["connections"].values():
+                counts["tied"] += len([bit for bit in bits if bit in ["0", "1"]])
+
+        return counts
+
+    def get_cluster_module(self, cluster: Cluster) -> Dict[str, Any]:
+        """
+        Returns the ports, the number of internal nets and the tile instances
+        of a cluster, and sets the connections of the cluster.
+
+        The ports of a cluster are the bits that are used outside of it or
+        that are ports of the fabric. They are named after the tile port they
+        were found at first, relative to the cluster, e.g.
+        ``Tile_X0Y1_FrameData``.
+        """
+        cells = self.module["cells"]
+
+        members = {}
+        for master, x, y in sorted(cluster.tiles, key=lambda tile: (tile[2], tile[1])):
+            cell_name = f"Tile_X{x}Y{y}_{master}"
+            if cell_name not in cells:
+                raise FlowError(f"Could not find {cell_name} in the fabric netlist")
+            members[cell_name] = f"Tile_X{x - cluster.x}Y{y - cluster.y}"
+        member_set = set(members)
+
+        # Assign the bits to ports or internal nets in a canonical order
+        port_bits_of: Dict[Tuple[str, str], List[Any]] = {}
+        bit_ports: Dict[Any, Tuple[Tuple[str, str], int]] = {}
+        internal: Dict[Any, int] = {}
+        for cell_name, relative_name in members.items():
+            cell = cells[cell_name]
+            for port_name in sorted(cell["connections"]):
+                for bit in cell["connections"][port_name]:
+                    if isinstance(bit, str) or bit in bit_ports or bit in internal:
+                        continue
+                    if bit not in self.port_bits and self.users[bit] <= member_set:
+                        internal[bit] = len(internal)
+                        continue
+
+                    directions = {
+                        cells[user]["port_directions"][port]
+                        for user in self.users[bit] & member_set
+                        for port, bits in cells[user]["connections"].items()
+                        if bit in bits
+                    }
+                    if "inout" in directions:
+                        direction = "inout"
+                    elif "output" in directions:
+                        direction = "output"
+                    else:
+                        direction = "input"
+
+                    key = (f"{relative_name}_{port_name}", direction)
+                    bit_ports[bit] = (key, len(port_bits_of.setdefault(key, [])))
+                    port_bits_of[key].append(bit)
+
+        # Only add the direction to a port name if needed to make it unique
+        base_names: Dict[str, int] = {}
+        for base_name, _ in port_bits_of:
+            base_names[base_name] = base_names.get(base_name, 0) + 1
+        port_names = {
+            key: key[0] if base_names[key[0]] == 1 else f"{key[0]}_{key[1]}"
+            for key in port_bits_of
+        }
+
+        def get_reference(bit: Any) -> BitReference:
+            if isinstance(bit, str):
+                return CONSTANTS[bit]
+            if bit in internal:
+                return ("cluster_net", internal[bit] if len(internal) > 1 else None)
+            (key, index) = bit_ports[bit]
+            return (port_names[key], index if len(port_bits_of[key]) > 1 else None)
+
+        instances = []
+        for cell_name, relative_name in members.items():
+            cell = cells[cell_name]
+            instances.append(
+                {
+                    "type": cell["type"],
+                    "name": f"{relative_name}_{cell_name.split('_', 2)[2]}",
+                    "parameters": cell.get("parameters", {}),
+                    "connections": {
+                        port_name: get_expression(
+                            [get_reference(bit) for bit in bits]
+                        )
+                        for port_name, bits in sorted(cell["connections"].items())
+                    },
+                }
+            )
+
+        cluster.connections = {
+            port_names[key]: list(bits) for key, bits in port_bits_of.items()
+        }
+
+        return {
+            "ports": [
+                (port_names[key], key[1], len(bits))
+                for key, bits in port_bits_of.items()
+            ],
+            "internal": len(internal),
+            "instances": instances,
+        }
+
+
+def write_module(name: str, cluster_module: Dict[str, Any], output: str):
+    """
+    Writes a cluster module as returned by Netlist.get_cluster_module().
+    """
+    lines = [f"module {escape(name)} ("]
+    lines.append(
+        ",\n".join(f"    {escape(port)}" for port, _, _ in cluster_module["ports"])
+    )
+    lines.append(");")
+    for port, direction, width in cluster_module["ports"]:
+        lines.append(f"    {get_declaration(direction, port, width)}")
+    if cluster_module["internal"]:
+        lines.append(
+            f"    {get_declaration('wire', 'cluster_net', cluster_module['internal'])}"
+        )
+    for instance in cluster_module["instances"]:
+        lines.append("")
+        lines += get_instance(
+            instance["type"],
+            instance["name"],
+            instance["connections"],
+            instance["parameters"],
+        )
+    lines.append("endmodule")
+
+    with open(output, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def write_cluster_netlists(
+    netlist_json: str,
+    top: str,
+    clusters: List[Cluster],
+    top_output: str,
+    module_output: str,
+) -> Dict[str, Cluster]:
+    """
+    Splits the flat top-level netlist of a fabric into cluster modules and
+    a top module that instantiates the clusters.
+
+    Clusters with the same tiles and the same connectivity share a module,
+    which is written to module_output formatted with the module name.
+
+    Returns the representative cluster of each module, by module name.
+    """
+    netlist = Netlist.load(netlist_json, top)
+    module = netlist.module
+
+    clustered = set()
+    signatures: Dict[str, str] = {}
+    modules: Dict[str, Cluster] = {}
+
+    for cluster in clusters:
+        clustered.update(
+            f"Tile_X{x}Y{y}_{master}" for master, x, y in cluster.tiles
+        )
+
+        cluster_module = netlist.get_cluster_module(cluster)
+        signature = hashlib.sha256(
+            json.dumps(
+                [cluster.columns, cluster.rows, cluster_module],
+                sort_keys=True,
+            ).encode("utf8")
+        ).hexdigest()
+
+        if signature not in signatures:
+            module_name = f"{top}_cluster_{len(signatures)}"
+            signatures[signature] = module_name
+            modules[module_name] = cluster
+            write_module(
+                module_name, cluster_module, module_output.format(module_name)
+            )
+
+        cluster.module = signatures[signature]
+
+    if unclustered := set(module["cells"]) - clustered:
+        raise FlowError(
+            f"{len(unclustered)} cell(s) of {top} are not part of any cluster, e.g. {sorted(unclustered)[0]}"
+        )
+
+    # The top module instantiates the clusters
+    (references, declarations, assignments) = get_top_references(module)
+
+    lines = [f"module {escape(top)} ("]
+    lines.append(",\n".join(f"    {escape(name)}" for name in module["ports"]))
+    lines.append(");")
+    for port_name, port in module["ports"].items():
+        declaration = get_declaration(
+            port["direction"], port_name, len(port["bits"]), port.get("offset", 0)
+        )
+        lines.append(f"    {declaration}")
+    for declaration in declarations:
+        lines.append(f"    {declaration}")
+    for assignment in assignments:
+        lines.append(f"    {assignment}")
+    for cluster in clusters:
+        lines.append("")
+        lines += get_instance(
+            cluster.module,
+            cluster.instance_name,
+            {
+                port_name: get_expression([references[bit] for bit in bits])
+                for port_name, bits in cluster.connections.items()
+            },
+        )
+    lines.append("endmodule")
+
+    with open(top_output, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+    return modules
+
+
+def write_window_netlist(
+    netlist_json: str,
+    top: str,
+    window: Cluster,
+    output: str,
+):
+    """
+    Extracts a window of the fabric as a module named like the fabric.
+    Its ports are the bits that cross the boundary of the window.
+    """
+    netlist = Netlist.load(netlist_json, top)
+    write_module(top, netlist.get_cluster_module(window), output)
@@ -0,0 +1,81 @@
+import os
+import pathlib
+import threading
+import contextlib
+import contextvars
+from typing import Any, Iterator, Optional
+
+import fabulous.fabulous_settings as fabulous_settings
+from fabulous.fabulous_settings import FABulousSettings
+
+_current_context: contextvars.ContextVar[Optional[FABulousSettings]] = (
+    contextvars.ContextVar("fabulous_context", default=None)
+)
+_install_lock = threading.Lock()
+
+
+class _ContextProxy:
+    """
+    Installed as FABulous' global context. Attribute accesses are forwarded
+    to the context of the calling thread, if it has one, otherwise to the
+    global context that was set before the proxy was installed.
+    """
+
+    def __init__(self, fallback: Optional[FABulousSettings]):
+        object.__setattr__(self, "_fallback", fallback)
+
+    def _get(self) -> FABulousSettings:
+        context = _current_context.get()
+        if context is not None:
+            return context
+
+        fallback = object.__getattribute__(self, "_fallback")
+        if fallback is None:
+            fallback = new_context(os.getcwd())
+            object.__setattr__(self, "_fallback", fallback)
+        return fallback
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self._get(), name, value)
+
+    def __repr__(self) -> str:
+        return repr(self._get())
+
+
+def _install_proxy():
+    # Someone may have called init_context() or reset_context()
+    # in the meantime, which replaces the proxy
+    with _install_lock:
+        if not isinstance(fabulous_settings._context_instance, _ContextProxy):
+            fabulous_settings._context_instance = _ContextProxy(
+                fabulous_settings._context_instance
+            )
+
+
+def new_context(proj_dir: str) -> FABulousSettings:
+    """
+    Returns a FABulous context for a single flow, without
+    any validation and without touching the environment.
+    """
+    return FABulousSettings.model_construct(
+        proj_dir=pathlib.Path(proj_dir).absolute(),
+        nix_shell=os.environ.get("FAB_NIX_SHELL"),
+    )
+
+
+@contextlib.contextmanager
+def use_context(context: FABulousSettings) -> Iterator[FABulousSettings]:
+    """
+    Makes the context of a flow the one returned by FABulous' get_context()
+    in the calling thread, and restores the previous one afterwards.
+    Scopes can be nested and other threads are not affected.
+    """
+    _install_proxy()
+    token = _current_context.set(context)
+    try:
+        yield context
+    finally:
+        _current_context.reset(token)
@@ -1,21 +1,31 @@
 import os
+import re
 import csv
+import time
+import json
 import glob
 import shutil
 import pickle
 import fnmatch
+import hashlib
 import pathlib
+import threading
+import dataclasses
 from decimal import Decimal
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Callable, List, Literal, Mapping, Tuple, Union, Optional, Dict, Any
 from librelane.steps import Step, OdbpyStep, OpenROADStep
 from librelane.steps.step import (
     ViewsUpdate,
     MetricsUpdate,
+    StepError,
+    StepException,
+    DeferredStepError,
 )
 from librelane.steps.common_variables import io_layer_variables
-from librelane.flows import Flow, FlowError
+from librelane.flows import Flow, FlowError, FlowException
 from librelane.state import DesignFormat, State
-from librelane.common import Path
+from librelane.common import Path, TclUtils
 from librelane.config import Variable
 from librelane.logging import (
     verbose,
@@ -39,7 +49,7 @@ from librelane.steps import (
     Misc,
 )
 from librelane.steps.common_variables import pdn_variables
-from librelane.common.misc import mkdirp
+from librelane.common.misc import mkdirp, get_latest_file, _get_process_limit
 
 import fabulous.fabric_cad.gen_npnr_model as model_gen_npnr
 from fabulous.fabric_generator.code_generator.code_generator_Verilog import (
@@ -58,7 +68,21 @@ from fabulous.fabric_cad.timing_model.models import (
 from fabulous.fabric_cad.timing_model.FABulous_timing_model_interface import (
     FABulousTimingModelInterface,
 )
-from fabulous.fabulous_settings import init_context
+
+from .fabulous_context import new_context, use_context
+from .fabulous_tile import is_gated
+from .fabulous_cluster import (
+    Cluster,
+    Netlist,
+    partition_placement,
+    get_window,
+    get_cluster_placement,
+    write_cluster_netlists,
+    write_window_netlist,
+)
+from .fabulous_bitstream import BitstreamIndex, read_fasm, load_spec
+from .fabulous_spef import get_reduced_spef
+from .fabulous_workers import NetlistCache, ToolPool, use_netlist_cache, use_pool
 
 __dir__ = os.path.dirname(os.path.abspath(__file__))
 
@@ -122,6 +146,793 @@ class FABulousPins(OdbpyStep):
         return super().get_command()
 
 
+def get_lef_size(lef_file: str) -> Tuple[Decimal, Decimal]:
+    """
+    Returns the size of the macro in a LEF file as (width, height).
+    """
+    # Parse LEF size such as: "  SIZE 68.640 BY 219.240 ;"
+    with open(lef_file, "r") as f:
+        while line := f.readline():
+            #   SIZE 784.48 BY 64.36 ;
+            if "SIZE" in line:
+                parts = line.strip().split(" ")
+                return (Decimal(parts[1]), Decimal(parts[3]))
+
+    raise FlowError(f"Could not find the SIZE of the macro in {lef_file}")
+
+
+macro_placement_variable = Variable(
+    "FABULOUS_MACRO_PLACEMENT",
+    Optional[Path],
+    "The placement of the tile macros as a compact grid description. Set by FABulousFabric, the instances are only expanded by the steps that need them.",
+)
+
+
+def expand_macro_placement(
+    placement_file: str,
+) -> List[Tuple[str, str, Decimal, Decimal, str]]:
+    """
+    Expands the grid description of the tile placement into
+    (instance name, master, x, y, orientation) tuples.
+
+    The file contains the origin of the tile grid, the offsets of the
+    columns and of the bottom of each row (indexed by the FABulous y
+    coordinate, which starts at the top) and the FABulous coordinates
+    of the instances of each master. Supertiles span multiple rows and
+    are named after their top left tile, but placed at their bottom left.
+    The instances are prefixed with "prefix" (default: "Tile").
+    """
+    with open(placement_file, "r") as f:
+        placement = json.load(f)
+
+    (origin_x, origin_y) = [Decimal(value) for value in placement["origin"]]
+    column_offsets = [Decimal(value) for value in placement["column_offsets"]]
+    row_offsets = [Decimal(value) for value in placement["row_offsets"]]
+    orientation = placement["orientation"]
+
+    prefix = placement.get("prefix", "Tile")
+
+    instances = []
+    for master, data in placement["macros"].items():
+        for x, y in data["tiles"]:
+            instances.append(
+                (
+                    f"{prefix}_X{x}Y{y}_{master}",
+                    master,
+                    origin_x + column_offsets[x],
+                    origin_y + row_offsets[y + data["rows"] - 1],
+                    orientation,
+                )
+            )
+    return instances
+
+
+def get_macro_placements(
+    macros, placement_file: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Returns the placed macro instances as a list of
+    {"name", "master", "box"} dicts, the box being [x0, y0, x1, y1] in µm.
+    """
+    placements = []
+    for macro_name, macro in macros.items():
+        (width, height) = get_lef_size(str(macro.lef[0]))
+        for instance_name, instance in macro.instances.items():
+            if instance.location is None:
+                continue
+            x, y = Decimal(instance.location[0]), Decimal(instance.location[1])
+            placements.append(
+                {
+                    "name": instance_name,
+                    "master": macro_name,
+                    "box": [x, y, x + width, y + height],
+                }
+            )
+
+    if placement_file is not None:
+        sizes = {}
+        for name, master, x, y, _ in expand_macro_placement(placement_file):
+            if master not in sizes:
+                sizes[master] = get_lef_size(str(macros[master].lef[0]))
+            (width, height) = sizes[master]
+            placements.append(
+                {
+                    "name": name,
+                    "master": master,
+                    "box": [x, y, x + width, y + height],
+                }
+            )
+
+    return placements
+
+
+@Step.factory.register()
+class FABulousMacroPlacement(Odb.ManualMacroPlacement):
+    """
+    Places the tile macros, expanding the grid description in
+    ``FABULOUS_MACRO_PLACEMENT`` into a placement configuration. Without it,
+    this step behaves like Odb.ManualMacroPlacement.
+    """
+
+    id = "Odb.FABulousMacroPlacement"
+    name = "FABulous Macro Placement"
+
+    config_vars = Odb.ManualMacroPlacement.config_vars + [macro_placement_variable]
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        if self.config["FABULOUS_MACRO_PLACEMENT"] is None:
+            return super().run(state_in, **kwargs)
+
+        instances = expand_macro_placement(self.config["FABULOUS_MACRO_PLACEMENT"])
+        with open(os.path.join(self.step_dir, "placement.cfg"), "w") as f:
+            for name, _, x, y, orientation in instances:
+                f.write(f"{name} {x} {y} {orientation}\n")
+
+        info(f"Placing {len(instances)} tile instances…")
+
+        return super(Odb.ManualMacroPlacement, self).run(state_in, **kwargs)
+
+
+@Step.factory.register()
+class FABulousCheckMacroInstances(OpenROAD.CheckMacroInstances):
+    """
+    Checks if all tile instances, including the ones in
+    ``FABULOUS_MACRO_PLACEMENT``, are in the design.
+    """
+
+    id = "OpenROAD.FABulousCheckMacroInstances"
+    name = "Check Macro Instances"
+
+    config_vars = OpenROAD.CheckMacroInstances.config_vars + [macro_placement_variable]
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        if self.config["FABULOUS_MACRO_PLACEMENT"] is None:
+            return super().run(state_in, **kwargs)
+
+        kwargs, env = self.extract_env(kwargs)
+
+        macro_instance_pairs = []
+        for macro_name, data in (self.config["MACROS"] or {}).items():
+            for instance_name in data.instances:
+                macro_instance_pairs += [instance_name, macro_name]
+        for name, master, _, _, _ in expand_macro_placement(
+            self.config["FABULOUS_MACRO_PLACEMENT"]
+        ):
+            macro_instance_pairs += [name, master]
+
+        env["_check_macro_instances"] = TclUtils.join(macro_instance_pairs)
+
+        corner_name, file_list = self._get_corner_files(prioritize_nl=True)
+        file_list.set_env(env)
+        env["_CURRENT_CORNER_NAME"] = corner_name
+
+        return super(OpenROAD.CheckMacroInstances, self).run(
+            state_in, env=env, **kwargs
+        )
+
+
+def get_boundary_drc_windows(
+    placements: List[Dict[str, Any]],
+    die_area: Tuple[Decimal, Decimal, Decimal, Decimal],
+    margin: Decimal,
+) -> List[Dict[str, Any]]:
+    """
+    Returns the DRC windows of an abutted fabric.
+
+    Windows are placed around each seam between two tiles, each tile corner,
+    the halo between the tiles and the die boundary and around the top-level
+    shapes on top of each tile. Seam and corner windows with the same
+    neighbouring tiles look the same and are therefore only returned once,
+    their "weight" is the number of occurrences in the fabric. The halo and
+    top-level windows contain top-level shapes that differ between the tile
+    instances, so they are returned for each instance and merged by the clip
+    script if their layout is the same.
+    """
+    windows: Dict[Any, Dict[str, Any]] = {}
+
+    def add_window(key, kind, box, masters):
+        if key in windows:
+            windows[key]["weight"] += 1
+            return
+        windows[key] = {
+            "id": f"{kind}_{len(windows)}",
+            "kind": kind,
+            "box": [float(coord) for coord in box],
+            "masters": masters,
+            "weight": 1,
+        }
+
+    # Seams between horizontally and vertically abutted tiles
+    by_left_edge: Dict[Decimal, List[Dict[str, Any]]] = {}
+    by_bottom_edge: Dict[Decimal, List[Dict[str, Any]]] = {}
+    for placement in placements:
+        by_left_edge.setdefault(placement["box"][0], []).append(placement)
+        by_bottom_edge.setdefault(placement["box"][1], []).append(placement)
+
+    for west in placements:
+        (x0, y0, x1, y1) = west["box"]
+        for east in by_left_edge.get(x1, []):
+            bottom = max(y0, east["box"][1])
+            top = min(y1, east["box"][3])
+            if bottom >= top:
+                continue
+            add_window(
+                ("seam_v", west["master"], east["master"], east["box"][1] - y0),
+                "seam_v",
+                [x1 - margin, bottom, x1 + margin, top],
+                [west["master"], east["master"]],
+            )
+
+    for south in placements:
+        (x0, y0, x1, y1) = south["box"]
+        for north in by_bottom_edge.get(y1, []):
+            left = max(x0, north["box"][0])
+            right = min(x1, north["box"][2])
+            if left >= right:
+                continue
+            add_window(
+                ("seam_h", south["master"], north["master"], north["box"][0] - x0),
+                "seam_h",
+                [left, y1 - margin, right, y1 + margin],
+                [south["master"], north["master"]],
+            )
+
+    # Corners, keyed by the tiles in each quadrant around it
+    corners: Dict[Tuple[Decimal, Decimal], Dict[str, str]] = {}
+    for placement in placements:
+        (x0, y0, x1, y1) = placement["box"]
+        corners.setdefault((x0, y0), {})["NE"] = placement["master"]
+        corners.setdefault((x1, y0), {})["NW"] = placement["master"]
+        corners.setdefault((x0, y1), {})["SE"] = placement["master"]
+        corners.setdefault((x1, y1), {})["SW"] = placement["master"]
+
+    for (x, y), quadrants in corners.items():
+        masters = [quadrants.get(quadrant) for quadrant in ["SW", "SE", "NW", "NE"]]
+        add_window(
+            ("corner", *masters),
+            "corner",
+            [x - margin, y - margin, x + margin, y + margin],
+            masters,
+        )
+
+    # Halo between the outermost tiles and the die boundary
+    (die_x0, die_y0, die_x1, die_y1) = die_area
+    if placements:
+        array_x0 = min(placement["box"][0] for placement in placements)
+        array_y0 = min(placement["box"][1] for placement in placements)
+        array_x1 = max(placement["box"][2] for placement in placements)
+        array_y1 = max(placement["box"][3] for placement in placements)
+
+        for placement in placements:
+            (x0, y0, x1, y1) = placement["box"]
+            master = placement["master"]
+            if x0 == array_x0:
+                add_window(
+                    ("halo", "W", placement["name"]),
+                    "halo",
+                    [die_x0, y0, x0 + margin, y1],
+                    [master],
+                )
+            if x1 == array_x1:
+                add_window(
+                    ("halo", "E", placement["name"]),
+                    "halo",
+                    [x1 - margin, y0, die_x1, y1],
+                    [master],
+                )
+            if y0 == array_y0:
+                add_window(
+                    ("halo", "S", placement["name"]),
+                    "halo",
+                    [x0, die_y0, x1, y0 + margin],
+                    [master],
+                )
+            if y1 == array_y1:
+                add_window(
+                    ("halo", "N", placement["name"]),
+                    "halo",
+                    [x0, y1 - margin, x1, die_y1],
+                    [master],
+                )
+
+        for key, box in [
+            ("SW", [die_x0, die_y0, array_x0 + margin, array_y0 + margin]),
+            ("SE", [array_x1 - margin, die_y0, die_x1, array_y0 + margin]),
+            ("NW", [die_x0, array_y1 - margin, array_x0 + margin, die_y1]),
+            ("NE", [array_x1 - margin, array_y1 - margin, die_x1, die_y1]),
+        ]:
+            add_window(("halo_corner", key), "halo_corner", box, [])
+
+    # Top-level shapes (power straps, pins) on top of the tiles
+    # The windows are refined by the clip script around the actual shapes
+    for placement in placements:
+        add_window(
+            ("toplevel", placement["name"]),
+            "toplevel",
+            placement["box"],
+            [placement["master"]],
+        )
+
+    return list(windows.values())
+
+
+@Step.factory.register()
+class FABulousDRC(KLayout.DRC):
+    """
+    Runs DRC using KLayout.
+
+    With ``FABULOUS_DRC_MODE`` set to ``boundary``, only windows around
+    the tile seams, corners, the halo and the top-level shapes are checked,
+    since the tiles themselves are already DRC clean. Windows with the same
+    layout are only checked once, in parallel worker processes.
+    """
+
+    id = "KLayout.FABulousDRC"
+    name = "Design Rule Check (KLayout, FABulous)"
+
+    config_vars = KLayout.DRC.config_vars + [
+        macro_placement_variable,
+        Variable(
+            "FABULOUS_DRC_MODE",
+            Literal["full", "boundary"],
+            "Run the full-chip DRC or only check windows around the tile boundaries.",
+            default="full",
+        ),
+        Variable(
+            "FABULOUS_DRC_WINDOW_MARGIN",
+            Decimal,
+            "How far each boundary window extends into the tiles.",
+            units="µm",
+            default=5,
+        ),
+        Variable(
+            "FABULOUS_DRC_WINDOW_CONTEXT",
+            Decimal,
+            "Additional layout clipped around each window. Violations in this area are ignored, as they may be caused by the clipping itself.",
+            units="µm",
+            default=2,
+        ),
+        Variable(
+            "FABULOUS_DRC_JOBS",
+            Optional[int],
+            "The number of windows checked in parallel. If unset, this will be equal to your machine's thread count.",
+        ),
+    ]
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        if self.config["FABULOUS_DRC_MODE"] == "full":
+            return super().run(state_in, **kwargs)
+
+        if not self.config["KLAYOUT_DRC_RUNSET"]:
+            self.warn(
+                f"KLAYOUT_DRC_RUNSET is unset. KLayout.DRC may not be supported for the {self.config['PDK']} PDK. This step will be skipped."
+            )
+            return {}, {}
+
+        kwargs, env = self.extract_env(kwargs)
+
+        windows_dir = os.path.join(self.step_dir, "windows")
+        reports_dir = os.path.join(self.step_dir, "reports")
+        mkdirp(windows_dir)
+        mkdirp(reports_dir)
+
+        placements = get_macro_placements(
+            self.config["MACROS"] or {}, self.config["FABULOUS_MACRO_PLACEMENT"]
+        )
+        windows = get_boundary_drc_windows(
+            placements,
+            self.config["DIE_AREA"],
+            self.config["FABULOUS_DRC_WINDOW_MARGIN"],
+        )
+        for window in windows:
+            window["margin"] = float(self.config["FABULOUS_DRC_WINDOW_MARGIN"])
+            window["context"] = float(self.config["FABULOUS_DRC_WINDOW_CONTEXT"])
+
+        windows_file = os.path.join(self.step_dir, "windows.json")
+        with open(windows_file, "w") as f:
+            json.dump(windows, f, indent=4)
+
+        script = os.path.join(
+            os.path.dirname(__file__), "scripts", "klayout_window_drc.py"
+        )
+
+        self.run_pya_script(
+            [
+                "python3",
+                script,
+                "clip",
+                "--input",
+                os.path.abspath(state_in[DesignFormat.GDS]),
+                "--top",
+                self.config["DESIGN_NAME"],
+                "--windows",
+                windows_file,
+                "--output-dir",
+                windows_dir,
+            ],
+            env=env,
+            log_to=os.path.join(self.step_dir, "clip.log"),
+        )
+
+        with open(os.path.join(windows_dir, "windows.json"), "r") as f:
+            windows = json.load(f)
+
+        info(
+            f"Checking {len(windows)} unique windows for {len(placements)} tile instances…"
+        )
+
+        # Pass the defines like the PDK-specific methods of KLayout.DRC
+        opts = []
+        defines = self.config["KLAYOUT_DRC_DEFINES"] or {}
+        if self.config["PDK"] in ["sky130A", "sky130B"]:
+            for k in ["feol", "beol", "floating_metal", "offgrid", "seal"]:
+                opts.extend(["-rd", f"{k}={str(defines[k]).lower()}"])
+            opts.extend(["-rd", "threads=1"])
+        else:
+            for k, v in defines.items():
+                opts.extend(["-rd", f"{k}={v}"])
+
+        def check_window(window: Dict[str, Any]) -> int:
+            lyrdb_report = os.path.join(reports_dir, f"{window['id']}.lyrdb")
+
+            self.run_subprocess(
+                [
+                    "klayout",
+                    "-b",
+                    "-zz",
+                    "-r",
+                    self.config["KLAYOUT_DRC_RUNSET"],
+                    "-rd",
+                    f"input={os.path.join(windows_dir, window['id'] + '.gds')}",
+                    "-rd",
+                    f"topcell={window['id']}",
+                    "-rd",
+                    f"report={lyrdb_report}",
+                    *opts,
+                ],
+                env=env,
+                log_to=os.path.join(reports_dir, f"{window['id']}.log"),
+                silent=True,
+            )
+
+            subprocess_result = self.run_pya_script(
+                [
+                    "python3",
+                    script,
+                    "count",
+                    "--report",
+                    lyrdb_report,
+                    "--window",
+                    *[str(coord) for coord in window["box"]],
+                ],
+                env=env,
+                log_to=os.path.join(reports_dir, f"{window['id']}.count.log"),
+                silent=True,
+            )
+            return subprocess_result["generated_metrics"]["klayout__drc_error__count"]
+
+        jobs = self.config["FABULOUS_DRC_JOBS"] or _get_process_limit()
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            counts = list(executor.map(check_window, windows))
+
+        summary = {}
+        total = 0
+        for window, count in zip(windows, counts):
+            summary[window["id"]] = {
+                "masters": window["masters"],
+                "box": window["box"],
+                "weight": window["weight"],
+                "count": count,
+            }
+            if count:
+                self.warn(
+                    f"{count} DRC violation(s) in window {window['id']} ({window['kind']} {window['masters']}), occurring {window['weight']} time(s)"
+                )
+            total += count * window["weight"]
+
+        with open(os.path.join(reports_dir, "drc.windows.json"), "w") as f:
+            json.dump(summary, f, indent=4)
+
+        return {}, {
+            "klayout__drc_error__count": total,
+            "fabulous__drc_window__count": len(windows),
+        }
+
+
+def write_blackbox_netlist(
+    netlist: str, module: str, output: str, power_pins: List[str]
+):
+    """
+    Writes a Verilog blackbox of a module with only its port declarations,
+    taken from a gate-level netlist. The power pins are added as inout ports
+    if the netlist doesn't have them.
+    """
+    module_rx = re.compile(
+        rf"^\s*module\s+{re.escape(module)}\s*\(([^;]*)\)\s*;", re.MULTILINE
+    )
+    port_rx = re.compile(r"^(input|output|inout)\b")
+
+    with open(netlist, "r") as f:
+        content = f.read()
+
+    match = module_rx.search(content)
+    if match is None:
+        raise FlowError(f"Could not find module {module} in {netlist}")
+
+    ports = [port.strip() for port in match.group(1).split(",") if port.strip()]
+
+    declarations = []
+    for line in content[match.end() :].split(";"):
+        line = line.strip() + ";"
+        if line.startswith("endmodule"):
+            break
+        if port_rx.match(line):
+            declarations.append(" ".join(line.split()))
+
+    for power_pin in reversed(power_pins):
+        if power_pin not in ports:
+            ports.insert(0, power_pin)
+            declarations.insert(0, f"inout {power_pin};")
+
+    with open(output, "w") as f:
+        f.write(f"(* blackbox *)\n")
+        f.write(f"module {module} ({', '.join(ports)});\n")
+        for declaration in declarations:
+            f.write(f"    {declaration}\n")
+        f.write("endmodule\n")
+
+
+@Step.factory.register()
+class FABulousLVS(Netgen.LVS):
+    """
+    Performs Layout vs. Schematic checks using Netgen.
+
+    With ``FABULOUS_HIERARCHICAL_LVS`` enabled, the tile macros are treated as
+    verified black boxes, whose ports are taken from their ``nl`` views.
+    Only the top-level connectivity is compared: abutment nets,
+    FrameData/FrameStrobe chains, external I/Os and power.
+    """
+
+    id = "Netgen.FABulousLVS"
+    name = "Netgen LVS (FABulous)"
+
+    config_vars = Netgen.LVS.config_vars + [
+        Variable(
+            "FABULOUS_HIERARCHICAL_LVS",
+            bool,
+            "Treat the tile macros as verified black boxes and only compare the top-level connectivity.",
+            default=False,
+        ),
+    ]
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        if not self.config["FABULOUS_HIERARCHICAL_LVS"]:
+            return super().run(state_in, **kwargs)
+
+        blackbox_dir = os.path.join(self.step_dir, "blackboxes")
+        mkdirp(blackbox_dir)
+
+        power_pins = [self.config["VDD_PIN"], self.config["GND_PIN"]]
+
+        macros = {}
+        for macro_name, macro in (self.config["MACROS"] or {}).items():
+            if not macro.nl:
+                raise StepException(
+                    f"Hierarchical LVS requires an 'nl' view for the macro {macro_name}."
+                )
+            blackbox = os.path.join(blackbox_dir, f"{macro_name}.bb.v")
+            write_blackbox_netlist(str(macro.nl[0]), macro_name, blackbox, power_pins)
+
+            # Only the blackbox is passed on to Netgen
+            macros[macro_name] = dataclasses.replace(
+                macro, nl=[], pnl=[], vh=[Path(blackbox)]
+            )
+
+        info(f"Comparing the top-level connectivity of {len(macros)} tile macro(s)…")
+
+        self.config = self.config.copy(
+            MACROS=macros,
+            LVS_INCLUDE_MARCO_NETLISTS=True,
+        )
+        return super().run(state_in, **kwargs)
+
+
+def get_lef_abstract(lef_file: str, macro: str) -> Dict[str, Any]:
+    """
+    Returns the footprint of a macro in a LEF file and the direction,
+    use and shapes of each of its pins. Obstructions are ignored.
+    """
+    abstract: Dict[str, Any] = {"size": None, "pins": {}}
+    in_macro = False
+    pin = None
+    layer = None
+
+    with open(lef_file, "r") as f:
+        for line in f:
+            tokens = line.replace(";", " ").split()
+            if not tokens:
+                continue
+            if tokens[0] == "MACRO":
+                in_macro = tokens[1] == macro
+            elif not in_macro:
+                continue
+            elif tokens[0] == "SIZE":
+                abstract["size"] = (Decimal(tokens[1]), Decimal(tokens[3]))
+            elif tokens[0] == "PIN":
+                pin = {"direction": None, "use": None, "shapes": []}
+                abstract["pins"][tokens[1]] = pin
+            elif tokens[0] == "OBS":
+                pin = None
+            elif pin is not None and tokens[0] in ["DIRECTION", "USE"]:
+                pin[tokens[0].lower()] = tokens[1]
+            elif pin is not None and tokens[0] == "LAYER":
+                layer = tokens[1]
+            elif pin is not None and tokens[0] in ["RECT", "POLYGON"]:
+                coordinates = [str(Decimal(token).normalize()) for token in tokens[1:]]
+                pin["shapes"].append(" ".join([layer, tokens[0], *coordinates]))
+            elif tokens[0] == "END" and len(tokens) > 1 and tokens[1] == macro:
+                break
+
+    if abstract["size"] is None:
+        raise FlowError(f"Could not find the macro {macro} in {lef_file}")
+
+    for pin in abstract["pins"].values():
+        pin["shapes"].sort()
+
+    return abstract
+
+
+@Step.factory.register()
+class FABulousECOCheck(Step):
+    """
+    Checks if the updated tiles of an ECO still fit into the previous fabric:
+    the footprint and the direction, use and shapes of all pins
+    must be unchanged.
+    """
+
+    id = "Checker.FABulousECOCompatibility"
+    name = "ECO Compatibility Check (FABulous)"
+
+    inputs = []
+    outputs = []
+
+    config_vars = [
+        Variable(
+            "FABULOUS_ECO_LEFS",
+            Dict[str, List[Path]],
+            "The previous and the updated LEF of each updated tile. Set by FABulousFabric.",
+            default={},
+        ),
+    ]
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        incompatible = 0
+        for macro, (previous_lef, updated_lef) in self.config[
+            "FABULOUS_ECO_LEFS"
+        ].items():
+            previous = get_lef_abstract(str(previous_lef), macro)
+            updated = get_lef_abstract(str(updated_lef), macro)
+
+            differences = []
+            if previous["size"] != updated["size"]:
+                differences.append(
+                    f"size changed from {previous['size'][0]}x{previous['size'][1]} to {updated['size'][0]}x{updated['size'][1]}"
+                )
+            for pin_name in sorted(set(previous["pins"]) | set(updated["pins"])):
+                if pin_name not in updated["pins"]:
+                    differences.append(f"pin {pin_name} was removed")
+                elif pin_name not in previous["pins"]:
+                    differences.append(f"pin {pin_name} was added")
+                elif previous["pins"][pin_name] != updated["pins"][pin_name]:
+                    differences.append(f"pin {pin_name} changed")
+
+            if differences:
+                incompatible += 1
+                for difference in differences:
+                    self.err(f"{macro}: {difference}")
+            else:
+                info(f"{macro} is compatible with the previous fabric.")
+
+        if incompatible:
+            raise StepError(
+                f"{incompatible} updated tile(s) don't fit into the previous fabric, the fabric has to be rebuilt."
+            )
+
+        return {}, {
+            "fabulous__eco__tiles__count": len(self.config["FABULOUS_ECO_LEFS"])
+        }
+
+
+@Step.factory.register()
+class FABulousECOMasters(OdbpyStep):
+    """
+    Swaps the instances of the updated tiles of an ECO to the masters of
+    their updated LEF, so that the layout of the previous run refers to the
+    new abstracts.
+    """
+
+    id = "Odb.FABulousECOMasters"
+    name = "Update the tile masters of an ECO (FABulous)"
+
+    config_vars = FABulousECOCheck.config_vars
+
+    def get_script_path(self):
+        return os.path.join(os.path.dirname(__file__), "scripts", "odb_eco.py")
+
+    def get_command(self) -> List[str]:
+        command = super().get_command()
+        for macro, (_, updated_lef) in self.config["FABULOUS_ECO_LEFS"].items():
+            command += ["--eco-lef", macro, str(updated_lef)]
+        return command
+
+
+@Step.factory.register()
+class FABulousSTA(OpenROAD.STAPrePNR):
+    """
+    Performs hierarchical static timing analysis of the fabric using the
+    Liberty timing abstracts of the tiles, as generated by FABulousTile with
+    ``FABULOUS_TIMING_ABSTRACT`` enabled.
+
+    As the tiles are connected by abutment, there are no top-level parasitics
+    and the clocks are propagated through the tile abstracts.
+    """
+
+    id = "OpenROAD.FABulousSTA"
+    name = "STA (FABulous)"
+    long_name = "Hierarchical Static Timing Analysis (FABulous)"
+
+    def prepare_env(self, env: Dict, state: State) -> Dict:
+        env = super().prepare_env(env, state)
+        env["OPENLANE_SDC_IDEAL_CLOCKS"] = "0"
+        return env
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        # Use the abstracts instead of the tile netlists
+        self.config = self.config.copy(STA_MACRO_PRIORITIZE_NL=False)
+        return super().run(state_in, **kwargs)
+
+
+class FABulousPipDelayTable:
+    """
+    Delay model for the nextpnr model generation, which looks up the pip
+    delays from the tables written by FABulousTile with ``FABULOUS_PIP_DELAYS``
+    enabled.
+
+    Pips that are not in a table are tile-external wires, which are connected
+    by abutment and get a small default delay. Pips that are in a table but
+    could not be characterized get the worst delay of their tile.
+    """
+
+    def __init__(self, tables: List[str], default_delay: float = 0.001):
+        self.default_delay = default_delay
+        self.delays: Dict[str, Dict[Tuple[str, str], Optional[float]]] = {}
+
+        for table in tables:
+            with open(table, "r") as f:
+                for row in csv.DictReader(f):
+                    delay = float(row["delay"]) if row["delay"] else None
+                    self.delays.setdefault(row["tile"], {})[
+                        (row["source"], row["destination"])
+                    ] = delay
+
+        self.worst_delays = {
+            tile: max([delay for delay in delays.values() if delay is not None] or [0])
+            for tile, delays in self.delays.items()
+        }
+
+    def pip_delay(self, tile_name: str, src_pip: str, dst_pip: str) -> float:
+        delays = self.delays.get(tile_name, {})
+
+        if (src_pip, dst_pip) not in delays:
+            return self.default_delay
+
+        delay = delays[(src_pip, dst_pip)]
+        if delay is None:
+            delay = self.worst_delays[tile_name]
+
+        return round(max(delay, self.default_delay), 3)
+
+
 DesignFormat(
     "fabulous",
     "v",
@@ -179,6 +990,327 @@ DesignFormat(
     alts=["FABULOUS_PCF"],
 ).register()
 
+
+@Step.factory.register()
+class FABulousFabricJSON(Step):
+    """
+    Converts the fabric netlist generated by FABulous into a Yosys JSON
+    netlist, with the tile macros as black boxes taken from their ``nl`` views.
+    """
+
+    id = "Yosys.FABulousFabricJSON"
+    name = "Fabric JSON Netlist"
+
+    inputs = []
+    outputs = []
+
+    def get_json_path(self) -> str:
+        return os.path.join(self.step_dir, f"{self.config['DESIGN_NAME']}.json")
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        netlist = state_in.get("FABULOUS_NETLIST")
+        if netlist is None:
+            raise StepException("No FABulous fabric netlist found in the state.")
+
+        script = os.path.join(self.step_dir, "fabric_json.ys")
+        with open(script, "w") as f:
+            for macro in (self.config["MACROS"] or {}).values():
+                for nl in macro.nl:
+                    f.write(f"read_verilog -lib {nl}\n")
+            f.write(f"read_verilog {netlist}\n")
+            f.write(f"hierarchy -top {self.config['DESIGN_NAME']}\n")
+            f.write("proc\n")
+            f.write("opt_clean\n")
+            f.write(f"write_json {self.get_json_path()}\n")
+
+        self.run_subprocess(["yosys", "-q", "-s", script], **kwargs)
+
+        return {}, {}
+
+
+DesignFormat(
+    "fabulous",
+    "pkl",
+    "FABulous bitstream specification index",
+    alts=["FABULOUS_BITSTREAM_INDEX"],
+).register()
+
+DesignFormat(
+    "fabulous_bitstream",
+    "bin",
+    "FABulous bitstream",
+    alts=["FABULOUS_BITSTREAM"],
+).register()
+
+DesignFormat(
+    "fabulous_bitstream",
+    "csv",
+    "FABulous bitstream frame map",
+    alts=["FABULOUS_FRAME_MAP"],
+).register()
+
+
+@Step.factory.register()
+class FABulousBitstream(Step):
+    """
+    Assembles the bitstream of a user design from its FASM file and the
+    bitstream specification of the fabric. The features are resolved through
+    the prebuilt index of the specification and the frames are packed with
+    NumPy. The bitstream and the frame map of all tiles are written at once.
+    """
+
+    id = "Misc.FABulousBitstream"
+    name = "Bitstream Assembly (FABulous)"
+
+    inputs = []
+    outputs = []
+
+    config_vars = [
+        Variable(
+            "FABULOUS_FASM",
+            Optional[Path],
+            "A FASM file of a user design to assemble into a bitstream for the fabric.",
+        ),
+        Variable(
+            "FABULOUS_BITSTREAM_BENCHMARK",
+            bool,
+            "Also run the bitstream generator of FABulous on the same FASM file, check that both bitstreams are identical and report the speedup.",
+            default=False,
+        ),
+    ]
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        fasm = self.config["FABULOUS_FASM"]
+        if fasm is None:
+            raise StepException("FABULOUS_FASM is not set.")
+
+        spec = state_in.get("FABULOUS_BITSTREAMSPEC_BIN")
+        if spec is None:
+            raise StepException("No bitstream specification found in the state.")
+
+        start = time.perf_counter()
+
+        if (index_path := state_in.get("FABULOUS_BITSTREAM_INDEX")) is not None:
+            index = BitstreamIndex.load(index_path)
+        else:
+            warn(
+                "No prebuilt bitstream index found, building it from the specification"
+            )
+            index = BitstreamIndex.from_spec(load_spec(spec))
+
+        features = read_fasm(fasm)
+        (configuration, unknown) = index.resolve(features)
+        if unknown:
+            for feature in unknown:
+                self.err(f"Feature not found in the bitstream specification: {feature}")
+            raise StepError(
+                f"{len(unknown)} feature(s) of {fasm} are not in the bitstream specification."
+            )
+
+        name = os.path.splitext(os.path.basename(fasm))[0]
+        bitstream = os.path.join(self.step_dir, f"{name}.bin")
+        frame_map = os.path.join(self.step_dir, f"{name}.csv")
+
+        with open(bitstream, "wb") as f:
+            f.write(index.pack(configuration))
+        index.write_frame_map(configuration, frame_map)
+
+        runtime = time.perf_counter() - start
+        info(
+            f"Assembled {len(features)} features into {os.path.getsize(bitstream)} bytes in {runtime:.3f}s"
+        )
+
+        metrics_updates: MetricsUpdate = {
+            "fabulous__bitstream_feature__count": len(features),
+        }
+
+        if self.config["FABULOUS_BITSTREAM_BENCHMARK"]:
+            try:
+                from fabulous.fabric_cad.bit_gen import genBitstream
+            except ImportError:
+                warn(
+                    "The FABulous bitstream generator is not available, skipping the benchmark"
+                )
+                genBitstream = None
+
+            if genBitstream is not None:
+                reference_dir = os.path.join(self.step_dir, "reference")
+                mkdirp(reference_dir)
+                reference = os.path.join(reference_dir, f"{name}.bin")
+
+                start = time.perf_counter()
+                genBitstream(str(fasm), str(spec), reference)
+                reference_runtime = time.perf_counter() - start
+
+                with open(bitstream, "rb") as a, open(reference, "rb") as b:
+                    if a.read() != b.read():
+                        raise StepError(
+                            f"The bitstream differs from the one of the FABulous bitstream generator: {reference}"
+                        )
+
+                speedup = reference_runtime / max(runtime, 1e-6)
+                info(
+                    f"FABulous bitstream generator: {reference_runtime:.3f}s, {speedup:.1f}x slower"
+                )
+                metrics_updates["fabulous__bitstream__speedup"] = round(speedup, 1)
+
+        return {
+            "FABULOUS_BITSTREAM": Path(bitstream),
+            "FABULOUS_FRAME_MAP": Path(frame_map),
+        }, metrics_updates
+
+
+DesignFormat(
+    "fabulous_bitstream",
+    "vh",
+    "FABulous emulation defines",
+    alts=["FABULOUS_EMULATION_DEFINES"],
+).register()
+
+
+@Step.factory.register()
+class FABulousEmulationDefines(Step):
+    """
+    Decodes a bitstream into the configuration bits of each tile and writes
+    them as the ``Tile_X<x>Y<y>_Emulate_Bitstream`` defines that the fabric
+    netlist is parametrized with in emulation mode.
+    """
+
+    id = "Misc.FABulousEmulationDefines"
+    name = "Emulation Defines (FABulous)"
+
+    inputs = []
+    outputs = []
+
+    config_vars = [
+        Variable(
+            "FABULOUS_EMULATION_BITSTREAM",
+            Optional[Path],
+            "The bitstream to emulate. If unset, the bitstream assembled from FABULOUS_FASM is used.",
+        ),
+    ]
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        bitstream = self.config["FABULOUS_EMULATION_BITSTREAM"]
+        if bitstream is None:
+            bitstream = state_in.get("FABULOUS_BITSTREAM")
+        if bitstream is None:
+            raise StepException("No bitstream found in the state.")
+
+        if (index_path := state_in.get("FABULOUS_BITSTREAM_INDEX")) is not None:
+            index = BitstreamIndex.load(index_path)
+        elif (spec := state_in.get("FABULOUS_BITSTREAMSPEC_BIN")) is not None:
+            index = BitstreamIndex.from_spec(load_spec(spec))
+        else:
+            raise StepException("No bitstream specification found in the state.")
+
+        with open(bitstream, "rb") as f:
+            try:
+                configuration = index.unpack(f.read())
+            except ValueError as e:
+                raise StepError(
+                    f"{bitstream} is not a bitstream of this fabric: {e}"
+                ) from None
+
+        name = os.path.splitext(os.path.basename(bitstream))[0]
+        defines = os.path.join(self.step_dir, f"{name}.vh")
+        index.write_emulation_defines(configuration, defines)
+
+        return {"FABULOUS_EMULATION_DEFINES": Path(defines)}, {}
+
+
+emulation_variables = [
+    Variable(
+        "FABULOUS_EMULATION_TESTBENCH",
+        Optional[List[Path]],
+        "Verilog testbench sources to build into a simulation executable together with the emulated fabric. If unset, only the C++ model of the fabric is built.",
+    ),
+    Variable(
+        "FABULOUS_EMULATION_TOP",
+        Optional[str],
+        "The top module of the emulation testbench. If unset, DESIGN_NAME is used.",
+    ),
+]
+
+
+@Step.factory.register()
+class FABulousEmulation(Verilator.Lint):
+    """
+    Builds a Verilator model of the fabric in emulation mode: the configuration
+    memories of the tiles are replaced by the bits of the emulation defines,
+    so no bitstream has to be shifted through FrameData and FrameStrobe.
+    The fabric is built from the RTL of the tiles, not from their macros.
+    """
+
+    id = "Verilator.FABulousEmulation"
+    name = "Emulation Model (FABulous)"
+    long_name = "Verilator Emulation Model (FABulous)"
+
+    config_vars = Verilator.Lint.config_vars + emulation_variables
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        kwargs, env = self.extract_env(kwargs)
+
+        defines_file = state_in.get("FABULOUS_EMULATION_DEFINES")
+        if defines_file is None:
+            raise StepException("No emulation defines found in the state.")
+
+        testbench = self.config["FABULOUS_EMULATION_TESTBENCH"] or []
+        top = self.config["FABULOUS_EMULATION_TOP"] or self.config["DESIGN_NAME"]
+        model_dir = os.path.join(self.step_dir, "obj_dir")
+
+        extra_args = []
+        if testbench:
+            # Also implies --timing for the delays of the testbench
+            extra_args.append("--binary")
+        else:
+            extra_args.extend(["--cc", "--build"])
+
+        if self.config["LINTER_RELATIVE_INCLUDES"]:
+            extra_args.append("--relative-includes")
+
+        if include_dirs := self.config["VERILOG_INCLUDE_DIRS"]:
+            extra_args.extend([f"-I{dir}" for dir in include_dirs])
+
+        defines = ["EMULATION", "__librelane__"]
+        defines += self.config["VERILOG_DEFINES"] or []
+        for define in defines:
+            extra_args.append(f"+define+{define}")
+
+        # The defines have to be read before the fabric netlist
+        sources = [str(defines_file)]
+        sources += [str(model) for model in self.config["EXTRA_VERILOG_MODELS"] or []]
+        sources += [str(file) for file in self.config["VERILOG_FILES"]]
+        sources += [str(file) for file in testbench]
+
+        start = time.perf_counter()
+        self.run_subprocess(
+            [
+                "verilator",
+                "-j",
+                str(_get_process_limit()),
+                "--Mdir",
+                model_dir,
+                "--top-module",
+                top,
+                "-Wno-fatal",
+                "-Wno-lint",
+                "-Wno-style",
+            ]
+            + extra_args
+            + sources,
+            env=env,
+        )
+        runtime = time.perf_counter() - start
+
+        if testbench:
+            info(f"Built the emulation executable {os.path.join(model_dir, 'V' + top)}")
+        else:
+            info(f"Built the emulation model of {top} in {model_dir}")
+
+        return {}, {"fabulous__emulation_build__runtime": round(runtime, 1)}
+
+
 Classic = Flow.factory.get("Classic")
 
 
@@ -207,8 +1339,17 @@ class FABulousFabric(Classic):
         ("OpenROAD.DetailedPlacement", None),
         # Disable STA
         ("OpenROAD.STA*", None),
+        # But run hierarchical STA on the tile abstracts if explicitly wished
+        ("+Odb.CellFrequencyTables", FABulousSTA),
+        # KLayout DRC with an optional boundary-window mode
+        ("KLayout.DRC", FABulousDRC),
+        # Netgen LVS with an optional hierarchical mode
+        ("Netgen.LVS", FABulousLVS),
         # Custom PDN generation script
         ("OpenROAD.GeneratePDN", FABulousPower),
+        # Expand the compact tile placement
+        ("Odb.ManualMacroPlacement", FABulousMacroPlacement),
+        ("OpenROAD.CheckMacroInstances", FABulousCheckMacroInstances),
         # Disable routing and antenna
         # ("OpenROAD.GlobalRouting", None),
         # ("OpenROAD.CheckAntennas*", None),
@@ -223,6 +1364,55 @@ class FABulousFabric(Classic):
         ("OpenROAD.IRDropReport", None),
     ]
 
+    gating_config_vars = {
+        **Classic.gating_config_vars,
+        "KLayout.FABulousDRC": ["RUN_KLAYOUT_DRC"],
+        "Netgen.FABulousLVS": ["RUN_LVS"],
+        "OpenROAD.FABulousSTA": ["FABULOUS_FABRIC_STA"],
+        # Only needed if there are top-level nets that aren't abutted
+        "OpenROAD.GlobalRouting": ["FABULOUS_TOP_LEVEL_ROUTING"],
+        "OpenROAD.CheckAntennas": ["FABULOUS_TOP_LEVEL_ROUTING"],
+        "Odb.DiodesOnPorts": ["FABULOUS_TOP_LEVEL_ROUTING"],
+        "Odb.HeuristicDiodeInsertion": [
+            "RUN_HEURISTIC_DIODE_INSERTION",
+            "FABULOUS_TOP_LEVEL_ROUTING",
+        ],
+        "Odb.ReportWireLength": ["FABULOUS_TOP_LEVEL_ROUTING"],
+        "Checker.WireLength": ["FABULOUS_TOP_LEVEL_ROUTING"],
+    }
+
+    routing_steps = [
+        "OpenROAD.GlobalRouting",
+        "OpenROAD.CheckAntennas",
+        "Odb.DiodesOnPorts",
+        "Odb.HeuristicDiodeInsertion",
+        "Odb.ReportWireLength",
+        "Checker.WireLength",
+    ]
+
+    # Each stage is a list of independent branches of signoff steps,
+    # the second stage needs the GDS of Magic.StreamOut
+    signoff_stages = [
+        [
+            ["Magic.StreamOut"],
+            ["KLayout.StreamOut"],
+            ["Odb.CheckDesignAntennaProperties"],
+        ],
+        [
+            ["KLayout.Render"],
+            ["Magic.WriteLEF"],
+            ["KLayout.XOR", "Checker.XOR"],
+            ["Magic.DRC", "Checker.MagicDRC"],
+            ["KLayout.FABulousDRC", "Checker.KLayoutDRC"],
+            [
+                "Magic.SpiceExtraction",
+                "Checker.IllegalOverlap",
+                "Netgen.FABulousLVS",
+                "Checker.LVS",
+            ],
+        ],
+    ]
+
     config_vars = Classic.config_vars + [
         Variable(
             "FABULOUS_FABRIC_CONFIG",
@@ -250,66 +1440,648 @@ class FABulousFabric(Classic):
         Variable(
             "FABULOUS_SPEF_CORNERS",
             Optional[List[str]],
-            "The SPEF corners to use for the tile macros.",
+            "The SPEF corners to use for the tile macros. The PHYSICAL and STRUCTURAL timing models are generated for the STA_CORNERS in these interconnect corners.",
             default=["nom"],
         ),
         Variable(
             "FABULOUS_TIMING_MODEL",
-            Optional[Literal["PHYSICAL", "STRUCTURAL"]],
-            "The timing model mode for timing data.",
+            Optional[Literal["PHYSICAL", "STRUCTURAL", "TABLE"]],
+            "The timing model mode for timing data. TABLE uses the pip delay tables of the tiles, as generated by FABulousTile with `FABULOUS_PIP_DELAYS` enabled.",
+        ),
+        Variable(
+            "FABULOUS_TIMING_MODEL_POOL",
+            bool,
+            "Run the Yosys and OpenSTA scripts of the PHYSICAL and STRUCTURAL timing models in long-lived processes, which load the liberty files of a corner once, instead of starting the tools for every tile. Yosys starts every script from a design with only the libraries, OpenSTA runs every script in a fork of the process, which requires TclX. This replaces the methods that FABulous calls the tools with.",
+            default=False,
+        ),
+        Variable(
+            "FABULOUS_TIMING_MODEL_CACHE",
+            bool,
+            "Cache the netlists that the PHYSICAL and STRUCTURAL timing models synthesize from the RTL of the tiles in the first tile library, by a fingerprint of the sources, the liberty files and the synthesis settings. Unchanged tiles then skip Yosys. This replaces the synthesis method of the FABulous Yosys tool.",
+            default=False,
+        ),
+        Variable(
+            "FABULOUS_TIMING_MODEL_REDUCED_SPEF",
+            bool,
+            "Load only the nets of the tile SPEF files that are on paths between the ports of the tiles into the PHYSICAL timing model. The reduced SPEF files are cached in the first tile library, by the hash of the SPEF file.",
+            default=True,
+        ),
+        Variable(
+            "FABULOUS_FABRIC_STA",
+            bool,
+            "Run hierarchical STA of the fabric using the Liberty timing abstracts of the tiles.",
+            default=False,
+        ),
+        Variable(
+            "FABULOUS_CLUSTER_SIZE",
+            Optional[Tuple[int, int]],
+            "Harden the fabric hierarchically: the tile map is partitioned into clusters of this many tiles (columns, rows), each unique cluster is hardened once as a macro and the top level only stitches the clusters.",
+        ),
+        Variable(
+            "FABULOUS_CLUSTER_JOBS",
+            Optional[int],
+            "The maximum number of clusters to harden in parallel. If unset, this will be equal to your machine's thread count.",
+        ),
+        Variable(
+            "FABULOUS_WINDOW",
+            Optional[Tuple[int, int, int, int]],
+            "Only implement a window of the tile map, given as the FABulous coordinates of its top left and bottom right tile [x0, y0, x1, y1]. The signals crossing the boundary of the window become pins.",
+        ),
+        Variable(
+            "FABULOUS_WINDOW_MODELS",
+            bool,
+            "Export the models of the whole fabric (geometry, bitstream specification, nextpnr model and timing model) in window mode as well.",
+            default=False,
+        ),
+        Variable(
+            "FABULOUS_TILE_ABSTRACTS",
+            bool,
+            "Use the preliminary abstracts of the tiles that aren't hardened yet, as saved by FABulousTile after the I/O placement. If any abstract is used, the flow stops after the floorplan, power and pin checks.",
+            default=False,
+        ),
+        Variable(
+            "FABULOUS_NET_PRUNING",
+            bool,
+            "Count the top-level nets that need routing before the physical steps, and skip global routing, the antenna checks and the related steps if there are none.",
+            default=True,
+        ),
+        Variable(
+            "FABULOUS_TOP_LEVEL_ROUTING",
+            bool,
+            "Run global routing, the antenna checks and the related steps at the top level. Disabled automatically by FABULOUS_NET_PRUNING if there is nothing to route.",
+            default=True,
+        ),
+        Variable(
+            "FABULOUS_ECO_RUN",
+            Optional[Path],
+            "The directory of a previous run of this fabric. If set, the tiles whose views changed since that run are swapped into its layout, and only the stream-out and signoff steps are run again.",
+        ),
+        Variable(
+            "FABULOUS_ECO_TILES",
+            Optional[List[str]],
+            "The tiles that were updated for the ECO. If unset, they are found by comparing the tile views with the ones of the previous run.",
+        ),
+        Variable(
+            "FABULOUS_EMULATION",
+            bool,
+            "Build a Verilator model of the fabric in emulation mode, configured with the bitstream assembled from FABULOUS_FASM or with FABULOUS_EMULATION_BITSTREAM.",
+            default=False,
+        ),
+        Variable(
+            "FABULOUS_SIGNOFF_JOBS",
+            int,
+            "The maximum number of signoff branches (stream-outs, XOR, DRC and LVS) to run in parallel. If set to 1, the default, the steps run sequentially as in the Classic flow. If set to 0, this will be equal to your machine's thread count.",
+            default=1,
         ),
     ]
+    config_vars += FABulousBitstream.config_vars
+    config_vars += FABulousEmulationDefines.config_vars
+    config_vars += emulation_variables
+
+    def get_fabric_json(self, initial_state: State, step_list: List[Step]) -> str:
+        """
+        Returns the fabric netlist as a Yosys JSON netlist,
+        converting it the first time it is needed.
+        """
+        if self.fabric_json is None:
+            step = FABulousFabricJSON(
+                config=self.config, state_in=initial_state, flow=self
+            )
+            step_list.append(step)
+            try:
+                self.start_step(step)
+            except (StepError, StepException) as e:
+                raise FlowError(str(e)) from None
+            self.fabric_json = step.get_json_path()
+
+        return self.fabric_json
+
+    def prune_routing(
+        self, initial_state: State, placement: Dict[str, Any], step_list: List[Step]
+    ) -> State:
+        """
+        Counts the top-level nets that need routing. Nets between neighbouring
+        tiles are connected by abutment and the pins are placed on the tile
+        pins, so many fabrics have nothing to route at the top level. In that
+        case, the routing steps are skipped by disabling
+        ``FABULOUS_TOP_LEVEL_ROUTING``.
+
+        Returns the initial state with the net counts as metrics.
+        """
+        sizes = {
+            supertile_name: len(supertile.tileMap[0])
+            for supertile_name, supertile in self.fabric.superTileDic.items()
+        }
+        rects = {}
+        for master, data in placement["macros"].items():
+            for x, y in data["tiles"]:
+                rects[f"Tile_X{x}Y{y}_{master}"] = (
+                    x,
+                    y,
+                    sizes.get(master, 1),
+                    data["rows"],
+                )
 
-    def run(
+        netlist = Netlist.load(
+            self.get_fabric_json(initial_state, step_list), self.fabric.name
+        )
+        counts = netlist.get_routing_demand(rects)
+
+        info(
+            f"Top-level nets: {counts['nets']} ({counts['abutted']} abutted, {counts['pinned']} pinned, {counts['unconnected']} unconnected, {counts['routed']} to route), {counts['tied']} tied tile pins"
+        )
+
+        pruned = []
+        if counts["routed"] == 0 and counts["tied"] == 0:
+            self.config = self.config.copy(FABULOUS_TOP_LEVEL_ROUTING=False)
+            for cls in self.Steps:
+                if cls.id in self.routing_steps:
+                    info(f"Nothing to route at the top level, skipping '{cls.id}'")
+                    pruned.append(cls.id)
+        elif not self.config["FABULOUS_TOP_LEVEL_ROUTING"]:
+            warn(
+                f"{counts['routed'] + counts['tied']} top-level connection(s) need routing, but FABULOUS_TOP_LEVEL_ROUTING is disabled"
+            )
+        else:
+            info("Keeping the top-level routing steps")
+
+        return State(
+            copying=initial_state,
+            metrics={
+                **initial_state.metrics,
+                "fabulous__net__count": counts["nets"],
+                "fabulous__net_abutted__count": counts["abutted"],
+                "fabulous__net_pinned__count": counts["pinned"],
+                "fabulous__net_unconnected__count": counts["unconnected"],
+                "fabulous__net_routed__count": counts["routed"],
+                "fabulous__pin_tied__count": counts["tied"],
+                "fabulous__step_pruned__count": len(pruned),
+            },
+        )
+
+    def harden_clusters(
         self,
         initial_state: State,
-        **kwargs,
+        macros: Dict[str, Dict[str, Any]],
+        placement: Dict[str, Any],
+        column_widths: List[Decimal],
+        row_heights: List[Decimal],
+    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any], str, List[Step]]:
+        """
+        Partitions the fabric into clusters of ``FABULOUS_CLUSTER_SIZE`` tiles
+        and hardens each unique cluster once, in parallel, with the steps of
+        this flow.
+
+        Returns the cluster macros, their placement, the top-level netlist
+        that instantiates them and the steps that were run.
+        """
+        step_list: List[Step] = []
+
+        clusters_dir = os.path.join(self.run_dir, "clusters")
+        mkdirp(clusters_dir)
+
+        sizes = {
+            supertile_name: (len(supertile.tileMap[0]), len(supertile.tileMap))
+            for supertile_name, supertile in self.fabric.superTileDic.items()
+        }
+        clusters = partition_placement(
+            placement,
+            sizes,
+            self.config["FABULOUS_CLUSTER_SIZE"],
+            (self.fabric.numberOfColumns, self.fabric.numberOfRows),
+        )
+
+        # Split the fabric netlist into the clusters
+        top_netlist = os.path.join(clusters_dir, f"{self.fabric.name}.v")
+        modules = write_cluster_netlists(
+            self.get_fabric_json(initial_state, step_list),
+            self.fabric.name,
+            clusters,
+            top_netlist,
+            os.path.join(clusters_dir, "{}.v"),
+        )
+
+        info(
+            f"Partitioned the fabric into {len(clusters)} clusters with {len(modules)} unique modules"
+        )
+        for module, cluster in modules.items():
+            count = len([other for other in clusters if other.module == module])
+            verbose(
+                f"- {module}: {cluster.columns}x{cluster.rows} tiles, {count} instance(s)"
+            )
+
+        # Everything the clusters have in common with the fabric, without the top level
+        verilog_files = [
+            file
+            for file in self.config["VERILOG_FILES"]
+            if os.path.basename(str(file)) != f"{self.fabric.name}.v"
+        ]
+
+        lock = threading.Lock()
+        cluster_macros: Dict[str, Dict[str, Any]] = {}
+        failures: List[str] = []
+
+        def harden_cluster(module: str, cluster: Cluster):
+            cluster_placement = get_cluster_placement(placement, cluster)
+            placement_file = os.path.join(clusters_dir, f"{module}.placement.json")
+            with open(placement_file, "w") as f:
+                json.dump(cluster_placement, f, default=str)
+
+            width = sum(column_widths[cluster.x : cluster.x + cluster.columns])
+            height = sum(row_heights[cluster.y : cluster.y + cluster.rows])
+
+            config = self.config.copy(
+                DESIGN_NAME=module,
+                VERILOG_FILES=verilog_files
+                + [os.path.join(clusters_dir, f"{module}.v")],
+                MACROS={
+                    master: macros[master] for master in cluster_placement["macros"]
+                },
+                FABULOUS_MACRO_PLACEMENT=placement_file,
+                FP_SIZING="absolute",
+                DIE_AREA=[0, 0, width, height],
+                FABULOUS_FABRIC_STA=False,
+                FABULOUS_CLUSTER_SIZE=None,
+            )
+
+            state = State()
+            for cls in self.Steps:
+                if is_gated(type(self), self.config, cls.id):
+                    continue
+
+                step = cls(
+                    config=config,
+                    state_in=state,
+                    id=f"{cls.id}-{module}",
+                    flow=self,
+                )
+                with lock:
+                    step_list.append(step)
+
+                try:
+                    state = self.start_step(step)
+                except (StepError, StepException) as e:
+                    with lock:
+                        failures.append(f"{module}: {cls.id}: {e}")
+                    return
+
+            cluster_macro = {
+                "gds": [state[DesignFormat.GDS]],
+                "lef": [state[DesignFormat.LEF]],
+                "nl": [state[DesignFormat.NETLIST]],
+                "spef": {},
+                "instances": {},
+            }
+            if state.get(DesignFormat.POWERED_NETLIST) is not None:
+                cluster_macro["pnl"] = [state[DesignFormat.POWERED_NETLIST]]
+
+            state.save_snapshot(os.path.join(clusters_dir, module))
+
+            with lock:
+                cluster_macros[module] = cluster_macro
+
+        with ThreadPoolExecutor(
+            max_workers=self.config["FABULOUS_CLUSTER_JOBS"] or _get_process_limit()
+        ) as tpe:
+            futures = [
+                tpe.submit(harden_cluster, module, cluster)
+                for module, cluster in modules.items()
+            ]
+            for future in futures:
+                future.result()
+
+        if failures:
+            for failure in failures:
+                err(failure)
+            raise FlowError(f"{len(failures)} cluster(s) failed to harden.")
+
+        # The clusters are placed like supertiles on the tile grid
+        cluster_placement = {
+            **placement,
+            "prefix": "Cluster",
+            "macros": {},
+        }
+        for cluster in clusters:
+            cluster_placement["macros"].setdefault(
+                cluster.module, {"rows": cluster.rows, "tiles": []}
+            )["tiles"].append([cluster.x, cluster.y])
+
+        return (cluster_macros, cluster_placement, top_netlist, step_list)
+
+    def extract_window(
+        self,
+        initial_state: State,
+        macros: Dict[str, Dict[str, Any]],
+        placement: Dict[str, Any],
+    ) -> Tuple[Cluster, Dict[str, Any], str, List[Step]]:
+        """
+        Extracts the tiles inside ``FABULOUS_WINDOW`` from the fabric netlist.
+
+        Returns the window, its placement, its netlist and the steps
+        that were run.
+        """
+        step_list: List[Step] = []
+
+        sizes = {
+            supertile_name: (len(supertile.tileMap[0]), len(supertile.tileMap))
+            for supertile_name, supertile in self.fabric.superTileDic.items()
+        }
+        window = get_window(placement, sizes, self.config["FABULOUS_WINDOW"])
+
+        window_netlist = os.path.join(self.run_dir, f"{self.fabric.name}.window.v")
+        write_window_netlist(
+            self.get_fabric_json(initial_state, step_list),
+            self.fabric.name,
+            window,
+            window_netlist,
+        )
+
+        window_placement = get_cluster_placement(placement, window, placement["origin"])
+
+        return (window, window_placement, window_netlist, step_list)
+
+    def record_tile_views(self, macros: Dict[str, Dict[str, Any]]):
+        """
+        Saves the LEF of each tile and a hash of its views to ``tile_views``
+        in the run directory, to compare against in a later ECO.
+        """
+        views_dir = os.path.join(self.run_dir, "tile_views")
+        mkdirp(views_dir)
+
+        hashes = {}
+        for macro_name, macro in macros.items():
+            hashes[macro_name] = {}
+            for view in ["gds", "lef", "nl"]:
+                digest = hashlib.sha256()
+                for file in macro[view]:
+                    with open(file, "rb") as f:
+                        digest.update(hashlib.sha256(f.read()).digest())
+                hashes[macro_name][view] = digest.hexdigest()
+            shutil.copyfile(
+                macro["lef"][0], os.path.join(views_dir, f"{macro_name}.lef")
+            )
+
+        with open(os.path.join(views_dir, "tile_views.json"), "w") as f:
+            json.dump(hashes, f, indent=4)
+
+    def run_eco(
+        self, initial_state: State, macros: Dict[str, Dict[str, Any]]
     ) -> Tuple[State, List[Step]]:
+        """
+        Swaps the updated tiles into the layout of the previous run in
+        ``FABULOUS_ECO_RUN`` and runs the steps from the stream-out on.
+
+        The fabric netlist and the tile placement must be unchanged, and the
+        footprint and pins of the updated tiles must be the same. The layout
+        only contains the abstracts of the tiles, so only their masters are
+        swapped to the new LEFs: the new tile views are picked up by the
+        stream-out and the signoff steps. The steps before the stream-out,
+        e.g. the STA, aren't run again.
+        """
         step_list: List[Step] = []
 
-        info(f'VERILOG_FILES: {self.config["VERILOG_FILES"]}')
-        info(f'FABULOUS_FABRIC_CONFIG: {self.config["FABULOUS_FABRIC_CONFIG"]}')
-        info(f'FABULOUS_TILE_LIBRARY: {self.config["FABULOUS_TILE_LIBRARY"]}')
+        eco_run = str(self.config["FABULOUS_ECO_RUN"])
+        views_dir = os.path.join(eco_run, "tile_views")
 
-        assert os.path.isfile(self.config["FABULOUS_FABRIC_CONFIG"])
+        latest_json = get_latest_file(eco_run, "state_out.json")
+        if latest_json is None:
+            raise FlowError(f"No state found in the previous run {eco_run}")
+        info(f"Using the state at '{latest_json}'")
+        with open(latest_json, "r", encoding="utf8") as f:
+            previous_state = State.loads(f.read())
 
-        if type(self.config["FABULOUS_TILE_LIBRARY"]) is Path:
-            self.config = self.config.copy(
-                FABULOUS_TILE_LIBRARY=[self.config["FABULOUS_TILE_LIBRARY"]]
-            )
+        for design_format in [DesignFormat.ODB, DesignFormat.DEF]:
+            if previous_state.get(design_format) is None:
+                raise FlowError(
+                    f"The previous run {eco_run} has no {design_format.id} view, did it finish?"
+                )
 
-        for tile_library_path in self.config["FABULOUS_TILE_LIBRARY"]:
-            assert os.path.isdir(tile_library_path)
+        # The top level has to be the same
+        for file in ["macro_placement.json", f"{self.fabric.name}.v"]:
+            with open(os.path.join(eco_run, file), "rb") as f:
+                previous = f.read()
+            with open(os.path.join(self.run_dir, file), "rb") as f:
+                current = f.read()
+            if previous != current:
+                raise FlowError(
+                    f"{file} changed since the previous run, the fabric has to be rebuilt."
+                )
 
-        verilog_files = self.config["VERILOG_FILES"]
+        with open(os.path.join(views_dir, "tile_views.json"), "r") as f:
+            previous_views = json.load(f)
+        with open(os.path.join(self.run_dir, "tile_views", "tile_views.json")) as f:
+            current_views = json.load(f)
 
-        # Unfortunately necessary
-        os.environ["FAB_PROJ_DIR"] = "."
+        if eco_tiles := self.config["FABULOUS_ECO_TILES"]:
+            for tile in eco_tiles:
+                if tile not in macros:
+                    raise FlowError(f"{tile} is not a tile macro of this fabric")
+        else:
+            eco_tiles = [
+                macro_name
+                for macro_name in macros
+                if current_views[macro_name] != previous_views.get(macro_name)
+            ]
+
+        if len(eco_tiles) == 0:
+            warn("None of the tile views changed since the previous run")
+        else:
+            info(f"Updated tiles: {eco_tiles}")
 
-        init_context(api_mode=True)
+        config = self.config.copy(
+            FABULOUS_ECO_LEFS={
+                tile: [
+                    os.path.join(views_dir, f"{tile}.lef"),
+                    macros[tile]["lef"][0],
+                ]
+                for tile in eco_tiles
+            }
+        )
 
-        self.writer = VerilogCodeGenerator()
-        self.fabric = parse_csv.parseFabricCSV(
-            pathlib.Path(self.config["FABULOUS_FABRIC_CONFIG"])
+        state = previous_state
+        for cls in [FABulousECOCheck, FABulousECOMasters]:
+            step = cls(config=config, state_in=state, flow=self)
+            step_list.append(step)
+            try:
+                state = self.start_step(step)
+            except (StepError, StepException) as e:
+                raise FlowError(str(e)) from None
+
+        # Keep the layout, but use the models of this run
+        state = State(
+            copying=state,
+            overrides={
+                key: value for key, value in initial_state.items() if value is not None
+            },
         )
-        self.fabric.name = self.config["DESIGN_NAME"]
 
-        tileByFabric = list(self.fabric.tileDic.keys())
-        superTileByFabric = list(self.fabric.superTileDic.keys())
-        allTile = list(set(tileByFabric + superTileByFabric))
+        if self.config["FABULOUS_SIGNOFF_JOBS"] == 1:
+            (final_state, signoff_steps) = super().run(state, frm="Magic.StreamOut")
+        else:
+            (final_state, signoff_steps) = self.run_parallel(
+                state, frm="Magic.StreamOut"
+            )
 
-        info(f"Tiles used by fabric: {allTile}")
+        return (final_state, step_list + signoff_steps)
 
-        self.writer.outFileName = pathlib.Path(
-            os.path.join(self.run_dir, f"{self.fabric.name}.v")
-        )
-        generateFabric(self.writer, self.fabric)
+    def run_parallel(
+        self, initial_state: State, frm: Optional[str] = None
+    ) -> Tuple[State, List[Step]]:
+        """
+        Runs the flow like the sequential flow, except that the branches of each
+        stage in ``signoff_stages`` run in parallel on the same input state.
+        Their views and metrics are merged in the order of the branches, so the
+        final state doesn't depend on which branch ends first.
+
+        ``frm`` may be any step outside of the signoff stages, or the first
+        signoff step, to skip the steps before.
+        """
+        signoff_ids = {
+            step_id
+            for stage in self.signoff_stages
+            for branch in stage
+            for step_id in branch
+        }
+        step_ids = [cls.id for cls in self.Steps]
+        positions = [i for i, step_id in enumerate(step_ids) if step_id in signoff_ids]
+
+        # The signoff stages replace a consecutive run of steps
+        if (
+            not positions
+            or any(
+                step_id not in signoff_ids
+                for step_id in step_ids[positions[0] : positions[-1] + 1]
+            )
+            or (frm in signoff_ids and frm != step_ids[positions[0]])
+        ):
+            warn("The signoff steps can't be run in parallel in this flow")
+            return super().run(initial_state, frm=frm)
+        if frm is not None and frm not in step_ids:
+            raise FlowException(f"No step with ID '{frm}' found in flow.")
+
+        signoff_steps = self.Steps[positions[0] : positions[-1] + 1]
+        step_list: List[Step] = []
+        deferred_errors: List[str] = []
+
+        def start_branch(branch: List[str]) -> List[Tuple[Step, str]]:
+            # The step directories are numbered in the order of the branches
+            branch_steps: List[Tuple[Step, str]] = []
+            for step_id in branch:
+                cls = next((cls for cls in signoff_steps if cls.id == step_id), None)
+                if cls is None:
+                    continue
 
-        initial_state = State(
-            copying=initial_state,
-            overrides={"FABULOUS_NETLIST": Path(self.writer.outFileName)},
-        )
+                step = cls(config=self.config, state_in=Future(), flow=self)
+                self.progress_bar.start_stage(step.name)
+                if is_gated(type(self), self.config, step_id):
+                    info(f"Skipping step '{step.name}'…")
+                    self.progress_bar.end_stage(increment_ordinal=False)
+                    continue
+                branch_steps.append((step, self.dir_for_step(step)))
+                self.progress_bar.end_stage()
+
+            return branch_steps
+
+        def run_branch(
+            branch_steps: List[Tuple[Step, str]], state: State
+        ) -> Tuple[State, List[str]]:
+            branch_errors: List[str] = []
+            for step, step_dir in branch_steps:
+                step.state_in.set_result(state)
+                try:
+                    state = step.start(toolbox=self.toolbox, step_dir=step_dir)
+                except StepException as e:
+                    raise FlowException(str(e)) from None
+                except DeferredStepError as e:
+                    branch_errors.append(str(e))
+                except StepError as e:
+                    raise FlowError(str(e)) from None
+
+            return (state, branch_errors)
+
+        def run_stage(stage: List[List[str]], state: State) -> State:
+            branches = [start_branch(branch) for branch in stage]
+            with ThreadPoolExecutor(
+                max_workers=self.config["FABULOUS_SIGNOFF_JOBS"] or _get_process_limit()
+            ) as tpe:
+                futures = [
+                    tpe.submit(run_branch, branch_steps, state)
+                    for branch_steps in branches
+                ]
+                results = [future.result() for future in futures]
+
+            overrides: Dict[str, Any] = {}
+            metrics = dict(state.metrics)
+            for branch_steps, (branch_state, branch_errors) in zip(branches, results):
+                step_list.extend(step for step, _ in branch_steps)
+                deferred_errors.extend(branch_errors)
+                for key, value in branch_state.items():
+                    if value != state.get(key):
+                        overrides[key] = value
+                for key, value in branch_state.metrics.items():
+                    if value != state.metrics.get(key):
+                        metrics[key] = value
+
+            return State(copying=state, overrides=overrides, metrics=metrics)
+
+        self.progress_bar.set_max_stage_count(len(self.Steps))
+        info("Starting…")
+
+        executing = frm is None
+        state = initial_state
+        for position, cls in enumerate(self.Steps):
+            if cls.id == frm:
+                executing = True
+
+            # The signoff steps run as the branches of the signoff stages
+            if positions[0] <= position <= positions[-1]:
+                if position == positions[0] and executing:
+                    info(
+                        f"Running {len(self.signoff_stages)} signoff stage(s) in parallel branches"
+                    )
+                    for stage in self.signoff_stages:
+                        state = run_stage(stage, state)
+                continue
+
+            step = cls(config=self.config, state_in=state)
+            self.progress_bar.start_stage(step.name)
+            if not executing or is_gated(type(self), self.config, cls.id):
+                info(f"Skipping step '{step.name}'…")
+                self.progress_bar.end_stage(increment_ordinal=False)
+                continue
+
+            step_list.append(step)
+            try:
+                state = self.start_step(step)
+            except StepException as e:
+                raise FlowException(str(e)) from None
+            except DeferredStepError as e:
+                deferred_errors.append(str(e))
+            except StepError as e:
+                raise FlowError(str(e)) from None
+            self.progress_bar.end_stage()
+
+        # Like the sequential flow, the final views are saved before the
+        # deferred errors are raised
+        try:
+            state.save_snapshot(os.path.join(self.run_dir, "final"))
+        except Exception as e:
+            raise FlowException(f"Failed to save final views: {e}")
+
+        if len(deferred_errors) != 0:
+            raise FlowError(
+                "One or more deferred errors were encountered:\n"
+                + "\n".join(deferred_errors)
+            )
 
+        success("Flow complete.")
+        return (state, step_list)
+
+    def export_models(self, initial_state: State) -> State:
+        """
+        Exports the geometry, the bitstream specification and
+        the nextpnr model of the fabric.
+        """
         self.geometryGenerator = GeometryGenerator(self.fabric)
         self.geometryGenerator.generateGeometry()
         self.geometryGenerator.saveToCSV(
@@ -353,6 +2125,20 @@ class FABulousFabric(Classic):
             },
         )
 
+        # Prebuild the feature index for the bitstream assembly
+        BitstreamIndex.from_spec(specObject).save(
+            os.path.join(self.run_dir, "bitStreamSpec.index.pkl")
+        )
+
+        initial_state = State(
+            copying=initial_state,
+            overrides={
+                "FABULOUS_BITSTREAM_INDEX": Path(
+                    os.path.join(self.run_dir, "bitStreamSpec.index.pkl")
+                )
+            },
+        )
+
         # Export nextpnr model
         npnrModel = model_gen_npnr.genNextpnrModel(self.fabric)
         with open(os.path.join(self.run_dir, f"pips.txt"), "w") as f:
@@ -394,6 +2180,183 @@ class FABulousFabric(Classic):
             },
         )
 
+        return initial_state
+
+    def get_emulation_sources(self) -> List[str]:
+        """
+        Returns the RTL of all tiles and supertiles of the fabric, as generated
+        into the tile libraries by FABulousTile, and the sources of their BELs.
+        """
+
+        def find_source(*parts: str) -> Optional[str]:
+            for tile_library in self.config["FABULOUS_TILE_LIBRARY"]:
+                if os.path.isfile(source := os.path.join(tile_library, *parts)):
+                    return source
+            return None
+
+        # The tiles of a supertile are in subdirectories of the supertile
+        tile_dirs = {name: [name] for name in self.fabric.tileDic}
+        for supertile_name, supertile in self.fabric.superTileDic.items():
+            tile_dirs[supertile_name] = [supertile_name]
+            for tile in supertile.tiles:
+                tile_dirs[tile.name] = [supertile_name, tile.name]
+
+        sources = []
+        for name, tile_dir in tile_dirs.items():
+            source = find_source(*tile_dir, f"{name}.v")
+            if source is None:
+                raise FlowError(
+                    f"Could not find the RTL of {name} in the tile libraries, it has to be hardened with FABulousTile first."
+                )
+            sources.append(source)
+
+            # Termination tiles have no config mem
+            for suffix in ["_switch_matrix", "_ConfigMem"]:
+                if (source := find_source(*tile_dir, f"{name}{suffix}.v")) is not None:
+                    sources.append(source)
+
+        for tile in self.fabric.tileDic.values():
+            for bel in tile.bels:
+                if os.path.abspath(bel.src) not in sources:
+                    sources.append(os.path.abspath(bel.src))
+
+        return sources
+
+    def build_emulation(self, initial_state: State, step_list: List[Step]) -> State:
+        """
+        Writes the emulation defines of the bitstream and builds the
+        fabric in emulation mode with Verilator. The configuration
+        chain of the fabric is not part of the emulation.
+        """
+        if (
+            self.config["FABULOUS_EMULATION_BITSTREAM"] is None
+            and self.config["FABULOUS_FASM"] is None
+        ):
+            raise FlowError(
+                "FABULOUS_EMULATION needs either FABULOUS_FASM or FABULOUS_EMULATION_BITSTREAM."
+            )
+
+        verilog_files = list(self.config["VERILOG_FILES"])
+        verilog_files.append(str(initial_state["FABULOUS_NETLIST"]))
+        verilog_files += self.get_emulation_sources()
+
+        for step_cls, config in [
+            (FABulousEmulationDefines, self.config),
+            (FABulousEmulation, self.config.copy(VERILOG_FILES=verilog_files)),
+        ]:
+            step = step_cls(config=config, state_in=initial_state, flow=self)
+            step_list.append(step)
+            try:
+                initial_state = self.start_step(step)
+            except (StepError, StepException) as e:
+                raise FlowError(str(e)) from None
+
+        return initial_state
+
+    def run(
+        self,
+        initial_state: State,
+        **kwargs,
+    ) -> Tuple[State, List[Step]]:
+        # Each flow has its own FABulous context, so that several fabrics can
+        # be generated in the same process. FABulous reads it from the fabric
+        # generation to the timing model, so the whole flow runs in it.
+        self.fabulous_context = new_context(os.getcwd())
+        with use_context(self.fabulous_context):
+            return self.run_fabric(initial_state, **kwargs)
+
+    def run_fabric(
+        self,
+        initial_state: State,
+        **kwargs,
+    ) -> Tuple[State, List[Step]]:
+        step_list: List[Step] = []
+
+        info(f'VERILOG_FILES: {self.config["VERILOG_FILES"]}')
+        info(f'FABULOUS_FABRIC_CONFIG: {self.config["FABULOUS_FABRIC_CONFIG"]}')
+        info(f'FABULOUS_TILE_LIBRARY: {self.config["FABULOUS_TILE_LIBRARY"]}')
+
+        assert os.path.isfile(self.config["FABULOUS_FABRIC_CONFIG"])
+
+        if type(self.config["FABULOUS_TILE_LIBRARY"]) is Path:
+            self.config = self.config.copy(
+                FABULOUS_TILE_LIBRARY=[self.config["FABULOUS_TILE_LIBRARY"]]
+            )
+
+        for tile_library_path in self.config["FABULOUS_TILE_LIBRARY"]:
+            assert os.path.isdir(tile_library_path)
+
+        if (
+            self.config["FABULOUS_WINDOW"] is not None
+            and self.config["FABULOUS_CLUSTER_SIZE"] is not None
+        ):
+            raise FlowError(
+                "FABULOUS_WINDOW and FABULOUS_CLUSTER_SIZE can't be used together."
+            )
+
+        if self.config["FABULOUS_ECO_RUN"] is not None and (
+            self.config["FABULOUS_WINDOW"] is not None
+            or self.config["FABULOUS_CLUSTER_SIZE"] is not None
+        ):
+            raise FlowError(
+                "FABULOUS_ECO_RUN can't be used with FABULOUS_WINDOW or FABULOUS_CLUSTER_SIZE."
+            )
+
+        verilog_files = self.config["VERILOG_FILES"]
+
+        # The tiles are already DRC clean, only the boundaries are checked
+        if self.config["FABULOUS_DRC_MODE"] == "boundary":
+            info("Boundary-window DRC enabled, skipping full-chip Magic DRC")
+            self.config = self.config.copy(RUN_MAGIC_DRC=False)
+
+        self.fabric_json = None
+
+        self.writer = VerilogCodeGenerator()
+        self.fabric = parse_csv.parseFabricCSV(
+            pathlib.Path(self.config["FABULOUS_FABRIC_CONFIG"])
+        )
+        self.fabric.name = self.config["DESIGN_NAME"]
+
+        tileByFabric = list(self.fabric.tileDic.keys())
+        superTileByFabric = list(self.fabric.superTileDic.keys())
+        allTile = list(set(tileByFabric + superTileByFabric))
+
+        info(f"Tiles used by fabric: {allTile}")
+
+        self.writer.outFileName = pathlib.Path(
+            os.path.join(self.run_dir, f"{self.fabric.name}.v")
+        )
+        generateFabric(self.writer, self.fabric)
+
+        initial_state = State(
+            copying=initial_state,
+            overrides={"FABULOUS_NETLIST": Path(self.writer.outFileName)},
+        )
+
+        # The models describe the whole fabric, they are optional for a window
+        models = (
+            self.config["FABULOUS_WINDOW"] is None
+            or self.config["FABULOUS_WINDOW_MODELS"]
+        )
+        if models:
+            initial_state = self.export_models(initial_state)
+
+            # Assemble the bitstream of a user design for this fabric
+            if self.config["FABULOUS_FASM"] is not None:
+                step = FABulousBitstream(
+                    config=self.config, state_in=initial_state, flow=self
+                )
+                step_list.append(step)
+                try:
+                    initial_state = self.start_step(step)
+                except (StepError, StepException) as e:
+                    raise FlowError(str(e)) from None
+
+            if self.config["FABULOUS_EMULATION"]:
+                initial_state = self.build_emulation(initial_state, step_list)
+        else:
+            info("Window mode enabled, skipping the fabric models")
+
         # Get the fabric Verilog file
         verilog_files.append(os.path.join(self.run_dir, f"{self.fabric.name}.v"))
 
@@ -447,6 +2410,7 @@ class FABulousFabric(Classic):
 
             # Create macro configurations
             macros = {}
+            abstract_tiles = []
 
             for macro_name in tiles:
                 for supertile_name, supertile in self.fabric.superTileDic.items():
@@ -516,6 +2480,71 @@ class FABulousFabric(Classic):
                         )
                     ]
 
+                # Timing abstracts of the tile, if available
+                if self.config["FABULOUS_FABRIC_STA"]:
+                    macros[macro_name]["lib"] = {}
+                    for corner in self.config["STA_CORNERS"]:
+                        lib_file = os.path.join(
+                            tile_library,
+                            macro_name,
+                            "macro",
+                            self.config["PDK"],
+                            "lib",
+                            corner,
+                            f"{macro_name}__{corner}.lib",
+                        )
+                        if os.path.isfile(lib_file):
+                            macros[macro_name]["lib"][corner] = [lib_file]
+                        else:
+                            warn(
+                                f"No timing abstract for {macro_name} in corner {corner}, the tile will be black-boxed"
+                            )
+
+                # Use the preliminary abstract of tiles that aren't hardened yet
+                views = [macros[macro_name][view][0] for view in ["gds", "lef", "nl"]]
+                if self.config["FABULOUS_TILE_ABSTRACTS"] and not all(
+                    os.path.isfile(view) for view in views
+                ):
+                    abstract_dir = os.path.join(
+                        tile_library,
+                        macro_name,
+                        "macro",
+                        self.config["PDK"],
+                        "abstract",
+                    )
+                    abstract_lef = os.path.join(abstract_dir, f"{macro_name}.lef")
+                    abstract_nl = os.path.join(abstract_dir, f"{macro_name}.nl.v")
+                    if not (
+                        os.path.isfile(abstract_lef) and os.path.isfile(abstract_nl)
+                    ):
+                        raise FlowError(
+                            f"{macro_name} has neither final views nor a preliminary abstract in {abstract_dir}"
+                        )
+
+                    # An abstract has no layout. The GDS is required for a
+                    # macro, but never read, as the flow stops before the stream-out.
+                    macros[macro_name].update(
+                        gds=[abstract_lef],
+                        lef=[abstract_lef],
+                        nl=[abstract_nl],
+                        spef={},
+                    )
+                    macros[macro_name].pop("lib", None)
+                    abstract_tiles.append(macro_name)
+
+            if abstract_tiles:
+                if (
+                    self.config["FABULOUS_CLUSTER_SIZE"] is not None
+                    or self.config["FABULOUS_ECO_RUN"] is not None
+                ):
+                    raise FlowError(
+                        f"Some tiles aren't hardened yet ({', '.join(abstract_tiles)}), the clusters and ECOs need the final views."
+                    )
+                warn(
+                    f"Using the preliminary abstracts of {', '.join(abstract_tiles)}, stopping after the floorplan, power and pin checks"
+                )
+                kwargs["to"] = kwargs.get("to") or "Checker.DisconnectedPins"
+
             # Tile Placement
             TILE_SPACING = self.config["FABULOUS_TILE_SPACING"]
             HALO_SPACING = self.config["FABULOUS_HALO_SPACING"]
@@ -529,17 +2558,7 @@ class FABulousFabric(Classic):
             # Get the tile sizes from the LEF
             tile_sizes = {}
             for macro_name, values in macros.items():
-                lef_file = values["lef"][0]
-                # Parse LEF size such as: "  SIZE 68.640 BY 219.240 ;"
-                with open(lef_file, "r") as f:
-                    while line := f.readline():
-                        #   SIZE 784.48 BY 64.36 ;
-                        if "SIZE" in line:
-                            parts = line.strip().split(" ")
-                            tile_width, tile_height = (
-                                Decimal(parts[1]),
-                                Decimal(parts[3]),
-                            )
+                (tile_width, tile_height) = get_lef_size(values["lef"][0])
 
                 # Is it a supertile?
                 if macro_name in self.fabric.superTileDic:
@@ -620,9 +2639,31 @@ class FABulousFabric(Classic):
             assert len(column_widths) == FABRIC_NUM_TILES_X
 
             # Place macros
+            # The placement is stored as a grid description in a sidecar file
+            # instead of as instances in MACROS, as the configuration is
+            # serialized for every step. Only the steps that need the
+            # instances expand it.
+            column_offsets = []
+            cur_x = 0
+            for x in range(FABRIC_NUM_TILES_X):
+                column_offsets.append(cur_x)
+                cur_x += column_widths[x]
+
+            row_offsets = [0] * FABRIC_NUM_TILES_Y
             cur_y = 0
+            for flipped_y in reversed(range(FABRIC_NUM_TILES_Y)):
+                row_offsets[flipped_y] = cur_y
+                cur_y += row_heights[flipped_y]
+
+            placement = {
+                "origin": [halo_left, halo_bottom],
+                "column_offsets": column_offsets,
+                "row_offsets": row_offsets,
+                "orientation": "N",
+                "macros": {},
+            }
+
             for y, row in enumerate(reversed(self.fabric.tile)):
-                cur_x = 0
                 flipped_y = FABRIC_NUM_TILES_Y - 1 - y
 
                 for x, tile in enumerate(row):
@@ -631,7 +2672,7 @@ class FABulousFabric(Classic):
                     else:
                         tile_name = tile.name
 
-                    prefix = f"Tile_X{x}Y{flipped_y}_"
+                    (name_y, rows) = (flipped_y, 1)
 
                     for supertile_name, supertile in self.fabric.superTileDic.items():
 
@@ -646,30 +2687,24 @@ class FABulousFabric(Classic):
 
                                 # While the physical anchor is at the bottom left,
                                 # the anchor in FABulous is at the top left
-                                prefix = (
-                                    f"Tile_X{x}Y{flipped_y-(len(supertile.tileMap)-1)}_"
-                                )
+                                rows = len(supertile.tileMap)
+                                name_y = flipped_y - (rows - 1)
                             else:
                                 tile_name = None
 
                     if tile_name == None:
-                        info(f"Skipping {tile_name}")
-                    else:
-                        if not tile_name in macros:
-                            err(f"Could not find {tile_name} in macros")
+                        continue
 
-                        macros[tile_name]["instances"][f"{prefix}{tile_name}"] = {
-                            "location": [
-                                halo_left + cur_x,
-                                halo_bottom
-                                + cur_y,  # (TILE_HEIGHT + TILE_SPACING) * (FABRIC_NUM_TILES_Y-1-y)
-                            ],
-                            "orientation": "N",
-                        }
+                    if not tile_name in macros:
+                        err(f"Could not find {tile_name} in macros")
 
-                    cur_x += column_widths[x]
+                    placement["macros"].setdefault(
+                        tile_name, {"rows": rows, "tiles": []}
+                    )["tiles"].append([x, name_y])
 
-                cur_y += row_heights[flipped_y]
+            placement_file = os.path.join(self.run_dir, "macro_placement.json")
+            with open(placement_file, "w") as f:
+                json.dump(placement, f, default=str)
 
             # Set DIE_AREA and FP_SIZING
             self.config = self.config.copy(DIE_AREA=[0, 0, FABRIC_WIDTH, FABRIC_HEIGHT])
@@ -679,9 +2714,99 @@ class FABulousFabric(Classic):
             info(f'Setting FP_SIZING to {self.config["FP_SIZING"]}')
 
             # Set MACROS
-            self.config = self.config.copy(MACROS=macros)
+            self.config = self.config.copy(
+                MACROS=macros, FABULOUS_MACRO_PLACEMENT=placement_file
+            )
+
+            instance_count = sum(
+                len(data["tiles"]) for data in placement["macros"].values()
+            )
+            info(
+                f"Setting MACROS to {len(macros)} tile macros with {instance_count} instances, placed according to {placement_file}"
+            )
+            for macro_name, data in placement["macros"].items():
+                verbose(f"- {macro_name}: {len(data['tiles'])} instance(s)")
+
+            self.record_tile_views(macros)
+
+            if (
+                self.config["FABULOUS_NET_PRUNING"]
+                and self.config["FABULOUS_ECO_RUN"] is None
+            ):
+                initial_state = self.prune_routing(initial_state, placement, step_list)
+
+            # Harden the clusters, the top level then only places the clusters
+            if self.config["FABULOUS_CLUSTER_SIZE"] is not None:
+                if self.config["FABULOUS_FABRIC_STA"]:
+                    warn(
+                        "The clusters have no timing abstracts, disabling FABULOUS_FABRIC_STA"
+                    )
+                    self.config = self.config.copy(FABULOUS_FABRIC_STA=False)
+
+                (cluster_macros, cluster_placement, top_netlist, cluster_steps) = (
+                    self.harden_clusters(
+                        initial_state, macros, placement, column_widths, row_heights
+                    )
+                )
+                step_list += cluster_steps
+
+                cluster_placement_file = os.path.join(
+                    self.run_dir, "cluster_placement.json"
+                )
+                with open(cluster_placement_file, "w") as f:
+                    json.dump(cluster_placement, f, default=str)
+
+                verilog_files = verilog_files[:-1] + [top_netlist]
+
+                self.config = self.config.copy(
+                    MACROS=cluster_macros,
+                    FABULOUS_MACRO_PLACEMENT=cluster_placement_file,
+                )
+
+                info(
+                    f"Setting MACROS to {len(cluster_macros)} cluster macros, placed according to {cluster_placement_file}"
+                )
+
+            # Only implement a window of the fabric
+            if self.config["FABULOUS_WINDOW"] is not None:
+                (window, window_placement, window_netlist, window_steps) = (
+                    self.extract_window(initial_state, macros, placement)
+                )
+                step_list += window_steps
+
+                window_placement_file = os.path.join(
+                    self.run_dir, "window_placement.json"
+                )
+                with open(window_placement_file, "w") as f:
+                    json.dump(window_placement, f, default=str)
+
+                verilog_files = verilog_files[:-1] + [window_netlist]
+
+                window_width = (
+                    halo_left
+                    + halo_right
+                    + sum(column_widths[window.x : window.x + window.columns])
+                    + TILE_SPACING * (window.columns - 1)
+                )
+                window_height = (
+                    halo_bottom
+                    + halo_top
+                    + sum(row_heights[window.y : window.y + window.rows])
+                    + TILE_SPACING * (window.rows - 1)
+                )
+
+                self.config = self.config.copy(
+                    DIE_AREA=[0, 0, window_width, window_height],
+                    MACROS={
+                        macro_name: macros[macro_name]
+                        for macro_name in window_placement["macros"]
+                    },
+                    FABULOUS_MACRO_PLACEMENT=window_placement_file,
+                )
 
-            info(f'Setting MACROS to {self.config["MACROS"]}')
+                info(
+                    f"Implementing the {window.columns}x{window.rows} window at X{window.x}Y{window.y} with {len(window.tiles)} tile instances, setting DIE_AREA to {self.config['DIE_AREA']}"
+                )
 
         info(verilog_files)
 
@@ -690,12 +2815,93 @@ class FABulousFabric(Classic):
 
         info(f'Setting VERILOG_FILES to {self.config["VERILOG_FILES"]}')
 
-        print(f"Final config: {self.config}")
+        # The tiles are already LVS clean, only the top-level is compared.
+        # Magic extracts the macros as black boxes, even from the GDS.
+        if self.config["FABULOUS_HIERARCHICAL_LVS"]:
+            abstract_cells = [
+                f"^{re.escape(macro_name)}$"
+                for macro_name in self.config["MACROS"] or {}
+            ]
+            info(
+                f"Hierarchical LVS enabled, extracting {len(abstract_cells)} macro(s) as black boxes"
+            )
+            self.config = self.config.copy(
+                MAGIC_EXT_ABSTRACT_CELLS=(self.config["MAGIC_EXT_ABSTRACT_CELLS"] or [])
+                + abstract_cells
+            )
 
-        (final_state, steps) = super().run(initial_state, **kwargs)
+        if self.config["FABULOUS_ECO_RUN"] is not None:
+            (final_state, steps) = self.run_eco(initial_state, macros)
+        elif self.config["FABULOUS_SIGNOFF_JOBS"] != 1 and not any(
+            kwargs.get(option) for option in ["frm", "to", "skip", "reproducible"]
+        ):
+            (final_state, steps) = self.run_parallel(initial_state)
+        else:
+            (final_state, steps) = super().run(initial_state, **kwargs)
+        steps = step_list + steps
 
         # Exit early
-        if self.config["FABULOUS_TIMING_MODEL"] is None:
+        if self.config["FABULOUS_TIMING_MODEL"] is None or not models or abstract_tiles:
+            return (final_state, steps)
+
+        def write_pip_file(final_state, corner, delay_model):
+            model_gen_npnr.writeNextpnrPipFile(
+                fabric=self.fabric,
+                outputFile=Path(os.path.join(self.run_dir, f"pips.{corner}.txt")),
+                delay_model=delay_model,
+            )
+
+            # Unfortunately, this is already too late...
+            final_state = State(
+                copying=final_state,
+                overrides={
+                    "FABULOUS_PIPS": final_state.get("FABULOUS_PIPS", [])
+                    + [Path(os.path.join(self.run_dir, f"pips.{corner}.txt"))]
+                },
+            )
+
+            # We need to copy the pip file manually
+            shutil.copyfile(
+                Path(os.path.join(self.run_dir, f"pips.{corner}.txt")),
+                Path(
+                    os.path.join(
+                        self.run_dir, f"final/fabulous/.FABulous/pips.{corner}.txt"
+                    )
+                ),
+            )
+
+            return final_state
+
+        # The pips were already characterized during tile hardening
+        if self.config["FABULOUS_TIMING_MODEL"] == "TABLE":
+            for corner in self.config["STA_CORNERS"]:
+                info(f"Looking up the pip delays for: {corner}")
+
+                tables = []
+                for macro_name in macros:
+                    tile_library = get_tile_library(
+                        self.config["FABULOUS_TILE_LIBRARY"], macro_name
+                    )
+                    table = os.path.join(
+                        tile_library,
+                        macro_name,
+                        "macro",
+                        self.config["PDK"],
+                        "pip_delays",
+                        corner,
+                        f"{macro_name}__{corner}.csv",
+                    )
+                    if os.path.isfile(table):
+                        tables.append(table)
+                    else:
+                        warn(
+                            f"No pip delay table for {macro_name} at corner {corner}, using default delays"
+                        )
+
+                final_state = write_pip_file(
+                    final_state, corner, FABulousPipDelayTable(tables)
+                )
+
             return (final_state, steps)
 
         print(f"Fabric done! Generating timing model...")
@@ -737,8 +2943,60 @@ class FABulousFabric(Classic):
                 )
             )
 
-        for corner, liberty_files in self.config["LIB"].items():
+        # The tiles were synthesized for the timing model by an earlier run
+        netlist_cache = None
+        if self.config["FABULOUS_TIMING_MODEL_CACHE"]:
+            netlist_cache = NetlistCache(
+                os.path.join(
+                    self.config["FABULOUS_TILE_LIBRARY"][0], ".cache", "timing_model"
+                )
+            )
+
+        # The SPEF files of the tiles are shared by the corners of an
+        # interconnect corner, so each is reduced at most once
+        reduced_spefs: Dict[str, str] = {}
+
+        def get_tile_spef(spef: str) -> str:
+            if (
+                not self.config["FABULOUS_TIMING_MODEL_REDUCED_SPEF"]
+                or self.config["FABULOUS_TIMING_MODEL"] != "PHYSICAL"
+                or not os.path.isfile(spef)
+            ):
+                return spef
+
+            if spef not in reduced_spefs:
+                (reduced, cached) = get_reduced_spef(
+                    spef,
+                    os.path.join(
+                        self.config["FABULOUS_TILE_LIBRARY"][0],
+                        ".cache",
+                        "reduced_spef",
+                    ),
+                )
+                info(
+                    f"{'Using the cached' if cached else 'Reduced the'} SPEF file of {os.path.basename(spef)}: {reduced}"
+                )
+                reduced_spefs[spef] = reduced
+            return reduced_spefs[spef]
+
+        # LIB is keyed by wildcards such as "*_tt_025C_1v80", which don't name
+        # an interconnect corner, so the corners are taken from STA_CORNERS
+        spef_corners = self.config["FABULOUS_SPEF_CORNERS"] or []
+        corners = [
+            corner
+            for corner in self.config["STA_CORNERS"]
+            if corner.split("_")[0] in spef_corners
+        ]
+        if len(corners) == 0:
+            raise FlowError(
+                f"None of the STA_CORNERS is in an interconnect corner of FABULOUS_SPEF_CORNERS {spef_corners}"
+            )
+
+        for corner in corners:
             print(f"Generating the timing model for: {corner}")
+            liberty_files = self.toolbox.filter_views(
+                self.config, self.config["LIB"], corner
+            )
 
             interconnect_corner = corner.split("_")[0]
 
@@ -768,7 +3026,17 @@ class FABulousFabric(Classic):
                     f"{macro_name}.{interconnect_corner}.spef",
                 )
 
-                custom_per_tile_source_files[macro_name]["rc_file"] = tile_spef_origin
+                # Only the PHYSICAL model reads the SPEF files
+                if self.config[
+                    "FABULOUS_TIMING_MODEL"
+                ] == "PHYSICAL" and not os.path.isfile(tile_spef_origin):
+                    raise FlowError(
+                        f"Could not find the {interconnect_corner} SPEF file of {macro_name}: {tile_spef_origin}"
+                    )
+
+                custom_per_tile_source_files[macro_name]["rc_file"] = get_tile_spef(
+                    tile_spef_origin
+                )
 
                 # Add the RTL
                 custom_per_tile_source_files[macro_name]["rtl_files"] = []
@@ -843,31 +3111,27 @@ class FABulousFabric(Classic):
                 custom_per_tile_source_files=custom_per_tile_source_files,
             )
 
-            ftmi = FABulousTimingModelInterface(config=iconfig, fabric=self.fabric)
-
-            model_gen_npnr.writeNextpnrPipFile(
-                fabric=self.fabric,
-                outputFile=Path(os.path.join(self.run_dir, f"pips.{corner}.txt")),
-                delay_model=ftmi,
-            )
+            # The liberty files of the corner are parsed once per tool process
+            pool_dir = os.path.join(self.run_dir, "timing_model_workers", corner)
+            with ToolPool(pool_dir) as tool_pool, use_pool(
+                tool_pool if self.config["FABULOUS_TIMING_MODEL_POOL"] else None
+            ), use_netlist_cache(netlist_cache):
+                ftmi = FABulousTimingModelInterface(config=iconfig, fabric=self.fabric)
 
-            # Unfortunately, this is already too late...
-            final_state = State(
-                copying=final_state,
-                overrides={
-                    "FABULOUS_PIPS": final_state.get("FABULOUS_PIPS", [])
-                    + [Path(os.path.join(self.run_dir, f"pips.{corner}.txt"))]
-                },
-            )
+                final_state = write_pip_file(final_state, corner, ftmi)
 
-            # We need to copy the pip file manually
-            shutil.copyfile(
-                Path(os.path.join(self.run_dir, f"pips.{corner}.txt")),
-                Path(
-                    os.path.join(
-                        self.run_dir, f"final/fabulous/.FABulous/pips.{corner}.txt"
+                if tool_pool.queries:
+                    info(
+                        f"Ran {tool_pool.queries} timing model scripts in {len(tool_pool.workers)} processes"
                     )
-                ),
+                for command in tool_pool.unsupported:
+                    warn(
+                        f"Could not start a worker of '{' '.join(command)}', it was started for every script instead"
+                    )
+
+        if netlist_cache is not None:
+            info(
+                f"Synthesized {netlist_cache.misses} tile netlist(s) for the timing model, reused {netlist_cache.hits} from {netlist_cache.cache_dir}"
             )
 
         return (final_state, steps)
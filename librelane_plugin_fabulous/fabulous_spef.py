@@ -0,0 +1,224 @@
+import os
+import re
+import gzip
+import hashlib
+import threading
+from typing import Dict, List, Set, Tuple
+
+# Bump when the reduction changes, to invalidate the cached SPEF files
+REDUCTION_VERSION = 1
+
+# Instances whose outputs are static during operation, i.e. the configuration
+# memory, which only drives the select inputs of the switch matrix
+DEFAULT_STATIC_INSTANCES = r"ConfigMem"
+
+delimiter_rx = re.compile(rb"^\*DELIMITER\s+(\S)")
+name_map_rx = re.compile(rb"^\*(\d+)\s+(\S+)")
+index_rx = re.compile(rb"\*(\d+)")
+
+
+def get_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_spef(path: str) -> Tuple[
+    int,
+    Dict[bytes, bytes],
+    List[Tuple[bytes, int, int]],
+    List[Tuple[List[bytes], List[bytes], bool, bool]],
+]:
+    """
+    Reads the structure of a SPEF file without its parasitics: the end of the
+    header, the name map, the byte range of each ``*D_NET`` and for each net
+    its driving and loading instances and whether it has input or output ports.
+    """
+    delimiter = b":"
+    names: Dict[bytes, bytes] = {}
+    nets: List[Tuple[bytes, int, int]] = []
+    connections: List[Tuple[List[bytes], List[bytes], bool, bool]] = []
+
+    header_end = None
+    section = None
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            start = offset
+            offset += len(line)
+            # The parasitics themselves are most of the file
+            line = line.strip()
+            if line[:1] != b"*":
+                continue
+
+            if line.startswith(b"*D_NET"):
+                if header_end is None:
+                    header_end = start
+                nets.append((line.split()[1], start, None))
+                connections.append(([], [], False, False))
+                section = None
+            elif line.startswith(b"*END"):
+                (net, net_start, _) = nets[-1]
+                nets[-1] = (net, net_start, offset)
+                section = None
+            elif line.startswith(b"*CONN"):
+                section = b"*CONN"
+            elif line in [b"*CAP", b"*RES", b"*INDUC"]:
+                section = line
+            elif line.startswith(b"*NAME_MAP"):
+                section = b"*NAME_MAP"
+            elif header_end is None and (match := delimiter_rx.match(line)):
+                delimiter = match.group(1)
+            elif section == b"*NAME_MAP" and (match := name_map_rx.match(line)):
+                names[b"*" + match.group(1)] = match.group(2)
+            elif section == b"*CONN":
+                fields = line.split()
+                if len(fields) < 3:
+                    continue
+                (kind, pin, direction) = fields[:3]
+                (drivers, loads, inputs, outputs) = connections[-1]
+                if kind == b"*P":
+                    inputs |= direction in [b"I", b"B"]
+                    outputs |= direction in [b"O", b"B"]
+                    connections[-1] = (drivers, loads, inputs, outputs)
+                elif kind == b"*I":
+                    instance = pin.rsplit(delimiter, 1)[0]
+                    if direction in [b"O", b"B"]:
+                        drivers.append(instance)
+                    if direction in [b"I", b"B"]:
+                        loads.append(instance)
+            elif line.startswith(b"*"):
+                section = None
+
+    if header_end is None:
+        header_end = offset
+    nets = [(net, start, end or offset) for (net, start, end) in nets]
+
+    return (header_end, names, nets, connections)
+
+
+def get_pip_nets(
+    names: Dict[bytes, bytes],
+    connections: List[Tuple[List[bytes], List[bytes], bool, bool]],
+    static_instances: str,
+) -> Set[int]:
+    """
+    Returns the nets that are on a path from an input port to an output port
+    of the tile, i.e. the nets that a pip delay can depend on. The paths are
+    followed through any instance but the static ones.
+    """
+    static_rx = re.compile(static_instances.encode())
+    static = {
+        instance
+        for (drivers, loads, _, _) in connections
+        for instance in drivers + loads
+        if static_rx.search(names.get(instance, instance))
+    }
+
+    # Nets by the instances that load or drive them
+    inputs_of: Dict[bytes, List[int]] = {}
+    outputs_of: Dict[bytes, List[int]] = {}
+    for i, (drivers, loads, _, _) in enumerate(connections):
+        for instance in loads:
+            inputs_of.setdefault(instance, []).append(i)
+        for instance in drivers:
+            outputs_of.setdefault(instance, []).append(i)
+
+    def reach(start: List[int], forward: bool) -> Set[int]:
+        (through, next_nets) = (1, outputs_of) if forward else (0, inputs_of)
+        seen = set(start)
+        queue = list(start)
+        visited: Set[bytes] = set()
+        while queue:
+            net = queue.pop()
+            for instance in connections[net][through]:
+                if instance in static or instance in visited:
+                    continue
+                visited.add(instance)
+                for next_net in next_nets.get(instance, []):
+                    if next_net not in seen:
+                        seen.add(next_net)
+                        queue.append(next_net)
+        return seen
+
+    forward = reach([i for i, c in enumerate(connections) if c[2]], True)
+    backward = reach([i for i, c in enumerate(connections) if c[3]], False)
+    return forward & backward
+
+
+def reduce_spef(
+    path: str,
+    output: str,
+    static_instances: str = DEFAULT_STATIC_INSTANCES,
+) -> Tuple[int, int]:
+    """
+    Writes the nets of a SPEF file that are relevant to pip paths, with the
+    name map pruned to the names they use, compressed with gzip, which
+    OpenSTA reads as is. Returns the number of nets kept and in total.
+    """
+    (header_end, names, nets, connections) = parse_spef(path)
+    kept = get_pip_nets(names, connections, static_instances)
+
+    # Without any paths between the ports, the tile is left as is
+    if not kept:
+        kept = set(range(len(nets)))
+
+    with open(path, "rb") as f:
+        header = f.read(header_end)
+        blocks = []
+        for i in sorted(kept):
+            (_, start, end) = nets[i]
+            f.seek(start)
+            blocks.append(f.read(end - start))
+
+    # Only the names of the kept nets and their instances are mapped
+    lines = []
+    used = set()
+    section = None
+    for line in header.splitlines(keepends=True):
+        stripped = line.strip()
+        if stripped.startswith(b"*NAME_MAP"):
+            section = b"*NAME_MAP"
+        elif section == b"*NAME_MAP" and (match := name_map_rx.match(stripped)):
+            lines.append((match.group(1), line))
+            continue
+        elif stripped.startswith(b"*"):
+            section = None
+        used.update(index_rx.findall(line))
+        lines.append((None, line))
+    for block in blocks:
+        used.update(index_rx.findall(block))
+
+    tmp = f"{output}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with gzip.open(tmp, "wb", compresslevel=1) as f:
+        f.writelines(line for (index, line) in lines if index is None or index in used)
+        f.writelines(blocks)
+    os.replace(tmp, output)
+
+    return (len(kept), len(nets))
+
+
+def get_reduced_spef(
+    path: str,
+    cache_dir: str,
+    static_instances: str = DEFAULT_STATIC_INSTANCES,
+) -> Tuple[str, bool]:
+    """
+    Returns the reduced SPEF file of ``path`` from the cache, keyed by the
+    hash of the SPEF file, reducing it first if needed. Also returns whether
+    it was found in the cache.
+    """
+    fingerprint = hashlib.sha256()
+    fingerprint.update(f"{REDUCTION_VERSION}:{static_instances}:".encode())
+    fingerprint.update(get_digest(path).encode())
+
+    name = os.path.basename(path)
+    reduced = os.path.join(cache_dir, fingerprint.hexdigest(), f"{name}.gz")
+    if os.path.isfile(reduced):
+        return (reduced, True)
+
+    os.makedirs(os.path.dirname(reduced), exist_ok=True)
+    reduce_spef(path, reduced, static_instances)
+    return (reduced, False)
@@ -1,18 +1,38 @@
 import os
+import re
+import csv
+import shutil
+import hashlib
+import threading
+from copy import deepcopy
 import yaml
 import pathlib
 from decimal import Decimal
-from typing import Callable, List, Literal, Mapping, Tuple, Union, Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Callable,
+    List,
+    Literal,
+    Mapping,
+    Tuple,
+    Type,
+    Union,
+    Optional,
+    Dict,
+    Any,
+)
 from librelane.steps import Step, OdbpyStep, OpenROADStep
 from librelane.steps.step import (
     ViewsUpdate,
     MetricsUpdate,
+    StepError,
 )
 from librelane.steps.common_variables import io_layer_variables
 from librelane.flows import Flow, FlowError
 from librelane.state import DesignFormat, State
-from librelane.common import Path
-from librelane.config import Variable
+from librelane.common import Filter, Path, slugify
+from librelane.config import Config, Instance, Variable
+from librelane.common.misc import mkdirp, _get_process_limit
 from librelane.logging import (
     verbose,
     debug,
@@ -42,6 +62,7 @@ from librelane.steps.common_variables import (
 )
 
 from fabulous.fabric_generator.parser import parse_csv
+from fabulous.fabric_generator.parser.parse_switchmatrix import parseList, parseMatrix
 from fabulous.fabric_generator.gen_fabric.gen_switchmatrix import genTileSwitchMatrix
 from fabulous.fabric_generator.gen_fabric.gen_configmem import generateConfigMem
 from fabulous.fabric_generator.code_generator.code_generator_Verilog import (
@@ -51,9 +72,16 @@ from fabulous.fabric_generator.gen_fabric.gen_tile import (
     generateSuperTile,
     generateTile,
 )
-from fabulous.fabric_definition.define import IO, Side
+from fabulous.fabric_definition.define import (
+    IO,
+    Side,
+    ConfigBitMode,
+    MultiplexerStyle,
+)
+from fabulous.fabric_definition.fabric import Fabric
 from fabulous.fabric_definition.port import Port
-from fabulous.fabulous_settings import init_context
+
+from .fabulous_context import new_context, use_context
 
 __dir__ = os.path.dirname(os.path.abspath(__file__))
 _migrate_unmatched_io = lambda x: "unmatched_design" if x else "none"
@@ -83,6 +111,15 @@ DesignFormat(
     multiple=True,
 ).register()
 
+DesignFormat(
+    "fabulous_pip_delays",
+    "csv",
+    "FABulous pip delay table",
+    alts=["FABULOUS_PIP_DELAYS"],
+    folder_override="pip_delays",
+    multiple=True,
+).register()
+
 
 @Step.factory.register()
 class FABulousIOPlacement(OdbpyStep):
@@ -231,6 +268,643 @@ class AddBuffers(OpenROADStep):
         return os.path.join(os.path.dirname(__file__), "scripts", "add_buffers.tcl")
 
 
+@Step.factory.register()
+class FABulousPipDelays(OpenROAD.MultiCornerSTA):
+    """
+    Characterizes the pips of the hardened tile using OpenSTA.
+
+    For each STA corner, the worst delay from the source wire to the
+    destination wire of every switch matrix pip is measured on the final
+    netlist with extracted parasitics and written to a pip delay table.
+    The fabric can then annotate its pip file by a simple lookup.
+
+    Pips whose wires could not be found in the netlist are kept in the table
+    without a delay.
+    """
+
+    id = "OpenROAD.FABulousPipDelays"
+    name = "Pip Delays (FABulous)"
+    long_name = "Pip Delay Characterization (FABulous)"
+
+    inputs = OpenROAD.MultiCornerSTA.inputs + [DesignFormat.SPEF]
+    outputs = [DesignFormat.FABULOUS_PIP_DELAYS]
+
+    config_vars = OpenROAD.MultiCornerSTA.config_vars + [
+        Variable(
+            "FABULOUS_PIP_LIST",
+            Optional[Path],
+            "Path to the list of pips to characterize. Generated by the FABulousTile flow.",
+        ),
+    ]
+
+    def get_script_path(self):
+        return os.path.join(os.path.dirname(__file__), "scripts", "pip_delays.tcl")
+
+    def run_corner(
+        self,
+        state_in: State,
+        current_env: Dict[str, Any],
+        corner: str,
+        corner_dir: str,
+    ) -> MetricsUpdate:
+        current_env["FABULOUS_PIP_LIST"] = str(self.config["FABULOUS_PIP_LIST"])
+        current_env["_FABULOUS_PIP_DELAYS_OUT"] = os.path.join(
+            corner_dir, f"{self.config['DESIGN_NAME']}__{corner}.csv"
+        )
+        return super().run_corner(state_in, current_env, corner, corner_dir)
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        if self.config["FABULOUS_PIP_LIST"] is None:
+            info("No pip list configured, skipping…")
+            return {}, {}
+
+        kwargs, env = self.extract_env(kwargs)
+        env = self.prepare_env(env, state_in)
+
+        pip_delays = {}
+        pips = 0
+        unresolved = 0
+        with ThreadPoolExecutor(
+            max_workers=self.config["STA_THREADS"] or _get_process_limit()
+        ) as tpe:
+            futures = {}
+            for corner in self.config["STA_CORNERS"]:
+                _, file_list = self._get_corner_files(
+                    corner, prioritize_nl=self.config["STA_MACRO_PRIORITIZE_NL"]
+                )
+
+                current_env = env.copy()
+                file_list.set_env(current_env)
+
+                corner_dir = os.path.join(self.step_dir, corner)
+                mkdirp(corner_dir)
+
+                futures[corner] = tpe.submit(
+                    self.run_corner,
+                    state_in,
+                    current_env,
+                    corner,
+                    corner_dir,
+                )
+
+            for corner, future in futures.items():
+                future.result()
+
+                pip_delays[corner] = Path(
+                    os.path.join(
+                        self.step_dir,
+                        corner,
+                        f"{self.config['DESIGN_NAME']}__{corner}.csv",
+                    )
+                )
+
+                with open(pip_delays[corner], "r") as f:
+                    rows = list(csv.DictReader(f))
+                pips = max(pips, len(rows))
+                unresolved = max(
+                    unresolved, len([row for row in rows if not row["delay"]])
+                )
+
+        if unresolved:
+            warn(f"{unresolved} pips could not be characterized.")
+
+        return {DesignFormat.FABULOUS_PIP_DELAYS: pip_delays}, {
+            "fabulous__pip__count": pips,
+            "fabulous__pip_uncharacterized__count": unresolved,
+        }
+
+
+def get_grt_congestion(log_file: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the final congestion report of a global routing log as
+    {"layers": {layer: usage}, "total": usage}, each usage being a dict of
+    "resource", "demand", "usage" (%), "overflow_h", "overflow_v" and "overflow".
+    Returns None if the log has no congestion report.
+    """
+    row_rx = re.compile(
+        r"^(\S+)\s+(\d+)\s+(\d+)\s+([\d.]+)%\s+(\d+)\s*/\s*(\d+)\s*/\s*(\d+)\s*$"
+    )
+
+    report = None
+    with open(log_file, "r") as f:
+        for line in f:
+            # Only the last report is of interest
+            if "congestion report" in line:
+                report = {"layers": {}, "total": None}
+                continue
+
+            if report is None or (match := row_rx.match(line.strip())) is None:
+                continue
+
+            usage = {
+                "resource": int(match.group(2)),
+                "demand": int(match.group(3)),
+                "usage": float(match.group(4)),
+                "overflow_h": int(match.group(5)),
+                "overflow_v": int(match.group(6)),
+                "overflow": int(match.group(7)),
+            }
+            if match.group(1) == "Total":
+                report["total"] = usage
+            else:
+                report["layers"][match.group(1)] = usage
+
+    if report is None or report["total"] is None:
+        return None
+
+    return report
+
+
+@Step.factory.register()
+class FABulousGlobalRouting(OpenROAD.GlobalRouting):
+    """
+    Performs global routing and reports the final congestion of the tile
+    as metrics, so that it can be checked before detailed routing.
+    """
+
+    id = "OpenROAD.FABulousGlobalRouting"
+    name = "Global Routing (FABulous)"
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        views_updates, metrics_updates = super().run(state_in, **kwargs)
+
+        congestion = get_grt_congestion(self.get_log_path())
+        if congestion is None:
+            self.warn("Could not find the congestion report of global routing.")
+            return views_updates, metrics_updates
+
+        metrics_updates = {
+            **metrics_updates,
+            "global_route__overflow__count": congestion["total"]["overflow"],
+            "global_route__overflow_h__count": congestion["total"]["overflow_h"],
+            "global_route__overflow_v__count": congestion["total"]["overflow_v"],
+            "global_route__usage": congestion["total"]["usage"],
+        }
+        for layer, usage in congestion["layers"].items():
+            if usage["resource"] > 0:
+                metrics_updates[f"global_route__usage__layer:{layer}"] = usage["usage"]
+                metrics_updates[f"global_route__overflow__count__layer:{layer}"] = (
+                    usage["overflow"]
+                )
+
+        return views_updates, metrics_updates
+
+
+@Step.factory.register()
+class FABulousCongestionGate(Step):
+    """
+    Raises an immediate error if global routing of the tile exceeds the
+    configured congestion thresholds, instead of spending hours in detailed
+    routing on a tile that can't route at its current size.
+    """
+
+    id = "Checker.FABulousCongestion"
+    name = "Congestion Gate (FABulous)"
+
+    inputs = []
+    outputs = []
+
+    config_vars = [
+        Variable(
+            "FABULOUS_GRT_MAX_OVERFLOW",
+            int,
+            "The maximum total overflow after global routing.",
+            default=0,
+        ),
+        Variable(
+            "FABULOUS_GRT_MAX_USAGE",
+            Optional[Decimal],
+            "The maximum routing resource usage of any layer after global routing. If unset, the usage is not checked.",
+            units="%",
+        ),
+    ]
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        overflow = state_in.metrics.get("global_route__overflow__count")
+        if overflow is None:
+            self.warn(
+                "The global routing congestion metrics were not found. Are you sure the relevant step was run?"
+            )
+            return {}, {}
+
+        usage_by_layer = {}
+        overflow_by_layer = {}
+        for key, value in state_in.metrics.items():
+            if key.startswith("global_route__usage__layer:"):
+                usage_by_layer[key.split(":", 1)[1]] = value
+            elif key.startswith("global_route__overflow__count__layer:"):
+                overflow_by_layer[key.split(":", 1)[1]] = value
+
+        max_overflow = self.config["FABULOUS_GRT_MAX_OVERFLOW"]
+        max_usage = self.config["FABULOUS_GRT_MAX_USAGE"]
+
+        violations = []
+        if overflow > max_overflow:
+            violations.append(
+                f"total overflow of {overflow} exceeds {max_overflow} "
+                f"(horizontal: {state_in.metrics.get('global_route__overflow_h__count')}, "
+                f"vertical: {state_in.metrics.get('global_route__overflow_v__count')})"
+            )
+        if max_usage is not None:
+            for layer, usage in usage_by_layer.items():
+                if usage > max_usage:
+                    violations.append(
+                        f"usage of {layer} is {usage}%, exceeds {max_usage}%"
+                    )
+
+        if len(violations) == 0:
+            info("Check for global routing congestion clear.")
+            return {}, {}
+
+        for violation in violations:
+            self.err(violation)
+
+        for layer, usage in sorted(
+            usage_by_layer.items(), key=lambda item: item[1], reverse=True
+        ):
+            self.err(
+                f"{layer}: {usage}% usage, {overflow_by_layer.get(layer, 0)} overflow"
+            )
+
+        raise StepError(
+            f"{self.config['DESIGN_NAME']} is too congested after global routing to be routed in detail: "
+            f"{'; '.join(violations)}. Increase the size of the tile (see FABulousTileSizeSweep) or relax the thresholds."
+        )
+
+
+def save_state(state: State, path: str):
+    """
+    Copies all views of a state into a directory and saves
+    the relocated state as state.json next to them.
+    """
+
+    def copy_views(value, directory):
+        if isinstance(value, list):
+            return [copy_views(entry, directory) for entry in value]
+        if isinstance(value, dict):
+            return {
+                key: copy_views(entry, os.path.join(directory, key))
+                for key, entry in value.items()
+            }
+        if value is None:
+            return None
+
+        mkdirp(directory)
+        target = os.path.join(directory, os.path.basename(value))
+        shutil.copyfile(value, target, follow_symlinks=True)
+        return Path(target)
+
+    views = {
+        key: copy_views(value, os.path.join(path, key)) for key, value in state.items()
+    }
+
+    with open(os.path.join(path, "state.json"), "w") as f:
+        f.write(State(views, metrics=state.metrics).dumps())
+
+
+def load_state(path: str) -> State:
+    """
+    Loads a state saved with save_state.
+    """
+    with open(os.path.join(path, "state.json"), "r") as f:
+        return State.loads(f.read())
+
+
+def promote_sources(src_dir: str, dst_dir: str) -> List[str]:
+    """
+    Copies the generated sources of a run into the tile directory. Files with
+    unchanged contents are left untouched, all others are replaced atomically
+    so that concurrent runs never see a partially written file.
+    Returns the promoted files.
+    """
+    promoted = []
+    for root, _, files in os.walk(src_dir):
+        for file in sorted(files):
+            src = os.path.join(root, file)
+            dst = os.path.join(dst_dir, os.path.relpath(src, src_dir))
+
+            with open(src, "rb") as f:
+                contents = f.read()
+            digest = hashlib.sha256(contents).hexdigest()
+
+            if os.path.isfile(dst):
+                with open(dst, "rb") as f:
+                    if hashlib.sha256(f.read()).hexdigest() == digest:
+                        continue
+
+            mkdirp(os.path.dirname(dst))
+            tmp = f"{dst}.{digest[:12]}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(contents)
+            os.replace(tmp, dst)
+            promoted.append(dst)
+
+    return promoted
+
+
+def stage_config_mem_csv(src_dir: str, tile_dir: str, name: str) -> str:
+    """
+    Returns the path of the configuration memory mapping ``name``, relative
+    to the tile directory, in the sources of a run. A mapping that is already
+    in the tile directory is copied there, so that FABulous uses it instead of
+    generating the default mapping.
+    """
+    config_mem_csv = os.path.join(src_dir, name)
+    if os.path.isfile(os.path.join(tile_dir, name)):
+        mkdirp(os.path.dirname(config_mem_csv))
+        shutil.copyfile(os.path.join(tile_dir, name), config_mem_csv)
+    return config_mem_csv
+
+
+def is_gated(flow: Type[Flow], config: Config, step_id: str) -> bool:
+    """
+    Returns whether a step of ``flow`` is skipped for ``config`` by the
+    ``gating_config_vars`` of the flow, whose keys may be wildcards.
+    """
+    for key, variables in flow.gating_config_vars.items():
+        if step_id == key or step_id in Filter([key]).filter([step_id]):
+            if not all(config[variable] for variable in variables):
+                return True
+    return False
+
+
+def update_fingerprint(fingerprint, value, contents: bool = False):
+    """
+    Adds a configuration value to a hash. Files are identified by their
+    contents if ``contents`` is set, otherwise by their path, size and
+    modification time.
+    """
+    if isinstance(value, (list, tuple)):
+        for entry in value:
+            update_fingerprint(fingerprint, entry, contents)
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            fingerprint.update(str(key).encode())
+            update_fingerprint(fingerprint, value[key], contents)
+    elif isinstance(value, (str, os.PathLike)) and os.path.isfile(value):
+        if contents:
+            with open(value, "rb") as f:
+                fingerprint.update(f.read())
+        else:
+            fingerprint.update(os.path.abspath(value).encode())
+            stat = os.stat(value)
+            fingerprint.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    else:
+        fingerprint.update(str(value).encode())
+
+
+def get_module_instances(netlist: str, module: str) -> List[str]:
+    """
+    Returns the names of the instances of a module in a generated
+    Verilog netlist, in the order they appear.
+    """
+    with open(netlist, "r") as f:
+        contents = re.sub(r"/\*.*?\*/|//[^\n]*", "", f.read(), flags=re.S)
+
+    instances = re.findall(
+        rf"\b{re.escape(module)}\s*(?:#\s*\(.*?\)\s*)?(\w+)\s*\(",
+        contents,
+        flags=re.S,
+    )
+    return list(dict.fromkeys(instances))
+
+
+def get_supertile_tiles(supertile_csv: str, name: str) -> List[str]:
+    """
+    Returns the names of the tiles of a supertile, in the order
+    they appear in the supertile CSV file.
+    """
+    with open(supertile_csv, "r") as f:
+        contents = re.sub(r"#.*", "", f.read())
+
+    match = re.search(
+        rf"^\s*SuperTILE\s*,\s*{re.escape(name)}\s*(?:,[^\n]*)?$(.*?)^\s*EndSuperTILE",
+        contents,
+        re.MULTILINE | re.DOTALL,
+    )
+    if match is None:
+        if re.search(rf"^\s*SuperTILE\s*,\s*{re.escape(name)}\b", contents, re.M):
+            raise FlowError(
+                f"Supertile {name} in {supertile_csv} has no EndSuperTILE, is the file truncated?"
+            )
+        raise FlowError(f"Could not find supertile {name} in {supertile_csv}.")
+
+    tiles = []
+    for line in match.group(1).splitlines():
+        entries = [entry.strip() for entry in line.split(",")]
+        if entries[0] in ["BEL", "MATRIX"]:
+            continue
+        for entry in entries:
+            if entry not in ["", "Null", "NULL", "None", "MASTER"]:
+                if entry not in tiles:
+                    tiles.append(entry)
+
+    if not tiles:
+        raise FlowError(f"Supertile {name} in {supertile_csv} contains no tiles.")
+
+    return tiles
+
+
+def load_tile_fabric(tile_dir: str, name: str, is_supertile: bool) -> Fabric:
+    """
+    Builds a fabric that only contains a single tile or supertile, by parsing
+    just its own CSV files. The FABulous generators need a fabric for the
+    parameters, but generating a whole fabric CSV is not necessary.
+    """
+    tile_csv = pathlib.Path(os.path.abspath(os.path.join(tile_dir, f"{name}.csv")))
+    if not tile_csv.is_file():
+        raise FlowError(f"Could not find the tile CSV file {tile_csv}.")
+
+    tile_csvs = [tile_csv]
+    if is_supertile:
+        tile_csvs = [
+            pathlib.Path(os.path.abspath(os.path.join(tile_dir, tile, f"{tile}.csv")))
+            for tile in get_supertile_tiles(str(tile_csv), name)
+        ]
+
+    tileDic = {}
+    commonWirePair = []
+    for csv_path in tile_csvs:
+        if not csv_path.is_file():
+            raise FlowError(f"Could not find the tile CSV file {csv_path}.")
+        (tiles, wire_pairs) = parse_csv.parseTilesCSV(csv_path)
+        for tile in tiles:
+            tileDic[tile.name] = tile
+        commonWirePair += wire_pairs
+
+    superTileDic = {}
+    if is_supertile:
+        for supertile in parse_csv.parseSupertilesCSV(tile_csv, tileDic):
+            if supertile.name == name:
+                superTileDic[name] = supertile
+        if name not in superTileDic:
+            raise FlowError(f"Could not find supertile {name} in {tile_csv}.")
+        tile_map = [
+            [deepcopy(tile) if tile is not None else None for tile in row]
+            for row in superTileDic[name].tileMap
+        ]
+    else:
+        if name not in tileDic:
+            raise FlowError(f"Could not find tile {name} in {tile_csv}.")
+        tileDic = {name: tileDic[name]}
+        tile_map = [[deepcopy(tileDic[name])]]
+
+    return Fabric(
+        fabric_dir=tile_csv,
+        tile=tile_map,
+        name="fabulous_fabric",
+        numberOfRows=len(tile_map),
+        numberOfColumns=max(len(row) for row in tile_map),
+        configBitMode=ConfigBitMode.FRAME_BASED,
+        generateDelayInSwitchMatrix=80,
+        multiplexerStyle=MultiplexerStyle.CUSTOM,
+        numberOfBRAMs=int(len(tile_map) / 2),
+        # The old fabric CSV always parsed this as FALSE, which the
+        # generated RTL of the tiles depends on
+        superTileEnable=False,
+        disableUserCLK=True,
+        tileDic=tileDic,
+        superTileDic=superTileDic,
+        commonWirePair=[
+            (i, j)
+            for (i, j) in dict.fromkeys(commonWirePair)
+            if "NULL" not in i and "NULL" not in j
+        ],
+    )
+
+
+def get_switch_matrix_pips(tile) -> List[Tuple[str, str]]:
+    """
+    Returns the source and destination wire of each pip of the tile's switch matrix.
+    """
+    if tile.matrixDir.suffix == ".csv":
+        return [
+            (source, destination)
+            for destination, sources in parseMatrix(tile.matrixDir, tile.name).items()
+            for source in sources
+        ]
+    elif tile.matrixDir.suffix == ".list":
+        return [
+            (source, destination) for destination, source in parseList(tile.matrixDir)
+        ]
+
+    raise FlowError(f"{tile.matrixDir} is not a .csv or .list file")
+
+
+@Step.factory.register()
+class FABulousTimingAbstract(OpenROAD.STAPostPNR):
+    """
+    Generates an extracted timing model (Liberty abstract) of the hardened tile
+    for each STA corner, so that the fabric can be analyzed hierarchically
+    without loading each tile netlist and SPEF.
+
+    The timing of the tile itself is only checked at the fabric level,
+    therefore the STA metrics are not propagated.
+    """
+
+    id = "OpenROAD.FABulousTimingAbstract"
+    name = "Timing Abstract (FABulous)"
+    long_name = "Extracted Timing Model Generation (FABulous)"
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        views_updates, _ = super().run(state_in, **kwargs)
+        return views_updates, {}
+
+
+tile_dir_variable = Variable(
+    "FABULOUS_TILE_DIR",
+    Path,
+    """
+    Path to the tile directory where the tile CSV file is located.
+    """,
+)
+
+
+@Step.factory.register()
+class FABulousTileAbstract(OpenROADStep):
+    """
+    Writes a preliminary LEF abstract of the tile right after the I/O
+    placement, with the die area, the pins and the power straps, and a copy
+    of the synthesized netlist to ``macro/<PDK>/abstract`` in the tile
+    directory. This way, the fabric can be floorplanned while the tile is
+    still being placed and routed.
+    """
+
+    id = "OpenROAD.FABulousTileAbstract"
+    name = "Preliminary Tile Abstract (FABulous)"
+
+    outputs = []
+
+    config_vars = OpenROADStep.config_vars + [tile_dir_variable]
+
+    def get_script_path(self):
+        return os.path.join(os.path.dirname(__file__), "scripts", "write_abstract.tcl")
+
+    def run(self, state_in: State, **kwargs) -> Tuple[ViewsUpdate, MetricsUpdate]:
+        kwargs, env = self.extract_env(kwargs)
+
+        design = self.config["DESIGN_NAME"]
+        lef = os.path.join(self.step_dir, f"{design}.lef")
+        env["_FABULOUS_ABSTRACT_LEF"] = lef
+
+        views_updates, metrics_updates = super().run(state_in, env=env, **kwargs)
+
+        abstract_dir = os.path.join(
+            self.config["FABULOUS_TILE_DIR"], "macro", self.config["PDK"], "abstract"
+        )
+        mkdirp(abstract_dir)
+
+        # The fabric may read the abstract at any time
+        for src, dst in [
+            (lef, os.path.join(abstract_dir, f"{design}.lef")),
+            (
+                str(state_in[DesignFormat.NETLIST]),
+                os.path.join(abstract_dir, f"{design}.nl.v"),
+            ),
+        ]:
+            tmp = f"{dst}.{os.getpid()}.tmp"
+            shutil.copyfile(src, tmp)
+            os.replace(tmp, dst)
+
+        info(f"Saved the preliminary abstract to {abstract_dir}")
+
+        return views_updates, metrics_updates
+
+
+@Step.factory.register()
+class FABulousSynthesis(Yosys.Synthesis):
+    """
+    Like ``Yosys.Synthesis``, but the BEL sources in ``VERILOG_FILES`` are
+    replaced by their pre-synthesized netlists from ``FABULOUS_BEL_NETLISTS``,
+    so that only the switch matrix, the configuration memory and the glue
+    logic of the tile are synthesized. The other steps still see the RTL.
+    """
+
+    id = "Yosys.FABulousSynthesis"
+    name = "Synthesis (FABulous)"
+
+    config_vars = Yosys.Synthesis.config_vars + [
+        Variable(
+            "FABULOUS_BEL_NETLISTS",
+            Optional[Dict[str, Path]],
+            "The pre-synthesized netlists of the BELs, by the absolute path of their source.",
+        ),
+    ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        # The configuration is written before the step runs
+        netlists = self.config["FABULOUS_BEL_NETLISTS"] or {}
+        if netlists:
+            self.config = self.config.copy(
+                VERILOG_FILES=[
+                    netlists.get(os.path.abspath(file), file)
+                    for file in self.config["VERILOG_FILES"]
+                ]
+            )
+
+
 Classic = Flow.factory.get("Classic")
 
 
@@ -245,14 +919,40 @@ class FABulousTile(Classic):
         ("OpenROAD.STAMidPNR", None),
         ("OpenROAD.STAMidPNR", None),
         ("OpenROAD.STAMidPNR", None),
-        ("OpenROAD.STAPostPNR", None),
+        # But generate timing abstracts if explicitly wished
+        ("OpenROAD.STAPostPNR", FABulousTimingAbstract),
+        # And characterize the pips if explicitly wished
+        ("+OpenROAD.FABulousTimingAbstract", FABulousPipDelays),
+        # Report the congestion after global routing
+        ("OpenROAD.GlobalRouting", FABulousGlobalRouting),
+        # And stop early if the tile can't route
+        ("+OpenROAD.FABulousGlobalRouting", FABulousCongestionGate),
         # Don't resize/repair any buffers
         ("OpenROAD.Resizer*", None),
         ("OpenROAD.RepairDesign*", None),
         # But do add buffers if explicitly wished
         ("+Odb.ApplyDEFTemplate", AddBuffers),
+        # Save an abstract to floorplan the fabric early
+        ("+Odb.FABulousIOPlacement", FABulousTileAbstract),
+        # Link the pre-synthesized BELs if explicitly wished
+        ("Yosys.Synthesis", FABulousSynthesis),
     ]
 
+    gating_config_vars = {
+        **Classic.gating_config_vars,
+        "OpenROAD.FABulousTimingAbstract": [
+            "RUN_MCSTA",
+            "RUN_SPEF_EXTRACTION",
+            "FABULOUS_TIMING_ABSTRACT",
+        ],
+        "OpenROAD.FABulousPipDelays": [
+            "RUN_SPEF_EXTRACTION",
+            "FABULOUS_PIP_DELAYS",
+        ],
+        "Checker.FABulousCongestion": ["FABULOUS_CONGESTION_GATE"],
+        "OpenROAD.FABulousTileAbstract": ["FABULOUS_PRELIMINARY_ABSTRACT"],
+    }
+
     config_vars = Classic.config_vars + [
         Variable(
             "FABULOUS_EXTERNAL_SIDE",
@@ -269,98 +969,108 @@ class FABulousTile(Classic):
             """,
             default=False,
         ),
+        tile_dir_variable,
+        Variable(
+            "FABULOUS_TIMING_ABSTRACT",
+            bool,
+            """
+            Generate a Liberty timing abstract of the tile for each STA corner.
+            """,
+            default=False,
+        ),
+        Variable(
+            "FABULOUS_PIP_DELAYS",
+            bool,
+            """
+            Characterize the pips of the tile and write a pip delay table for each STA corner.
+            """,
+            default=False,
+        ),
         Variable(
-            "FABULOUS_TILE_DIR",
-            Path,
+            "FABULOUS_CONGESTION_GATE",
+            bool,
             """
-            Path to the tile directory where the tile CSV file is located.
+            Stop the flow after global routing if the congestion exceeds FABULOUS_GRT_MAX_OVERFLOW or FABULOUS_GRT_MAX_USAGE.
+            """,
+            default=False,
+        ),
+        Variable(
+            "FABULOUS_PRELIMINARY_ABSTRACT",
+            bool,
+            """
+            Save a preliminary LEF abstract and netlist of the tile to macro/<PDK>/abstract right after the I/O placement, so that the fabric can be floorplanned before the tile is routed.
+            """,
+            default=False,
+        ),
+        Variable(
+            "FABULOUS_SYNTH_CACHE",
+            bool,
+            """
+            Cache the state before the I/O placement in the tile directory. If the RTL and the configuration of the steps before are unchanged, e.g. only the pin order changed, the flow resumes from the I/O placement.
+            """,
+            default=False,
+        ),
+        Variable(
+            "FABULOUS_BEL_CACHE",
+            bool,
+            """
+            Synthesize each BEL on its own once per tile library and link the cached netlists into the synthesis of the tile instead of synthesizing the BELs again in every tile. The cache is keyed by the BEL sources, the PDK and the synthesis configuration.
+            """,
+            default=False,
+        ),
+        Variable(
+            "FABULOUS_BEL_MACROS",
+            Optional[Dict[str, Path]],
+            """
+            BELs to implement as hard macros inside the tile, by module name. Each one maps to the configuration of the BEL as a design of its own, which is hardened once per tile library with the Classic flow. The MACROS configuration for the BEL instances is generated automatically.
+            """,
+        ),
+        Variable(
+            "FABULOUS_BEL_MACRO_LOCATIONS",
+            Optional[Dict[str, Instance]],
+            """
+            The locations and orientations of the BEL macro instances inside the tile, by instance name.
             """,
         ),
     ]
 
-    def run(
-        self,
-        initial_state: State,
-        **kwargs,
-    ) -> Tuple[State, List[Step]]:
-        step_list: List[Step] = []
-
+    def prepare(self, initial_state: State) -> State:
+        """
+        Generates the tile RTL and the pin order configuration and
+        sets up the configuration for hardening the tile.
+        """
+        # Each flow has its own FABulous context, so that several tiles can
+        # be generated in the same process. FABulous reads it from every
+        # generator, so the whole generation runs in it.
+        self.fabulous_context = new_context(os.getcwd())
+        with use_context(self.fabulous_context):
+            return self.generate_sources(initial_state)
+
+    def generate_sources(self, initial_state: State) -> State:
+        """
+        Generates the tile with FABulous, see :meth:`prepare`.
+        """
         info(f"VERILOG_FILES: {self.config['VERILOG_FILES']}")
         info(f"FABULOUS_TILE_DIR: {self.config['FABULOUS_TILE_DIR']}")
 
         verilog_files = self.config["VERILOG_FILES"]
 
-        # Create a dummy fabric
-        # TODO FABulous should be able to create tiles without a fabric
-        csv_file = os.path.join(self.run_dir, "fabric.csv")
-
-        # If supertile get the individual tiles
-        supertile_tiles = []
-        if self.config["FABULOUS_SUPERTILE"]:
-            with open(
-                os.path.join(
-                    self.config["FABULOUS_TILE_DIR"],
-                    self.config["DESIGN_NAME"] + ".csv",
-                ),
-                "r",
-            ) as f:
-                f.readline()  # Skip SuperTILE header
-
-                while "EndSuperTILE" not in (line := f.readline()):
-                    line = line.strip()
-                    tiles = line.split(",")
-                    for tile in tiles:
-                        if tile != "":
-                            supertile_tiles.append(tile)
-
-        print(f"supertile_tiles: {supertile_tiles}")
-
-        with open(csv_file, "w") as f:
-            f.write("FabricBegin\n")
-
-            name = self.config["DESIGN_NAME"]
-
-            # Only 1x2 supported for now
-            if self.config["FABULOUS_SUPERTILE"]:
-                for tile in supertile_tiles:
-                    f.write(f"{tile}\n")
-            else:
-                f.write(f"{name}\n")
-
-            f.write("FabricEnd\n")
-            f.write("ParametersBegin\n")
-
-            f.write("ConfigBitMode,frame_based\n")  # default is FlipFlopChain
-            f.write("GenerateDelayInSwitchMatrix,80\n")
-            f.write("MultiplexerStyle,custom\n")
-            f.write(
-                'SuperTileEnable,{"TRUE" if self.config["FABULOUS_SUPERTILE"] else "FALSE"}\n'
-            )  # TRUE/FALSE
-            f.write("DisableUserCLK,TRUE\n")
-
-            if self.config["FABULOUS_SUPERTILE"]:
-                for tile in supertile_tiles:
-                    f.write(
-                        f'Tile,{os.path.abspath(os.path.join(self.config["FABULOUS_TILE_DIR"], tile, f"{tile}.csv"))}\n'
-                    )
-                f.write(
-                    f'Supertile,{os.path.abspath(os.path.join(self.config["FABULOUS_TILE_DIR"], self.config["DESIGN_NAME"] + ".csv"))}\n'
-                )
-            else:
-                f.write(
-                    f'Tile,{os.path.abspath(os.path.join(self.config["FABULOUS_TILE_DIR"], self.config["DESIGN_NAME"] + ".csv"))}\n'
-                )
-
-            f.write("ParametersEnd\n")
-
-        # Unfortunately necessary
-        os.environ["FAB_PROJ_DIR"] = "."
+        # The shared sources (e.g. models_pack.v) are needed
+        # to synthesize the BELs on their own
+        self.shared_verilog_files = list(verilog_files)
+        self.bel_modules: Dict[str, str] = {}
 
-        init_context(api_mode=True)
+        # The RTL is generated into the run directory first and is
+        # only promoted to the tile directory if its contents changed
+        src_dir = os.path.join(self.run_dir, "src")
+        mkdirp(src_dir)
 
         self.writer = VerilogCodeGenerator()
-        self.fabric = parse_csv.parseFabricCSV(pathlib.Path(csv_file))
-        self.fabric.name = "fabulous_fabric"
+        self.fabric = load_tile_fabric(
+            self.config["FABULOUS_TILE_DIR"],
+            self.config["DESIGN_NAME"],
+            self.config["FABULOUS_SUPERTILE"],
+        )
 
         tileByFabric = list(self.fabric.tileDic.keys())
         superTileByFabric = list(self.fabric.superTileDic.keys())
@@ -384,8 +1094,7 @@ class FABulousTile(Classic):
 
             # Gen switch matrix
             switch_matrix_path = os.path.join(
-                self.config["FABULOUS_TILE_DIR"],
-                f"{self.config['DESIGN_NAME']}_switch_matrix.v",
+                src_dir, f"{self.config['DESIGN_NAME']}_switch_matrix.v"
             )
             self.writer.outFileName = pathlib.Path(switch_matrix_path)
             genTileSwitchMatrix(
@@ -405,29 +1114,23 @@ class FABulousTile(Classic):
 
             # Gen config mem
             config_mem_path = os.path.join(
+                src_dir, f"{self.config['DESIGN_NAME']}_ConfigMem.v"
+            )
+            config_mem_csv = stage_config_mem_csv(
+                src_dir,
                 self.config["FABULOUS_TILE_DIR"],
-                f"{self.config['DESIGN_NAME']}_ConfigMem.v",
+                f"{self.config['DESIGN_NAME']}_ConfigMem.csv",
             )
             self.writer.outFileName = pathlib.Path(config_mem_path)
             generateConfigMem(
                 self.writer,
                 self.fabric,
                 tile,
-                pathlib.Path(
-                    os.path.join(
-                        self.config["FABULOUS_TILE_DIR"],
-                        f"{self.config['DESIGN_NAME']}_ConfigMem.csv",
-                    )
-                ),
+                pathlib.Path(config_mem_csv),
             )
 
             # Termination tiles have no config bits, therefore no config mem is generated
-            if pathlib.Path(
-                os.path.join(
-                    self.config["FABULOUS_TILE_DIR"],
-                    f"{self.config['DESIGN_NAME']}_ConfigMem.csv",
-                )
-            ).exists():
+            if pathlib.Path(config_mem_csv).exists():
                 verilog_files.append(config_mem_path)
                 initial_state = State(
                     copying=initial_state,
@@ -441,9 +1144,7 @@ class FABulousTile(Classic):
 
             # Gen tile
             info(f"Generating tile {self.config['DESIGN_NAME']}")
-            tile_netlist_path = os.path.join(
-                self.config["FABULOUS_TILE_DIR"], f"{self.config['DESIGN_NAME']}.v"
-            )
+            tile_netlist_path = os.path.join(src_dir, f"{self.config['DESIGN_NAME']}.v")
             self.writer.outFileName = pathlib.Path(tile_netlist_path)
             generateTile(self.writer, self.fabric, tile)
             verilog_files.append(tile_netlist_path)
@@ -463,6 +1164,7 @@ class FABulousTile(Classic):
             for bel in tile.bels:
                 if not os.path.relpath(bel.src) in verilog_files:
                     verilog_files.append(os.path.relpath(bel.src))
+                self.bel_modules[os.path.abspath(bel.src)] = bel.module_name
 
             # Check external pins side
             for bel in tile.bels:
@@ -611,10 +1313,9 @@ class FABulousTile(Classic):
             for tile in supertile.tiles:
 
                 # Gen switch matrix
+                mkdirp(os.path.join(src_dir, tile.name))
                 switch_matrix_path = os.path.join(
-                    self.config["FABULOUS_TILE_DIR"],
-                    tile.name,
-                    f"{tile.name}_switch_matrix.v",
+                    src_dir, tile.name, f"{tile.name}_switch_matrix.v"
                 )
                 self.writer.outFileName = pathlib.Path(switch_matrix_path)
                 genTileSwitchMatrix(
@@ -633,32 +1334,23 @@ class FABulousTile(Classic):
 
                 # Gen config mem
                 config_mem_path = os.path.join(
+                    src_dir, tile.name, f"{tile.name}_ConfigMem.v"
+                )
+                config_mem_csv = stage_config_mem_csv(
+                    src_dir,
                     self.config["FABULOUS_TILE_DIR"],
-                    tile.name,
-                    f"{tile.name}_ConfigMem.v",
+                    os.path.join(tile.name, f"{tile.name}_ConfigMem.csv"),
                 )
                 self.writer.outFileName = pathlib.Path(config_mem_path)
                 generateConfigMem(
                     self.writer,
                     self.fabric,
                     tile,
-                    pathlib.Path(
-                        os.path.join(
-                            self.config["FABULOUS_TILE_DIR"],
-                            tile.name,
-                            f"{tile.name}_ConfigMem.csv",
-                        )
-                    ),
+                    pathlib.Path(config_mem_csv),
                 )
 
                 # Termination tiles have no config bits, therefore no config mem is generated
-                if pathlib.Path(
-                    os.path.join(
-                        self.config["FABULOUS_TILE_DIR"],
-                        tile.name,
-                        f"{tile.name}_ConfigMem.csv",
-                    )
-                ).exists():
+                if pathlib.Path(config_mem_csv).exists():
                     verilog_files.append(config_mem_path)
                     initial_state = State(
                         copying=initial_state,
@@ -672,9 +1364,7 @@ class FABulousTile(Classic):
 
                 # Gen tile
                 info(f"Generating tile {tile.name}")
-                tile_netlist_path = os.path.join(
-                    self.config["FABULOUS_TILE_DIR"], tile.name, f"{tile.name}.v"
-                )
+                tile_netlist_path = os.path.join(src_dir, tile.name, f"{tile.name}.v")
                 self.writer.outFileName = pathlib.Path(tile_netlist_path)
                 generateTile(self.writer, self.fabric, tile)
                 verilog_files.append(tile_netlist_path)
@@ -694,12 +1384,11 @@ class FABulousTile(Classic):
                 for bel in tile.bels:
                     if not os.path.relpath(bel.src) in verilog_files:
                         verilog_files.append(os.path.relpath(bel.src))
+                    self.bel_modules[os.path.abspath(bel.src)] = bel.module_name
 
             # Gen super tile
             info(f"Generating tile {self.config['DESIGN_NAME']}")
-            tile_netlist_path = os.path.join(
-                self.config["FABULOUS_TILE_DIR"], f"{self.config['DESIGN_NAME']}.v"
-            )
+            tile_netlist_path = os.path.join(src_dir, f"{self.config['DESIGN_NAME']}.v")
             self.writer.outFileName = pathlib.Path(tile_netlist_path)
             generateSuperTile(self.writer, self.fabric, supertile)
             info(f"Generated tile {self.config['DESIGN_NAME']}")
@@ -945,6 +1634,37 @@ class FABulousTile(Classic):
 
         self.config = self.config.copy(IO_PIN_ORDER_CFG=pin_file)
 
+        # Write the pips to characterize
+        if self.config["FABULOUS_PIP_DELAYS"]:
+            # Inside a supertile, the wires are either connected to
+            # a port of the supertile or are internal to the subtile
+            if is_supertile:
+                tiles_with_prefixes = [
+                    (tile, f"Tile_X{x}Y{y}_{tile.name}. Tile_X{x}Y{y}_")
+                    for y, row in enumerate(supertile.tileMap)
+                    for x, tile in enumerate(row)
+                    if tile is not None
+                ]
+            else:
+                tiles_with_prefixes = [
+                    (self.fabric.getTileByName(self.config["DESIGN_NAME"]), "")
+                ]
+
+            pip_list = os.path.join(self.run_dir, "pips.csv")
+            with open(pip_list, "w") as f:
+                f.write("# tile,prefixes,source,destination\n")
+                for tile, prefixes in tiles_with_prefixes:
+                    for source, destination in get_switch_matrix_pips(tile):
+                        f.write(f"{tile.name},{prefixes},{source},{destination}\n")
+
+            self.config = self.config.copy(FABULOUS_PIP_LIST=pip_list)
+
+        promoted = promote_sources(src_dir, self.config["FABULOUS_TILE_DIR"])
+        if promoted:
+            info(f"Promoted {len(promoted)} changed source(s) to the tile directory")
+        else:
+            info("Generated sources are unchanged")
+
         info(self.run_dir)
 
         # Add models and custom cells
@@ -957,7 +1677,359 @@ class FABulousTile(Classic):
         # Overwrite VERILOG_FILES config variable with our Verilog files
         self.config = self.config.copy(VERILOG_FILES=verilog_files)
 
+        return initial_state
+
+    def get_synthesis_fingerprint(self) -> str:
+        """
+        Returns a fingerprint of everything the steps before the I/O placement
+        depend on: the tile RTL and BEL sources and the configuration of these
+        steps. The pin order configuration and the I/O layers are excluded.
+        """
+        io_placement = [cls.id for cls in self.Steps].index(FABulousIOPlacement.id)
+
+        excluded = {"IO_PIN_ORDER_CFG"} | {
+            variable.name for variable in io_layer_variables
+        }
+        names = set()
+        for cls in self.Steps[:io_placement]:
+            names.update(variable.name for variable in cls.config_vars)
+        names -= excluded
+
+        fingerprint = hashlib.sha256()
+        for name in sorted(names):
+            fingerprint.update(name.encode())
+            # The RTL is generated into every run directory, only compare the contents
+            update_fingerprint(
+                fingerprint, self.config.get(name), contents=name == "VERILOG_FILES"
+            )
+
+        return fingerprint.hexdigest()
+
+    def get_bel_macro_instances(self, module: str) -> List[str]:
+        """
+        Returns the names of the instances of a BEL in the generated tile
+        netlist. Inside a supertile, they are prefixed with the subtile.
+        """
+        src_dir = os.path.join(self.run_dir, "src")
+        design = self.config["DESIGN_NAME"]
+
+        if design in self.fabric.superTileDic:
+            netlists = [
+                (
+                    f"Tile_X{x}Y{y}_{tile.name}.",
+                    os.path.join(src_dir, tile.name, f"{tile.name}.v"),
+                )
+                for y, row in enumerate(self.fabric.superTileDic[design].tileMap)
+                for x, tile in enumerate(row)
+                if tile is not None
+            ]
+        else:
+            netlists = [("", os.path.join(src_dir, f"{design}.v"))]
+
+        return [
+            f"{prefix}{instance}"
+            for prefix, netlist in netlists
+            for instance in get_module_instances(netlist, module)
+        ]
+
+    def harden_bel_macros(self) -> List[Step]:
+        """
+        Hardens the BELs in ``FABULOUS_BEL_MACROS`` with the Classic flow, or
+        loads them from the BEL macro cache of the tile library, and adds
+        them to ``MACROS``. Their sources are removed from ``VERILOG_FILES``.
+
+        Returns the steps that were run.
+        """
+        cache_dir = os.path.join(
+            os.path.dirname(os.path.abspath(self.config["FABULOUS_TILE_DIR"])),
+            ".cache",
+            "bel_macros",
+        )
+        modules = set(self.bel_modules.values())
+        locations = self.config["FABULOUS_BEL_MACRO_LOCATIONS"] or {}
+
+        step_list: List[Step] = []
+        failures: List[str] = []
+        macros: Dict[str, Dict[str, Any]] = {}
+        lock = threading.Lock()
+
+        def harden_bel(module: str, bel_config: str):
+            config, _ = Config.load(
+                str(bel_config),
+                Classic.config_vars,
+                config_override_strings=[f"DESIGN_NAME={module}"],
+                pdk=self.config["PDK"],
+                pdk_root=self.config["PDK_ROOT"],
+                scl=self.config["STD_CELL_LIBRARY"],
+            )
+
+            fingerprint = hashlib.sha256()
+            for name in sorted(config.keys()):
+                fingerprint.update(name.encode())
+                update_fingerprint(
+                    fingerprint, config[name], contents=name == "VERILOG_FILES"
+                )
+            digest = fingerprint.hexdigest()
+            cache_path = os.path.join(cache_dir, module, digest)
+
+            if os.path.isfile(os.path.join(cache_path, "state.json")):
+                info(f"Using the cached macro of {module} ({digest[:12]})")
+                state = load_state(cache_path)
+            else:
+                info(f"Hardening {module} for the BEL macro cache ({digest[:12]})")
+
+                # The steps of each BEL are numbered in a directory of their
+                # own, as the flow's step ordinal isn't advanced for them
+                bel_dir = os.path.join(self.run_dir, "bel_macros", module)
+                digits = len(str(len(Classic.Steps)))
+                ordinal = 0
+
+                state = State()
+                for cls in Classic.Steps:
+                    if is_gated(Classic, config, cls.id):
+                        continue
+
+                    step = cls(
+                        config=config,
+                        state_in=state,
+                        id=f"{cls.id}-{module}",
+                        flow=self,
+                    )
+                    with lock:
+                        step_list.append(step)
+
+                    ordinal += 1
+                    step_dir = os.path.join(
+                        bel_dir, f"{str(ordinal).zfill(digits)}-{slugify(cls.id)}"
+                    )
+                    try:
+                        state = step.start(toolbox=self.toolbox, step_dir=step_dir)
+                    except StepError as e:
+                        with lock:
+                            failures.append(f"{module}: {cls.id}: {e}")
+                        return
+
+                # Other tiles of the library may be hardening the same BEL,
+                # only the first one to link its state.json publishes its views
+                views_path = os.path.join(
+                    cache_path, f"{os.getpid()}.{threading.get_ident()}"
+                )
+                save_state(state, views_path)
+                try:
+                    os.link(
+                        os.path.join(views_path, "state.json"),
+                        os.path.join(cache_path, "state.json"),
+                    )
+                except FileExistsError:
+                    shutil.rmtree(views_path)
+                    state = load_state(cache_path)
+
+            instances = {}
+            for instance in self.get_bel_macro_instances(module):
+                if instance in locations:
+                    instances[instance] = locations[instance]
+                else:
+                    warn(
+                        f"No location for the BEL macro instance {instance} in FABULOUS_BEL_MACRO_LOCATIONS, leaving it to the placer"
+                    )
+                    instances[instance] = {"location": None, "orientation": None}
+
+            macro = {
+                "gds": [state[DesignFormat.GDS]],
+                "lef": [state[DesignFormat.LEF]],
+                "nl": [state[DesignFormat.NETLIST]],
+                "spef": {},
+                "instances": instances,
+            }
+            if state.get(DesignFormat.POWERED_NETLIST) is not None:
+                macro["pnl"] = [state[DesignFormat.POWERED_NETLIST]]
+            if state.get(DesignFormat.LIB) is not None:
+                macro["lib"] = {
+                    corner: lib if isinstance(lib, list) else [lib]
+                    for corner, lib in state[DesignFormat.LIB].items()
+                }
+
+            with lock:
+                macros[module] = macro
+
+        with ThreadPoolExecutor(max_workers=_get_process_limit()) as tpe:
+            futures = [
+                tpe.submit(harden_bel, module, bel_config)
+                for module, bel_config in self.config["FABULOUS_BEL_MACROS"].items()
+                if module in modules
+            ]
+            for future in futures:
+                future.result()
+
+        if failures:
+            for failure in failures:
+                err(failure)
+            raise FlowError(f"{len(failures)} BEL macro(s) failed to harden.")
+
+        # The macros are black boxes for the tile
+        hard_sources = [
+            bel_src for bel_src, module in self.bel_modules.items() if module in macros
+        ]
+        self.bel_modules = {
+            bel_src: module
+            for bel_src, module in self.bel_modules.items()
+            if module not in macros
+        }
+
+        info(f"Placing {len(macros)} BEL macro(s) inside the tile: {list(macros)}")
+        self.config = self.config.copy(
+            VERILOG_FILES=[
+                file
+                for file in self.config["VERILOG_FILES"]
+                if os.path.abspath(file) not in hard_sources
+            ],
+            MACROS={**(self.config["MACROS"] or {}), **macros},
+        )
+
+        return step_list
+
+    def get_bel_fingerprint(self, bel_src: str, module: str) -> str:
+        """
+        Returns a fingerprint of everything the synthesis of a single BEL
+        depends on: its source, the shared sources, the PDK and the
+        synthesis configuration.
+        """
+        names = {variable.name for variable in Yosys.Synthesis.config_vars}
+        names -= {"DESIGN_NAME", "VERILOG_FILES", "SYNTH_HIERARCHY_MODE"}
+        names |= {"PDK", "STD_CELL_LIBRARY", "LIB"}
+
+        fingerprint = hashlib.sha256()
+        fingerprint.update(module.encode())
+        update_fingerprint(
+            fingerprint, self.shared_verilog_files + [bel_src], contents=True
+        )
+        for name in sorted(names):
+            fingerprint.update(name.encode())
+            update_fingerprint(fingerprint, self.config.get(name))
+
+        return fingerprint.hexdigest()
+
+    def link_bel_netlists(self) -> List[Step]:
+        """
+        Looks up the netlist of each BEL of the tile in the BEL cache of the
+        tile library and synthesizes the missing ones on their own. The
+        netlists are linked into the synthesis of the tile with
+        ``FABULOUS_BEL_NETLISTS``.
+
+        Returns the steps that were run.
+        """
+        cache_dir = os.path.join(
+            os.path.dirname(os.path.abspath(self.config["FABULOUS_TILE_DIR"])),
+            ".cache",
+            "bels",
+        )
+
+        step_list: List[Step] = []
+        failures: List[str] = []
+        netlists: Dict[str, Path] = {}
+        lock = threading.Lock()
+
+        def link_bel(bel_src: str, module: str):
+            fingerprint = self.get_bel_fingerprint(bel_src, module)
+            netlist = os.path.join(cache_dir, fingerprint, f"{module}.nl.v")
+
+            if os.path.isfile(netlist):
+                info(f"Using the cached netlist of {module} ({fingerprint[:12]})")
+            else:
+                info(f"Synthesizing {module} for the BEL cache ({fingerprint[:12]})")
+
+                config = self.config.copy(
+                    DESIGN_NAME=module,
+                    VERILOG_FILES=self.shared_verilog_files + [bel_src],
+                    # Only the BEL module is linked into the tile
+                    SYNTH_HIERARCHY_MODE="flatten",
+                )
+                step = Yosys.Synthesis(
+                    config=config,
+                    state_in=State(),
+                    id=f"{Yosys.Synthesis.id}-{module}",
+                    flow=self,
+                )
+                with lock:
+                    step_list.append(step)
+
+                try:
+                    state = self.start_step(step)
+                except StepError as e:
+                    with lock:
+                        failures.append(f"{module}: {e}")
+                    return
+
+                # Other tiles of the library may be linking the same BEL
+                mkdirp(os.path.dirname(netlist))
+                tmp = f"{netlist}.{os.getpid()}.{threading.get_ident()}.tmp"
+                shutil.copyfile(state[DesignFormat.NETLIST], tmp)
+                os.replace(tmp, netlist)
+
+            with lock:
+                netlists[bel_src] = Path(netlist)
+
+        with ThreadPoolExecutor(max_workers=_get_process_limit()) as tpe:
+            futures = [
+                tpe.submit(link_bel, bel_src, module)
+                for bel_src, module in self.bel_modules.items()
+            ]
+            for future in futures:
+                future.result()
+
+        if failures:
+            for failure in failures:
+                err(failure)
+            raise FlowError(f"{len(failures)} BEL(s) failed to synthesize.")
+
+        info(f"Linking {len(netlists)} pre-synthesized BEL netlist(s)")
+        self.config = self.config.copy(FABULOUS_BEL_NETLISTS=netlists)
+
+        return step_list
+
+    def run(
+        self,
+        initial_state: State,
+        **kwargs,
+    ) -> Tuple[State, List[Step]]:
+        initial_state = self.prepare(initial_state)
+
+        step_list: List[Step] = []
+        if self.config["FABULOUS_BEL_MACROS"]:
+            step_list += self.harden_bel_macros()
+        if self.config["FABULOUS_BEL_CACHE"]:
+            step_list += self.link_bel_netlists()
+
+        # Resume from the cached state before the I/O placement
+        # if only the pin placement has changed
+        cache_path = None
+        if self.config["FABULOUS_SYNTH_CACHE"] and kwargs.get("frm") is None:
+            fingerprint = self.get_synthesis_fingerprint()
+            cache_path = os.path.join(
+                self.config["FABULOUS_TILE_DIR"], ".cache", "synthesis", fingerprint
+            )
+
+            if os.path.isfile(os.path.join(cache_path, "state.json")):
+                info(
+                    f"Synthesis inputs unchanged ({fingerprint[:12]}), resuming from the I/O placement"
+                )
+                initial_state = load_state(cache_path)
+                kwargs["frm"] = FABulousIOPlacement.id
+                cache_path = None
+            else:
+                info(
+                    f"Synthesis inputs changed ({fingerprint[:12]}), running all steps"
+                )
+
         (final_state, steps) = super().run(initial_state, **kwargs)
+        steps = step_list + steps
+
+        if cache_path is not None:
+            for step in steps:
+                if step.id == FABulousIOPlacement.id:
+                    info(f"Caching the state before the I/O placement to {cache_path}")
+                    save_state(step.state_in.result(), cache_path)
+                    break
 
         final_views_path = os.path.abspath(
             os.path.join(self.config["FABULOUS_TILE_DIR"], "macro", self.config["PDK"])
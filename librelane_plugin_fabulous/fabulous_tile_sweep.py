@@ -0,0 +1,306 @@
+import os
+import re
+import json
+import yaml
+import threading
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Optional, Dict, Any
+from librelane.steps import Step, StepError, StepException
+from librelane.flows import Flow, FlowError
+from librelane.state import DesignFormat, State
+from librelane.common.misc import _get_process_limit
+from librelane.config import Variable
+from librelane.logging import (
+    info,
+    success,
+    warn,
+)
+
+from .fabulous_tile import FABulousTile, get_grt_congestion, is_gated
+
+
+def get_layer_pitch(lef_file: str, layer: str) -> Optional[Decimal]:
+    """
+    Returns the routing pitch of a layer in a tech LEF file.
+    """
+    in_layer = False
+    with open(lef_file, "r") as f:
+        for line in f:
+            tokens = line.split()
+            if len(tokens) >= 2 and tokens[0] == "LAYER":
+                in_layer = tokens[1] == layer
+            elif in_layer and len(tokens) >= 2 and tokens[0] == "PITCH":
+                return Decimal(tokens[1])
+            elif in_layer and tokens[:2] == ["END", layer]:
+                in_layer = False
+    return None
+
+
+def get_pin_demand(pin_file: str, json_header: str, design: str) -> Dict[str, int]:
+    """
+    Returns the number of pins on each side of the tile, by matching the ports
+    of the design against the regexes of the pin order configuration.
+    """
+    with open(json_header, "r") as f:
+        ports = json.load(f)["modules"][design]["ports"]
+
+    pin_names = []
+    for name, port in ports.items():
+        if len(port["bits"]) == 1:
+            pin_names.append(name)
+        else:
+            offset = port.get("offset", 0)
+            pin_names.extend(f"{name}[{offset + i}]" for i in range(len(port["bits"])))
+
+    with open(pin_file, "r") as f:
+        pins_dict = yaml.safe_load(f)
+
+    demand = {}
+    for side in ["N", "E", "S", "W"]:
+        regexes = [
+            re.compile(f"^{pin}$")
+            for group in pins_dict.get(side, [])
+            for pin in group["pins"]
+        ]
+        demand[side] = len(
+            [name for name in pin_names if any(rx.match(name) for rx in regexes)]
+        )
+
+    return demand
+
+
+@Flow.factory.register()
+class FABulousTileSizeSweep(FABulousTile):
+    """
+    Finds the smallest die area at which a FABulous tile routes.
+
+    The tile is synthesized once, then floorplanning, placement and global
+    routing are run for every candidate size in parallel. Candidates that
+    can't fit the pins of the tile are pruned up front. As congestion only
+    gets worse for smaller tiles, candidates that are smaller than a
+    congested one or larger than a routable one are skipped.
+    """
+
+    config_vars = FABulousTile.config_vars + [
+        Variable(
+            "FABULOUS_SWEEP_WIDTHS",
+            List[Decimal],
+            """
+            The candidate widths of the tile.
+            """,
+            units="µm",
+        ),
+        Variable(
+            "FABULOUS_SWEEP_HEIGHTS",
+            List[Decimal],
+            """
+            The candidate heights of the tile.
+            """,
+            units="µm",
+        ),
+        Variable(
+            "FABULOUS_SWEEP_JOBS",
+            Optional[int],
+            """
+            The maximum number of candidates to run in parallel. If unset, this will be equal to your machine's thread count.
+            """,
+        ),
+        Variable(
+            "FABULOUS_SWEEP_OVERFLOW_ITERS",
+            int,
+            """
+            The number of global routing iterations for each candidate. Candidates with overflow after these iterations count as congested.
+            """,
+            default=10,
+        ),
+    ]
+
+    def run(
+        self,
+        initial_state: State,
+        **kwargs,
+    ) -> Tuple[State, List[Step]]:
+        step_list: List[Step] = []
+
+        initial_state = self.prepare(initial_state)
+
+        step_ids = [cls.id for cls in self.Steps]
+        floorplan = step_ids.index("OpenROAD.Floorplan")
+        global_routing = step_ids.index("OpenROAD.FABulousGlobalRouting")
+
+        # Everything before the floorplan is the same for all candidates
+        synthesized_state = initial_state
+        for cls in self.Steps[:floorplan]:
+            if is_gated(type(self), self.config, cls.id):
+                continue
+            step = cls(config=self.config, state_in=synthesized_state, flow=self)
+            step_list.append(step)
+            try:
+                synthesized_state = self.start_step(step)
+            except (StepError, StepException) as e:
+                raise FlowError(str(e)) from None
+
+        # Prune the candidates that can't fit the pins
+        pin_demand = None
+        if json_header := synthesized_state.get(DesignFormat.JSON_HEADER):
+            pin_demand = get_pin_demand(
+                str(self.config["IO_PIN_ORDER_CFG"]),
+                str(json_header),
+                self.config["DESIGN_NAME"],
+            )
+            info(f"Pin demand per side: {pin_demand}")
+        else:
+            warn("No JSON header available, not pruning by pin demand")
+
+        tech_lef = self.toolbox.filter_views(self.config, self.config["TECH_LEFS"])[0]
+        v_pitch = get_layer_pitch(str(tech_lef), self.config["IO_PIN_V_LAYER"])
+        h_pitch = get_layer_pitch(str(tech_lef), self.config["IO_PIN_H_LAYER"])
+
+        candidates = sorted(
+            [
+                (width, height)
+                for width in self.config["FABULOUS_SWEEP_WIDTHS"]
+                for height in self.config["FABULOUS_SWEEP_HEIGHTS"]
+            ],
+            key=lambda size: (size[0] * size[1], size[0]),
+        )
+
+        results: Dict[Tuple[Decimal, Decimal], Dict[str, Any]] = {}
+        states: Dict[Tuple[Decimal, Decimal], State] = {}
+        lock = threading.Lock()
+
+        for width, height in candidates:
+            results[(width, height)] = {
+                "width": float(width),
+                "height": float(height),
+                "status": "pending",
+            }
+
+            if pin_demand is None:
+                continue
+
+            if v_pitch and max(pin_demand["N"], pin_demand["S"]) * v_pitch > width:
+                results[(width, height)]["status"] = "pruned"
+                results[(width, height)][
+                    "reason"
+                ] = "not enough tracks for the N/S pins"
+            elif h_pitch and max(pin_demand["E"], pin_demand["W"]) * h_pitch > height:
+                results[(width, height)]["status"] = "pruned"
+                results[(width, height)][
+                    "reason"
+                ] = "not enough tracks for the E/W pins"
+
+        def get_skip_reason(width: Decimal, height: Decimal) -> Optional[str]:
+            for (other_width, other_height), result in results.items():
+                if (
+                    result["status"] == "routable"
+                    and other_width * other_height < width * height
+                ):
+                    return f"{other_width}x{other_height} is smaller and routable"
+                if (
+                    result["status"] == "congested"
+                    and other_width >= width
+                    and other_height >= height
+                ):
+                    return f"{other_width}x{other_height} is larger and congested"
+            return None
+
+        def run_candidate(width: Decimal, height: Decimal):
+            result = results[(width, height)]
+            name = f"{width}x{height}"
+
+            config = self.config.copy(
+                FP_SIZING="absolute",
+                DIE_AREA=(Decimal(0), Decimal(0), width, height),
+                GRT_ALLOW_CONGESTION=True,
+                GRT_OVERFLOW_ITERS=self.config["FABULOUS_SWEEP_OVERFLOW_ITERS"],
+                # The candidates must not overwrite the abstract of the tile
+                FABULOUS_PRELIMINARY_ABSTRACT=False,
+            )
+
+            state = synthesized_state
+            grt_step = None
+            for cls in self.Steps[floorplan : global_routing + 1]:
+                # Stop early if the result of this candidate doesn't matter anymore
+                with lock:
+                    if reason := get_skip_reason(width, height):
+                        result["status"] = "skipped"
+                        result["reason"] = reason
+                        return
+
+                if is_gated(type(self), self.config, cls.id):
+                    continue
+
+                step = cls(
+                    config=config,
+                    state_in=state,
+                    id=f"{cls.id}-{name}",
+                    flow=self,
+                )
+                with lock:
+                    step_list.append(step)
+                if cls.id == "OpenROAD.FABulousGlobalRouting":
+                    grt_step = step
+
+                try:
+                    state = self.start_step(step)
+                except (StepError, StepException) as e:
+                    with lock:
+                        result["status"] = "failed"
+                        result["reason"] = f"{cls.id}: {e}"
+                    return
+
+            congestion = None
+            if grt_step is not None:
+                congestion = get_grt_congestion(grt_step.get_log_path())
+            with lock:
+                if congestion is None:
+                    result["status"] = "failed"
+                    result["reason"] = "no congestion report found"
+                    return
+
+                result["congestion"] = congestion
+                if congestion["total"]["overflow"] > 0:
+                    result["status"] = "congested"
+                else:
+                    result["status"] = "routable"
+                    states[(width, height)] = state
+
+        with ThreadPoolExecutor(
+            max_workers=self.config["FABULOUS_SWEEP_JOBS"] or _get_process_limit()
+        ) as tpe:
+            futures = [
+                tpe.submit(run_candidate, width, height)
+                for (width, height) in candidates
+                if results[(width, height)]["status"] == "pending"
+            ]
+            for future in futures:
+                future.result()
+
+        # Report
+        report_path = os.path.join(self.run_dir, "tile_size_sweep.json")
+        with open(report_path, "w") as f:
+            json.dump(list(results.values()), f, indent=4)
+
+        info("Tile size sweep summary:")
+        for (width, height), result in results.items():
+            summary = f"{width}x{height}: {result['status']}"
+            if congestion := result.get("congestion"):
+                summary += f" (usage {congestion['total']['usage']}%, overflow {congestion['total']['overflow']})"
+            if reason := result.get("reason"):
+                summary += f" ({reason})"
+            info(summary)
+
+        info(f"Wrote the sweep report to {report_path}")
+
+        routable = [size for size in candidates if size in states]
+        if not routable:
+            raise FlowError("None of the candidate tile sizes is routable.")
+
+        (width, height) = routable[0]
+        success(
+            f"Smallest routable tile size: {width}x{height}, set DIE_AREA to [0, 0, {width}, {height}]"
+        )
+
+        return (states[(width, height)], step_list)
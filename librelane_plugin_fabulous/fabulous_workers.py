@@ -0,0 +1,405 @@
+import os
+import re
+import shutil
+import hashlib
+import tempfile
+import threading
+import contextlib
+import contextvars
+import subprocess
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from fabulous.fabric_cad.timing_model.tools.sta_tools.opensta import OpenStaTool
+from fabulous.fabric_cad.timing_model.tools.synth_tools.yosys import YosysTool
+
+_current_pool: contextvars.ContextVar[Optional["ToolPool"]] = contextvars.ContextVar(
+    "fabulous_tool_pool", default=None
+)
+_current_netlist_cache: contextvars.ContextVar[Optional["NetlistCache"]] = (
+    contextvars.ContextVar("fabulous_netlist_cache", default=None)
+)
+_install_lock = threading.Lock()
+_installed = set()
+
+# Commands that only load the cell libraries, run once when a worker starts
+setup_rx = re.compile(r"^\s*(read_liberty\s.*|yosys\s+-import)\s*$")
+exit_rx = re.compile(r"^\s*exit\s*$")
+
+# OpenSTA can't unload a design, so a worker of OpenSTA only loads the cell
+# libraries and runs every script in a fork of itself, using the fork of TclX
+fork_proc = """\
+package require Tclx
+proc fabulous_fork {script} {
+    flush stdout
+    set pid [fork]
+    if {$pid == 0} {
+        set status [catch {uplevel #0 [list source $script]} result]
+        if {$status == 1} {
+            puts $result
+        }
+        flush stdout
+        exit [expr {$status == 1}]
+    }
+    lassign [wait $pid] _ reason code
+    if {$reason ne "EXIT" || $code != 0} {
+        error "The forked script ended with $reason $code"
+    }
+}"""
+
+
+def split_script(script: str) -> Tuple[List[str], str]:
+    """
+    Splits a Tcl script of a timing model tool into the commands that load
+    the cell libraries and the remaining commands, without ``exit``.
+    """
+    setup = []
+    body = []
+    for line in script.splitlines():
+        if setup_rx.match(line):
+            setup.append(line.strip())
+        elif not exit_rx.match(line):
+            body.append(line)
+    return (setup, "\n".join(body) + "\n")
+
+
+class ToolWorker:
+    """
+    A long-lived Tcl shell of Yosys or OpenSTA. Scripts are written to a file
+    and sourced by the shell, which then prints a marker line with the status,
+    so that any number of scripts can be run over the same pipe.
+    """
+
+    def __init__(self, command: List[str], work_dir: str, name: str):
+        self.command = command
+        self.work_dir = work_dir
+        self.name = name
+        self.queries = 0
+        self.process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        )
+
+    def run(self, script: str) -> Tuple[int, str]:
+        """
+        Runs a script in the shell and returns its status and output. A status
+        of -1 means that the shell exited while running the script.
+        """
+        self.queries += 1
+        marker = f"__fabulous_worker_{self.name}_{self.queries}__"
+
+        script_path = os.path.join(self.work_dir, f"{self.name}.tcl")
+        with open(script_path, "w") as f:
+            f.write(script)
+
+        try:
+            self.process.stdin.write(
+                f"set fabulous_status [catch {{source {{{script_path}}}}} fabulous_result]\n"
+                f'puts "{marker} $fabulous_status [string map [list \\n {{ }}] $fabulous_result]"\n'
+                "flush stdout\n"
+            )
+            self.process.stdin.flush()
+        except BrokenPipeError:
+            return (-1, "")
+
+        output = []
+        for line in self.process.stdout:
+            if line.startswith(marker):
+                (status, _, message) = line[len(marker) :].strip().partition(" ")
+                if status != "0":
+                    output.append(message + "\n")
+                break
+            output.append(line)
+        else:
+            return (-1, "".join(output))
+
+        with open(os.path.join(self.work_dir, f"{self.name}.log"), "a") as f:
+            f.writelines(output)
+
+        return (int(status), "".join(output))
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write("exit\n")
+                self.process.stdin.close()
+                self.process.wait(timeout=10)
+            except (BrokenPipeError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+
+
+class ToolPool:
+    """
+    A pool of long-lived Yosys and OpenSTA shells for the FABulous timing
+    model. Each worker is started for a command and a set of cell libraries,
+    i.e. a corner, and loads the libraries once. The scripts of the timing
+    model are then run on an idle worker of the same corner, or on a new one if
+    all are busy, instead of starting the tool and parsing the libraries every
+    time. No state is left behind by the previous tile: Yosys goes back to a
+    design with only the libraries before each script, and OpenSTA runs each
+    script in a fork of the worker. Commands whose worker can't be set up,
+    e.g. OpenSTA without TclX, are started for every script as before.
+    """
+
+    def __init__(self, work_dir: str):
+        self.work_dir = work_dir
+        self.idle: Dict[Tuple[Tuple[str, ...], Tuple[str, ...]], List[ToolWorker]] = {}
+        self.workers: List[ToolWorker] = []
+        self.unsupported: Set[Tuple[str, ...]] = set()
+        self.lock = threading.Lock()
+        self.queries = 0
+
+    def __enter__(self) -> "ToolPool":
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def acquire(self, command: List[str], setup: List[str]) -> Optional[ToolWorker]:
+        key = (tuple(command), tuple(setup))
+        with self.lock:
+            if tuple(command) in self.unsupported:
+                return None
+            if self.idle.get(key):
+                return self.idle[key].pop()
+            name = f"{os.path.basename(command[0])}_{len(self.workers)}"
+            os.makedirs(self.work_dir, exist_ok=True)
+            worker = ToolWorker(command, self.work_dir, name)
+            self.workers.append(worker)
+
+        (status, _) = worker.run("\n".join(setup) + "\n")
+        if status != 0:
+            self.discard(worker)
+            with self.lock:
+                self.unsupported.add(tuple(command))
+            return None
+        return worker
+
+    def release(self, worker: ToolWorker, setup: List[str]):
+        key = (tuple(worker.command), tuple(setup))
+        with self.lock:
+            self.idle.setdefault(key, []).append(worker)
+
+    def discard(self, worker: ToolWorker):
+        worker.close()
+        with self.lock:
+            for workers in self.idle.values():
+                if worker in workers:
+                    workers.remove(worker)
+
+    def call(self, command: List[str], script: str) -> subprocess.CompletedProcess:
+        """
+        Runs a script that would otherwise be piped into a new process of
+        ``command``. If the script fails on a worker, the worker is discarded
+        and the script is run again in a new process.
+        """
+        (setup, body) = split_script(script)
+
+        fork = False
+        if any(line.startswith("yosys") for line in setup):
+            setup = setup + ["design -save fabulous_libraries"]
+            body = "design -load fabulous_libraries\n" + body
+        elif len(setup) != 0:
+            setup = [fork_proc, *setup]
+            fork = True
+        else:
+            return subprocess.run(command, input=script, text=True, capture_output=True)
+
+        with self.lock:
+            self.queries += 1
+
+        worker = self.acquire(command, setup)
+        if worker is not None:
+            if fork:
+                query_path = os.path.join(self.work_dir, f"{worker.name}.query.tcl")
+                with open(query_path, "w") as f:
+                    f.write(body)
+                body = f"fabulous_fork {{{query_path}}}\n"
+            (status, output) = worker.run(body)
+            if status == 0:
+                self.release(worker, setup)
+                return subprocess.CompletedProcess(command, 0, stdout=output, stderr="")
+            self.discard(worker)
+
+        # Run the script as the timing model would, to tell errors in the
+        # script apart from state left behind by the previous scripts
+        return subprocess.run(command, input=script, text=True, capture_output=True)
+
+    def close(self):
+        with self.lock:
+            workers = self.workers
+            self.workers = []
+            self.idle = {}
+        for worker in workers:
+            worker.close()
+
+
+class NetlistCache:
+    """
+    A cache of the netlists that the timing model synthesizes from the RTL of
+    the tiles. A netlist is stored by a fingerprint of everything its Yosys
+    script depends on: the contents of the Verilog, liberty and techmap files
+    in order, the top module and the cells of the script. Tiles whose RTL is
+    unchanged, and the subtiles of a supertile, are then only synthesized once.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.digests: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_digest(self, file: str) -> str:
+        file = os.path.abspath(file)
+        with self.lock:
+            if digest := self.digests.get(file):
+                return digest
+
+        digest = hashlib.sha256()
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+
+        with self.lock:
+            self.digests[file] = digest.hexdigest()
+        return self.digests[file]
+
+    def get_fingerprint(self, tool: YosysTool) -> str:
+        fingerprint = hashlib.sha256()
+        for name in [
+            "top_name",
+            "flat",
+            "tiehi_cell_and_port",
+            "tielo_cell_and_port",
+            "min_buf_cell_and_ports",
+        ]:
+            fingerprint.update(f"{name}={getattr(tool, name)!r}\n".encode())
+        for name in ["verilog_files", "lib_files", "techmap_files"]:
+            files = getattr(tool, name) or []
+            if not isinstance(files, list):
+                files = [files]
+            fingerprint.update(f"{name}={len(files)}\n".encode())
+            for file in files:
+                fingerprint.update(self.get_digest(str(file)).encode())
+        return fingerprint.hexdigest()
+
+    def synthesize(self, tool: YosysTool, synthesize):
+        """
+        Points the tool to a copy of the cached netlist, as the timing model
+        deletes it after use, or synthesizes and caches the netlist.
+        """
+        try:
+            fingerprint = self.get_fingerprint(tool)
+        except OSError:
+            # Let the synthesis report the missing file
+            return synthesize(tool)
+        netlist = os.path.join(self.cache_dir, fingerprint, f"{tool.top_name}.nl.v")
+
+        if os.path.isfile(netlist):
+            with self.lock:
+                self.hits += 1
+            (fd, path) = tempfile.mkstemp(suffix=".nl.v")
+            os.close(fd)
+            shutil.copyfile(netlist, path)
+            tool.netlist_path = Path(path)
+            return
+
+        with self.lock:
+            self.misses += 1
+        synthesize(tool)
+
+        # Other corners or fabrics may be caching the same netlist
+        os.makedirs(os.path.dirname(netlist), exist_ok=True)
+        tmp = f"{netlist}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(tool.netlist_path, tmp)
+        os.replace(tmp, netlist)
+
+
+def _install_pool_hooks():
+    # The tools of the timing model are created deep inside FABulous, so their
+    # calls are redirected to the current pool. The methods are only replaced
+    # once a pool is used.
+    with _install_lock:
+        if "pool" in _installed:
+            return
+
+        for tool in [YosysTool, OpenStaTool]:
+
+            def call_external(
+                self,
+                executable,
+                args=None,
+                stdin_data="",
+                debug=False,
+                _original=tool._call_external,
+            ):
+                pool = _current_pool.get()
+                if pool is None:
+                    return _original(self, executable, args, stdin_data, debug)
+
+                command = [str(executable), *(args or [])]
+                result = pool.call(command, stdin_data)
+                if result.returncode != 0:
+                    raise RuntimeError(
+                        f"Command '{' '.join(command)}' failed with error: {result.stderr}"
+                    )
+                return result
+
+            tool._call_external = call_external
+
+        _installed.add("pool")
+
+
+def _install_cache_hooks():
+    with _install_lock:
+        if "cache" in _installed:
+            return
+
+        def synth_synthesize(self, _original=YosysTool.synth_synthesize):
+            cache = _current_netlist_cache.get()
+            if cache is None or self.is_gate_level:
+                return _original(self)
+            return cache.synthesize(self, _original)
+
+        YosysTool.synth_synthesize = synth_synthesize
+
+        _installed.add("cache")
+
+
+@contextlib.contextmanager
+def use_pool(pool: Optional[ToolPool]) -> Iterator[Optional[ToolPool]]:
+    """
+    Runs the Yosys and OpenSTA scripts of the FABulous timing model on the
+    workers of the pool in the calling thread. Without a pool, the tools are
+    started for every script as usual.
+    """
+    if pool is not None:
+        _install_pool_hooks()
+    token = _current_pool.set(pool)
+    try:
+        yield pool
+    finally:
+        _current_pool.reset(token)
+
+
+@contextlib.contextmanager
+def use_netlist_cache(
+    cache: Optional[NetlistCache],
+) -> Iterator[Optional[NetlistCache]]:
+    """
+    Looks up the netlists that the FABulous timing model synthesizes in the
+    calling thread in the cache. Without a cache, Yosys is run for every tile.
+    """
+    if cache is not None:
+        _install_cache_hooks()
+    token = _current_netlist_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _current_netlist_cache.reset(token)
@@ -0,0 +1,215 @@
+#
+# KLayout script for boundary-window DRC of FABulous fabrics
+# The tiles have already passed DRC on their own, so only
+# small windows around the seams, corners, halo and top-level
+# shapes are clipped out of the fabric and checked again
+#
+# Copyright (c) 2026 Leo Moser <leo.moser@pm.me>
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import json
+import click
+import hashlib
+import klayout.db as kdb
+from klayout.rdb import ReportDatabase
+
+
+def get_toplevel_boxes(layout, top_cell, tile_box, margin):
+    """
+    Returns the boxes of a tile where the top-level shapes on top of it can
+    cause violations: around the ends of straps, vias and pins, i.e. the short
+    edges of the top-level shapes, and around the tile shapes on the same
+    layer that are near the top-level shapes without being covered by them.
+    The rest of a strap is not checked again, as the tile underneath is
+    already DRC clean. Edges on the tile boundary are left to the seam
+    windows.
+    """
+    tile_region = kdb.Region(tile_box)
+    tile_edges = tile_region.edges()
+
+    boxes = kdb.Region()
+    for layer_index in layout.layer_indexes():
+        toplevel = kdb.Region()
+        for shape in top_cell.shapes(layer_index).each_touching(tile_box):
+            if shape.polygon is not None:
+                toplevel.insert(shape.polygon)
+        toplevel = (toplevel & tile_region).merged()
+        if toplevel.is_empty():
+            continue
+
+        ends = toplevel.edges().with_length(0, 2 * margin, False) - tile_edges
+        for edge in ends.each():
+            boxes.insert(edge.bbox().enlarged(margin, margin))
+
+        # Only the tile shapes, not the top-level ones
+        nearby = toplevel.sized(margin)
+        shapes = kdb.RecursiveShapeIterator(layout, top_cell, layer_index, nearby)
+        shapes.min_depth = 1
+        interactions = (kdb.Region(shapes) - toplevel) & nearby & tile_region
+        for polygon in interactions.merged().each():
+            boxes.insert(polygon.bbox().enlarged(margin, margin))
+
+    return [polygon.bbox() & tile_box for polygon in boxes.merged().each()]
+
+
+def get_signature(layout, top_cell, kind, clip_box):
+    """
+    Returns a hash of everything that clipping clip_box out of the top cell
+    depends on, relative to clip_box: the instances touching it and the
+    top-level shapes inside it.
+    """
+    to_origin = kdb.Trans(-clip_box.left, -clip_box.bottom)
+    clip_region = kdb.Region(clip_box)
+
+    items = [kind, str(clip_box.transformed(to_origin))]
+    for instance in top_cell.each_touching_inst(clip_box):
+        array = instance.cell_inst.transformed(to_origin)
+        items.append(f"instance {layout.cell(instance.cell_index).name} {array}")
+
+    for layer_index in layout.layer_indexes():
+        layer = str(layout.get_info(layer_index))
+        region = kdb.Region()
+        for shape in top_cell.shapes(layer_index).each_touching(clip_box):
+            if shape.is_text():
+                text = shape.text.transformed(to_origin)
+                items.append(f"text {layer} {text}")
+            elif shape.polygon is not None:
+                region.insert(shape.polygon)
+        region = (region & clip_region).merged().transformed(to_origin)
+        items.extend(f"shape {layer} {polygon}" for polygon in region.each())
+
+    return hashlib.sha256("\n".join(sorted(items)).encode("utf8")).hexdigest()
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.option("--input", "input_gds", required=True, help="The fabric GDS.")
+@click.option("--top", required=True, help="The top cell of the fabric.")
+@click.option("--windows", required=True, help="JSON file with the windows.")
+@click.option("--output-dir", required=True, help="Directory for the clips.")
+def clip(input_gds, top, windows, output_dir):
+    layout = kdb.Layout()
+    layout.read(input_gds)
+    top_cell = layout.cell(top)
+
+    if top_cell is None:
+        raise click.ClickException(f"Could not find top cell {top} in {input_gds}")
+
+    with open(windows, "r") as f:
+        windows = json.load(f)
+
+    dbu = layout.dbu
+
+    # Windows around the top-level shapes are only known
+    # after reading the layout, they are expanded here
+    expanded = []
+    for window in windows:
+        if window["kind"] != "toplevel":
+            expanded.append(window)
+            continue
+
+        (x0, y0, x1, y1) = window["box"]
+        tile_box = kdb.Box(
+            int(round(x0 / dbu)),
+            int(round(y0 / dbu)),
+            int(round(x1 / dbu)),
+            int(round(y1 / dbu)),
+        )
+        margin = int(round(window["margin"] / dbu))
+
+        boxes = get_toplevel_boxes(layout, top_cell, tile_box, margin)
+        for i, box in enumerate(boxes):
+            expanded.append(
+                {
+                    **window,
+                    "id": f"{window['id']}_{i}",
+                    "box": [
+                        box.left * dbu,
+                        box.bottom * dbu,
+                        box.right * dbu,
+                        box.top * dbu,
+                    ],
+                }
+            )
+
+    # The halo and top-level windows are made for every tile instance, as
+    # the top-level shapes differ between them. Windows that clip the same
+    # layout are only checked once.
+    unique = {}
+    for window in expanded:
+        (x0, y0, x1, y1) = window["box"]
+        context = window["context"]
+        clip_box = kdb.Box(
+            int(round((x0 - context) / dbu)),
+            int(round((y0 - context) / dbu)),
+            int(round((x1 + context) / dbu)),
+            int(round((y1 + context) / dbu)),
+        )
+        key = window["id"]
+        if window["kind"] in ["halo", "toplevel"]:
+            key = get_signature(layout, top_cell, window["kind"], clip_box)
+        if key in unique:
+            unique[key]["weight"] += window["weight"]
+        else:
+            unique[key] = dict(window)
+    expanded = list(unique.values())
+
+    print(f"Clipping {len(expanded)} windows")
+
+    for window in expanded:
+        (x0, y0, x1, y1) = window["box"]
+        context = window["context"]
+
+        clip_box = kdb.DBox(x0 - context, y0 - context, x1 + context, y1 + context)
+        clip_cell_index = layout.clip(top_cell.cell_index(), clip_box)
+        clip_cell = layout.cell(clip_cell_index)
+        clip_cell.name = window["id"]
+
+        options = kdb.SaveLayoutOptions()
+        options.select_cell(clip_cell_index)
+        layout.write(f"{output_dir}/{window['id']}.gds", options)
+
+    with open(f"{output_dir}/windows.json", "w") as f:
+        json.dump(expanded, f, indent=4)
+
+
+@cli.command()
+@click.option("--report", required=True, help="The lyrdb report of the window.")
+@click.option("--window", "window_box", required=True, nargs=4, type=float)
+def count(report, window_box):
+    database = ReportDatabase("Database")
+    database.load(report)
+
+    # Only count violations inside the window itself,
+    # everything in the context ring around it may be
+    # caused by the clipping
+    window_box = kdb.DBox(*window_box)
+
+    total = 0
+    for item in database.each_item():
+        for value in item.each_value():
+            if value.is_box():
+                bbox = value.box()
+            elif value.is_polygon():
+                bbox = value.polygon().bbox()
+            elif value.is_edge_pair():
+                bbox = value.edge_pair().bbox()
+            elif value.is_edge():
+                bbox = value.edge().bbox()
+            else:
+                continue
+
+            if bbox.overlaps(window_box) or window_box.contains(bbox.center()):
+                total += 1
+                break
+
+    print(f"%OL_METRIC_I klayout__drc_error__count {total}")
+
+
+if __name__ == "__main__":
+    cli()
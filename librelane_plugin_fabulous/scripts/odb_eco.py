@@ -0,0 +1,67 @@
+#
+# OpenDB script for tile ECOs of a FABulous fabric
+# This script swaps the instances of the updated tiles
+# to the masters of their updated LEF, so that the layout
+# of the previous run refers to the new abstracts
+#
+# SPDX-License-Identifier: Apache-2.0
+#
+
+import os
+import sys
+import odb
+import click
+import shutil
+import tempfile
+from reader import click_odb
+
+
+@click.command()
+@click.option(
+    "--eco-lef",
+    "eco_lefs",
+    type=(str, click.Path(exists=True, dir_okay=False)),
+    multiple=True,
+    help="An updated tile and its LEF file",
+)
+@click_odb
+def eco(
+    eco_lefs,
+    reader,
+):
+    block = reader.db.getChip().getBlock()
+
+    for macro, lef in eco_lefs:
+
+        # The library of the previous LEF already has a master with this
+        # name, so the updated LEF is read into a library of its own
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            eco_lef = os.path.join(tmp_dir, f"{macro}_eco.lef")
+            shutil.copyfile(lef, eco_lef)
+            lib = odb.read_lef(reader.db, eco_lef)
+
+        master = lib.findMaster(macro) if lib is not None else None
+        if master is None:
+            print(
+                f"[ERROR] Could not find the macro {macro} in {lef}.",
+                file=sys.stderr,
+            )
+            sys.exit(1)
+
+        swapped = 0
+        for instance in block.getInsts():
+            if instance.getMaster().getName() != macro:
+                continue
+            if not instance.swapMaster(master):
+                print(
+                    f"[ERROR] Could not swap {instance.getName()} to the updated {macro}, are the pins unchanged?",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            swapped += 1
+
+        print(f"Swapped {swapped} instance(s) of {macro} to {lef}")
+
+
+if __name__ == "__main__":
+    eco()
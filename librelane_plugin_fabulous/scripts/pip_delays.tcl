@@ -0,0 +1,121 @@
+# Copyright (c) 2026 Leo Moser <leo.moser@pm.me>
+# SPDX-License-Identifier: Apache-2.0
+#
+# OpenSTA script to characterize the pips of a hardened FABulous tile
+# For every pip the worst delay from the source wire to the
+# destination wire is measured and written to a CSV table
+# This script supports one corner per process
+source $::env(SCRIPTS_DIR)/openroad/common/io.tcl
+
+set_cmd_units\
+    -time ns\
+    -capacitance pF\
+    -current mA\
+    -voltage V\
+    -resistance kOhm\
+    -distance um
+
+read_timing_info
+read_spefs
+
+# Wires of the switch matrix are usually buses in the tile,
+# e.g. N1END0 is connected to N1END[0]
+proc find_pip_net {prefixes name} {
+    set candidates [list $name]
+    if { [regexp {^(.*[^0-9])([0-9]+)$} $name -> base index] } {
+        lappend candidates "${base}\[${index}\]"
+    }
+    foreach prefix $prefixes {
+        foreach candidate $candidates {
+            set nets [get_nets -quiet "${prefix}${candidate}"]
+            if { [llength $nets] == 1 } {
+                return $nets
+            }
+        }
+    }
+    return ""
+}
+
+proc net_pin_names {net} {
+    set names [list [get_full_name $net]]
+    foreach pin [get_pins -quiet -of_objects $net] {
+        lappend names [get_full_name $pin]
+    }
+    return $names
+}
+
+# The arrival at the last pin of a net along the path,
+# so that the wire delay of the net is included
+proc net_arrival {points names} {
+    set arrival ""
+    foreach point $points {
+        set pin_name [get_full_name [get_property $point pin]]
+        if { [lsearch -exact $names $pin_name] != -1 } {
+            set arrival [get_property $point arrival]
+        }
+    }
+    return $arrival
+}
+
+proc pip_delay {src_net dst_net} {
+    set path_ends [find_timing_paths\
+        -path_delay max\
+        -unconstrained\
+        -through $src_net\
+        -through $dst_net\
+        -group_path_count 1]
+
+    if { [llength $path_ends] == 0 } {
+        return ""
+    }
+
+    set points [get_property [lindex $path_ends 0] points]
+    set src_arrival [net_arrival $points [net_pin_names $src_net]]
+    set dst_arrival [net_arrival $points [net_pin_names $dst_net]]
+
+    if { $src_arrival == "" || $dst_arrival == "" } {
+        return ""
+    }
+
+    return [format "%.4f" [expr {$dst_arrival - $src_arrival}]]
+}
+
+set pip_list [open $::env(FABULOUS_PIP_LIST) r]
+set pip_table [open $::env(_FABULOUS_PIP_DELAYS_OUT) w]
+
+puts $pip_table "tile,source,destination,delay"
+
+set pip_count 0
+set unresolved_count 0
+
+while { [gets $pip_list line] >= 0 } {
+    if { $line == "" || [string index $line 0] == "#" } {
+        continue
+    }
+
+    lassign [split $line ","] tile prefixes src dst
+
+    if { $prefixes == "" } {
+        set prefixes [list ""]
+    }
+
+    set delay ""
+    set src_net [find_pip_net $prefixes $src]
+    set dst_net [find_pip_net $prefixes $dst]
+
+    if { $src_net != "" && $dst_net != "" } {
+        set delay [pip_delay $src_net $dst_net]
+    }
+
+    if { $delay == "" } {
+        incr unresolved_count
+    }
+
+    puts $pip_table "$tile,$src,$dst,$delay"
+    incr pip_count
+}
+
+close $pip_list
+close $pip_table
+
+puts "Characterized [expr {$pip_count - $unresolved_count}] of $pip_count pips."
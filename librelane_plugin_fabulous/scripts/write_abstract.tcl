@@ -0,0 +1,6 @@
+source $::env(SCRIPTS_DIR)/openroad/common/io.tcl
+read_current_odb
+
+# Nothing is routed yet, so all layers used inside
+# the tile so far are blocked completely
+write_abstract_lef -bloat_occupied_layers $::env(_FABULOUS_ABSTRACT_LEF)
@@ -0,0 +1,160 @@
+import numpy as np
+import pytest
+
+from librelane_plugin_fabulous.fabulous_bitstream import (
+    SYNC_HEADER,
+    BitstreamIndex,
+    parse_fasm_value,
+    read_fasm,
+)
+
+
+def make_spec():
+    # Two columns of two rows, X1Y0 isn't configured
+    return {
+        "ArchSpecs": {"MaxFramesPerCol": 2, "FrameBitsPerRow": 8},
+        "TileMap": {
+            "X0Y0": "LUT",
+            "X1Y0": "NULL",
+            "X0Y1": "LUT",
+            "X1Y1": "LUT",
+        },
+        "FrameMap": {"LUT": {0: 8, 1: 8}},
+        "TileSpecs": {
+            tile: {
+                "A": {0: 1},
+                "B[0]": {1: 1, 2: 0},
+                "B[1]": {2: 1},
+                "C": {9: 1, 15: 1},
+                "CLK_EN": {3: 1},
+                "M.SEL": {4: 1},
+            }
+            for tile in ["X0Y0", "X0Y1", "X1Y1"]
+        },
+    }
+
+
+def test_parse_fasm_value():
+    assert parse_fasm_value("5") == 5
+    assert parse_fasm_value("4'b1010") == 10
+    assert parse_fasm_value("8'hF_0") == 240
+    assert parse_fasm_value("'o17") == 15
+    with pytest.raises(ValueError):
+        parse_fasm_value("4'q1")
+
+
+def test_read_fasm_canonical(tmp_path):
+    fasm = tmp_path / "design.fasm"
+    fasm.write_text(
+        "# a comment\n"
+        "\n"
+        "X0Y0.A\n"
+        "X0Y0.B[3:0] = 4'b1010 # set bits 1 and 3\n"
+        "X0Y0.C[0]\n"
+        "X0Y0.D[2] = 1\n"
+        "X0Y0.E = 0\n"
+        "{ annotation } X0Y1.F[1:0] = 2'b01\n"
+    )
+
+    assert read_fasm(str(fasm)) == [
+        "X0Y0.A",
+        "X0Y0.B[1]",
+        "X0Y0.B[3]",
+        "X0Y0.C",
+        "X0Y0.D[2]",
+        "X0Y1.F",
+    ]
+
+
+def test_read_fasm_errors(tmp_path):
+    fasm = tmp_path / "design.fasm"
+
+    fasm.write_text("X0Y0.A = 2\n")
+    with pytest.raises(ValueError, match="too wide for a single bit"):
+        read_fasm(str(fasm))
+
+    fasm.write_text("X0Y0.A[1:0] = 3'b100\n")
+    with pytest.raises(ValueError, match="too wide"):
+        read_fasm(str(fasm))
+
+    fasm.write_text("not a feature!\n")
+    with pytest.raises(ValueError, match="invalid FASM line"):
+        read_fasm(str(fasm))
+
+
+def test_resolve():
+    index = BitstreamIndex.from_spec(make_spec())
+
+    (configuration, unknown) = index.resolve(
+        [
+            "X0Y0.A",
+            "X0Y0.B[1]",
+            "X0Y0.B",
+            "X0Y0.CLK_EN",
+            "X0Y0.Z",
+            "X0Y1.M.SEL.extra",
+        ]
+    )
+
+    assert unknown == ["X0Y0.Z"]
+    assert configuration.shape == (4, 16)
+    # B[0] clears bit 2 after B[1] set it, the clock feature is ignored
+    assert list(np.flatnonzero(configuration[0])) == [0, 1]
+    # Only the tile, the BEL and the feature are looked up
+    assert list(np.flatnonzero(configuration[2])) == [4]
+    assert not configuration[1].any() and not configuration[3].any()
+
+
+def test_pack_layout():
+    spec = {
+        "ArchSpecs": {"MaxFramesPerCol": 1, "FrameBitsPerRow": 8},
+        "TileMap": {"X0Y0": "T"},
+        "FrameMap": {"T": {0: 8}},
+        "TileSpecs": {"X0Y0": {"A": {0: 1}, "B": {6: 1}}},
+    }
+    index = BitstreamIndex.from_spec(spec)
+    (configuration, _) = index.resolve(["X0Y0.A", "X0Y0.B"])
+
+    # The frame select word of column 0, frame 0, then the frame data with
+    # the highest bit of the frame first
+    assert index.pack(configuration) == SYNC_HEADER + bytes(
+        [0x00, 0x00, 0x00, 0x01, 0b01000001]
+    )
+
+
+def test_pack_unpack_round_trip():
+    index = BitstreamIndex.from_spec(make_spec())
+    (configuration, _) = index.resolve(
+        ["X0Y0.A", "X0Y0.C", "X0Y1.B[1]", "X1Y1.A", "X1Y1.C"]
+    )
+
+    bitstream = index.pack(configuration)
+    # Per column and frame: a select word and a byte per configured tile
+    assert len(bitstream) == len(SYNC_HEADER) + 2 * (4 + 2) + 2 * (4 + 1)
+    assert np.array_equal(index.unpack(bitstream), configuration)
+
+    with pytest.raises(ValueError, match="sync header"):
+        index.unpack(bitstream[1:])
+    with pytest.raises(ValueError, match="ends within column"):
+        index.unpack(bitstream[:-1])
+    with pytest.raises(ValueError, match="after the last column"):
+        index.unpack(bitstream + b"\0")
+
+
+def test_unused_frames_are_cleared():
+    spec = make_spec()
+    spec["FrameMap"]["LUT"] = {0: 8, 1: 0}
+    index = BitstreamIndex.from_spec(spec)
+    (configuration, _) = index.resolve(["X0Y0.A", "X0Y0.C"])
+
+    unpacked = index.unpack(index.pack(configuration))
+    assert list(np.flatnonzero(unpacked[0])) == [0]
+
+
+def test_save_load(tmp_path):
+    index = BitstreamIndex.from_spec(make_spec())
+    index.save(str(tmp_path / "index.pkl"))
+    loaded = BitstreamIndex.load(str(tmp_path / "index.pkl"))
+
+    (configuration, _) = index.resolve(["X0Y0.A", "X1Y1.C"])
+    assert loaded.pack(configuration) == index.pack(configuration)
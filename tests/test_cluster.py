@@ -0,0 +1,211 @@
+import json
+
+import pytest
+from librelane.flows import FlowError
+
+from librelane_plugin_fabulous.fabulous_cluster import (
+    Cluster,
+    Netlist,
+    get_window,
+    partition_placement,
+    write_cluster_netlists,
+)
+
+
+def make_netlist(tmp_path):
+    # Two tiles in a row: A -> X0Y0 -> X1Y0 -> B, the C inputs are tied low
+    def tile(i, o):
+        return {
+            "type": "LUT4AB",
+            "port_directions": {"C": "input", "I": "input", "O": "output"},
+            "connections": {"C": ["0"], "I": [i], "O": [o]},
+        }
+
+    design = {
+        "modules": {
+            "eFPGA": {
+                "ports": {
+                    "A": {"direction": "input", "bits": [2]},
+                    "B": {"direction": "output", "bits": [4]},
+                },
+                "cells": {
+                    "Tile_X0Y0_LUT4AB": tile(2, 3),
+                    "Tile_X1Y0_LUT4AB": tile(3, 4),
+                },
+                "netnames": {
+                    "A": {"bits": [2]},
+                    "B": {"bits": [4]},
+                    "Tile_X0Y0_O": {"bits": [3]},
+                },
+            }
+        }
+    }
+    netlist_json = tmp_path / "fabric.json"
+    netlist_json.write_text(json.dumps(design))
+    return str(netlist_json)
+
+
+def test_partition_placement():
+    placement = {
+        "macros": {
+            "LUT4AB": {"tiles": [[0, 0], [1, 0], [2, 0], [0, 1], [1, 1], [2, 1]]}
+        }
+    }
+
+    clusters = partition_placement(placement, {}, (2, 2), (3, 2))
+
+    assert [(c.x, c.y, c.columns, c.rows) for c in clusters] == [
+        (0, 0, 2, 2),
+        (2, 0, 1, 2),
+    ]
+    assert sorted(clusters[0].tiles) == [
+        ("LUT4AB", 0, 0),
+        ("LUT4AB", 0, 1),
+        ("LUT4AB", 1, 0),
+        ("LUT4AB", 1, 1),
+    ]
+    assert clusters[1].tiles == [("LUT4AB", 2, 0), ("LUT4AB", 2, 1)]
+
+
+def test_partition_placement_supertile():
+    placement = {"macros": {"DSP": {"tiles": [[0, 1]]}}}
+
+    with pytest.raises(FlowError, match="crosses the boundary"):
+        partition_placement(placement, {"DSP": (1, 2)}, (1, 2), (1, 3))
+    with pytest.raises(FlowError, match="Invalid cluster size"):
+        partition_placement(placement, {}, (0, 1), (1, 3))
+
+    clusters = partition_placement(placement, {"DSP": (1, 2)}, (1, 3), (1, 3))
+    assert [(c.x, c.y, c.tiles) for c in clusters] == [(0, 0, [("DSP", 0, 1)])]
+
+
+def test_get_window():
+    placement = {
+        "macros": {
+            "LUT4AB": {"tiles": [[0, 0], [1, 0], [0, 1], [1, 1]]},
+            "DSP": {"tiles": [[2, 0]]},
+        }
+    }
+    sizes = {"DSP": (1, 2)}
+
+    window = get_window(placement, sizes, (1, 0, 2, 1))
+    assert (window.x, window.y, window.columns, window.rows) == (1, 0, 2, 2)
+    assert sorted(window.tiles) == [
+        ("DSP", 2, 0),
+        ("LUT4AB", 1, 0),
+        ("LUT4AB", 1, 1),
+    ]
+
+    with pytest.raises(FlowError, match="crosses the boundary of the window"):
+        get_window(placement, sizes, (2, 0, 2, 0))
+    with pytest.raises(FlowError, match="Invalid window"):
+        get_window(placement, sizes, (1, 0, 0, 0))
+    with pytest.raises(FlowError, match="contains no tiles"):
+        get_window(placement, sizes, (3, 3, 3, 3))
+
+
+def test_cluster_module(tmp_path):
+    netlist = Netlist.load(make_netlist(tmp_path), "eFPGA")
+    cluster = Cluster(
+        x=0,
+        y=0,
+        columns=2,
+        rows=1,
+        tiles=[("LUT4AB", 1, 0), ("LUT4AB", 0, 0)],
+    )
+
+    module = netlist.get_cluster_module(cluster)
+
+    # The net between the tiles doesn't leave the cluster
+    assert module["ports"] == [
+        ("Tile_X0Y0_I", "input", 1),
+        ("Tile_X1Y0_O", "output", 1),
+    ]
+    assert module["internal"] == 1
+    assert [instance["name"] for instance in module["instances"]] == [
+        "Tile_X0Y0_LUT4AB",
+        "Tile_X1Y0_LUT4AB",
+    ]
+    assert module["instances"][1]["connections"] == {
+        "C": "1'b0",
+        "I": "cluster_net",
+        "O": "Tile_X1Y0_O",
+    }
+    assert cluster.connections == {"Tile_X0Y0_I": [2], "Tile_X1Y0_O": [4]}
+
+
+def test_cluster_module_relative(tmp_path):
+    netlist = Netlist.load(make_netlist(tmp_path), "eFPGA")
+    cluster = Cluster(x=1, y=0, columns=1, rows=1, tiles=[("LUT4AB", 1, 0)])
+
+    module = netlist.get_cluster_module(cluster)
+
+    assert module["ports"] == [
+        ("Tile_X0Y0_I", "input", 1),
+        ("Tile_X0Y0_O", "output", 1),
+    ]
+    assert module["internal"] == 0
+    assert cluster.connections == {"Tile_X0Y0_I": [3], "Tile_X0Y0_O": [4]}
+
+    with pytest.raises(FlowError, match="Could not find Tile_X0Y1_LUT4AB"):
+        netlist.get_cluster_module(
+            Cluster(x=0, y=0, columns=1, rows=1, tiles=[("LUT4AB", 0, 1)])
+        )
+
+
+def test_write_cluster_netlists(tmp_path):
+    netlist_json = make_netlist(tmp_path)
+    clusters = [
+        Cluster(x=0, y=0, columns=1, rows=1, tiles=[("LUT4AB", 0, 0)]),
+        Cluster(x=1, y=0, columns=1, rows=1, tiles=[("LUT4AB", 1, 0)]),
+    ]
+
+    modules = write_cluster_netlists(
+        netlist_json,
+        "eFPGA",
+        clusters,
+        str(tmp_path / "top.v"),
+        str(tmp_path / "{}.v"),
+    )
+
+    # Both tiles have the same connectivity, so they share a module
+    assert list(modules) == ["eFPGA_cluster_0"]
+    assert [cluster.module for cluster in clusters] == ["eFPGA_cluster_0"] * 2
+    assert (tmp_path / "eFPGA_cluster_0.v").is_file()
+
+    top = (tmp_path / "top.v").read_text()
+    assert "eFPGA_cluster_0 Cluster_X0Y0_eFPGA_cluster_0 (" in top
+    assert ".Tile_X0Y0_I(A)" in top
+    assert ".Tile_X0Y0_O(Tile_X0Y0_O)" in top
+    assert ".Tile_X0Y0_O(B)" in top
+
+    with pytest.raises(FlowError, match="not part of any cluster"):
+        write_cluster_netlists(
+            netlist_json,
+            "eFPGA",
+            clusters[:1],
+            str(tmp_path / "top.v"),
+            str(tmp_path / "{}.v"),
+        )
+
+
+def test_routing_demand(tmp_path):
+    netlist = Netlist.load(make_netlist(tmp_path), "eFPGA")
+
+    abutted = netlist.get_routing_demand(
+        {"Tile_X0Y0_LUT4AB": (0, 0, 1, 1), "Tile_X1Y0_LUT4AB": (1, 0, 1, 1)}
+    )
+    assert abutted == {
+        "nets": 3,
+        "abutted": 1,
+        "pinned": 2,
+        "unconnected": 0,
+        "routed": 0,
+        "tied": 2,
+    }
+
+    # Tiles that only touch at a corner aren't abutted
+    apart = netlist.get_routing_demand(
+        {"Tile_X0Y0_LUT4AB": (0, 0, 1, 1), "Tile_X1Y0_LUT4AB": (1, 1, 1, 1)}
+    )
+    assert (apart["abutted"], apart["routed"]) == (0, 1)
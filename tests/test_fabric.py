@@ -0,0 +1,105 @@
+from decimal import Decimal
+
+import pytest
+from librelane.flows import FlowError
+
+from librelane_plugin_fabulous.fabulous_fabric import (
+    get_boundary_drc_windows,
+    get_lef_abstract,
+)
+
+LEF = """\
+VERSION 5.7 ;
+MACRO LUT4AB
+  CLASS BLOCK ;
+  SIZE {width} BY 200.00 ;
+  PIN N1BEG[0]
+    DIRECTION OUTPUT ;
+    USE SIGNAL ;
+    PORT
+      LAYER met2 ;
+        RECT {x} 199.5 10.46 200.0 ;
+    END
+  END N1BEG[0]
+  PIN VPWR
+    DIRECTION INOUT ;
+    USE POWER ;
+    PORT
+      LAYER met4 ;
+        RECT 20.0 5.0 21.6 195.0 ;
+        RECT 60.0 5.0 61.6 195.0 ;
+    END
+  END VPWR
+  OBS
+      LAYER met1 ;
+        RECT 0.0 0.0 100.0 200.0 ;
+  END
+END LUT4AB
+MACRO RegFile
+  CLASS BLOCK ;
+  SIZE 50 BY 50 ;
+END RegFile
+END LIBRARY
+"""
+
+
+def write_lef(tmp_path, width="100.00", x="10.18"):
+    lef = tmp_path / "LUT4AB.lef"
+    lef.write_text(LEF.format(width=width, x=x))
+    return str(lef)
+
+
+def test_get_lef_abstract(tmp_path):
+    abstract = get_lef_abstract(write_lef(tmp_path), "LUT4AB")
+
+    assert sorted(abstract["pins"]) == ["N1BEG[0]", "VPWR"]
+    assert abstract["pins"]["N1BEG[0]"]["direction"] == "OUTPUT"
+    assert abstract["pins"]["VPWR"]["use"] == "POWER"
+    # The obstructions aren't part of any pin
+    assert len(abstract["pins"]["VPWR"]["shapes"]) == 2
+    assert abstract["pins"]["VPWR"]["shapes"][0].startswith("met4 RECT")
+
+    # Equal coordinates compare equal however they are written
+    other = tmp_path / "other"
+    other.mkdir()
+    same = get_lef_abstract(write_lef(other, width="100", x="10.180"), "LUT4AB")
+    assert same == abstract
+
+    moved = get_lef_abstract(write_lef(other, x="10.2"), "LUT4AB")
+    assert moved["size"] == abstract["size"]
+    assert moved["pins"]["N1BEG[0]"] != abstract["pins"]["N1BEG[0]"]
+
+
+def test_get_lef_abstract_missing_macro(tmp_path):
+    assert get_lef_abstract(write_lef(tmp_path), "RegFile")["pins"] == {}
+    with pytest.raises(FlowError, match="Could not find the macro LUT4AB_new"):
+        get_lef_abstract(write_lef(tmp_path), "LUT4AB_new")
+
+
+def test_boundary_drc_windows():
+    placements = [
+        {
+            "name": f"Tile_X{x}Y0_LUT4AB",
+            "master": "LUT4AB",
+            "box": [Decimal(x * 100), Decimal(0), Decimal(x * 100 + 100), Decimal(100)],
+        }
+        for x in range(3)
+    ]
+    windows = get_boundary_drc_windows(
+        placements, (Decimal(-20), Decimal(-20), Decimal(320), Decimal(120)), 5
+    )
+
+    by_kind = {}
+    for window in windows:
+        by_kind.setdefault(window["kind"], []).append(window)
+
+    # Both seams look the same
+    assert [window["weight"] for window in by_kind["seam_v"]] == [2]
+    # The top-level shapes differ between the instances
+    assert len(by_kind["toplevel"]) == 3
+    assert [window["box"] for window in by_kind["toplevel"]] == [
+        placement["box"] for placement in placements
+    ]
+    # North and south of each tile, west and east of the outer ones
+    assert len(by_kind["halo"]) == 8
+    assert all(window["weight"] == 1 for window in by_kind["halo"])
@@ -0,0 +1,92 @@
+import os
+import importlib.util
+
+import pytest
+
+kdb = pytest.importorskip("klayout.db")
+
+spec = importlib.util.spec_from_file_location(
+    "klayout_window_drc",
+    os.path.join(
+        os.path.dirname(__file__),
+        "..",
+        "librelane_plugin_fabulous",
+        "scripts",
+        "klayout_window_drc.py",
+    ),
+)
+klayout_window_drc = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(klayout_window_drc)
+
+
+def make_fabric(straps):
+    # Four 100x100 µm tiles with a met4 shape close to y=50, and met4
+    # straps and vias at the top level
+    layout = kdb.Layout()
+    layout.dbu = 0.001
+    met4 = layout.layer(71, 20)
+    via4 = layout.layer(71, 44)
+
+    tile = layout.create_cell("LUT4AB")
+    tile.shapes(layout.layer(235, 4)).insert(kdb.DBox(0, 0, 100, 100))
+    tile.shapes(met4).insert(kdb.DBox(60, 53, 62, 54))
+
+    top = layout.create_cell("eFPGA")
+    for x, y in [(0, 0), (100, 0), (0, 100), (100, 100)]:
+        top.insert(kdb.DCellInstArray(tile.cell_index(), kdb.DTrans(kdb.DVector(x, y))))
+    for box in straps:
+        top.shapes(met4).insert(box)
+    top.shapes(via4).insert(kdb.DBox(30, 50.5, 30.2, 50.7))
+
+    return (layout, top)
+
+
+def to_um(layout, boxes):
+    return sorted(
+        [round(box.left * layout.dbu, 3), round(box.bottom * layout.dbu, 3)]
+        + [round(box.right * layout.dbu, 3), round(box.top * layout.dbu, 3)]
+        for box in boxes
+    )
+
+
+def test_toplevel_boxes():
+    (layout, top) = make_fabric([kdb.DBox(5, 50, 195, 51.6)])
+
+    boxes = klayout_window_drc.get_toplevel_boxes(
+        layout, top, kdb.Box(0, 0, 100000, 100000), 5000
+    )
+
+    # The strap end, the via and the tile shape next to the strap, but not the
+    # rest of the strap or the end at the tile boundary
+    assert to_um(layout, boxes) == [
+        [0.0, 45.0, 10.0, 56.6],
+        [25.0, 45.5, 35.2, 55.7],
+        [55.0, 48.0, 67.0, 59.0],
+    ]
+
+    # Tiles without top-level shapes have no windows
+    assert (
+        klayout_window_drc.get_toplevel_boxes(
+            layout, top, kdb.Box(0, 100000, 100000, 200000), 5000
+        )
+        == []
+    )
+
+
+def test_signature():
+    (layout, top) = make_fabric(
+        [kdb.DBox(5, 50, 95, 51.6), kdb.DBox(5, 150, 95, 151.6)]
+    )
+
+    def get_signature(x, y):
+        return klayout_window_drc.get_signature(
+            layout, top, "toplevel", kdb.Box(x, y, x + 12000, y + 12000)
+        )
+
+    # The same strap end on two instances, but only one has a via nearby
+    assert get_signature(-2000, 43000) == get_signature(-2000, 143000)
+    assert get_signature(23000, 43000) != get_signature(23000, 143000)
+    # The same layout in another kind of window is still checked
+    assert get_signature(-2000, 43000) != klayout_window_drc.get_signature(
+        layout, top, "halo", kdb.Box(-2000, 43000, 10000, 55000)
+    )
@@ -0,0 +1,151 @@
+import gzip
+
+from librelane_plugin_fabulous.fabulous_spef import (
+    get_reduced_spef,
+    parse_spef,
+    reduce_spef,
+)
+
+HEADER = """\
+*SPEF "IEEE 1481-1998"
+*DESIGN "LUT4AB"
+*DIVIDER /
+*DELIMITER :
+*BUS_DELIMITER [ ]
+
+*NAME_MAP
+*1 N1BEG
+*2 sm_in
+*3 E1END
+*4 ConfigBits[0]
+*5 dangling
+*6 Inst_LUT4AB_switch_matrix
+*7 Inst_LUT4AB_ConfigMem
+*8 buf_1
+*9 FrameData
+*10 tie_1
+
+*PORTS
+N1BEG I
+E1END O
+FrameData I
+
+"""
+
+# N1BEG -> buf_1 -> switch matrix -> E1END, the switch matrix is configured by
+# the configuration memory, which is written through FrameData
+NETS = """\
+*D_NET *1 0.1
+*CONN
+*P N1BEG I
+*I *8:A I *D sky130_fd_sc_hd__buf_1
+*CAP
+1 *1 0.05
+2 *8:A 0.05
+*END
+
+*D_NET *2 0.1
+*CONN
+*I *8:X O *D sky130_fd_sc_hd__buf_1
+*I *6:I0 I
+*CAP
+1 *8:X 0.1
+*RES
+1 *8:X *6:I0 1.0
+*END
+
+*D_NET *3 0.1
+*CONN
+*I *6:O O
+*P E1END O
+*END
+
+*D_NET *4 0.1
+*CONN
+*I *7:Q O
+*I *6:S0 I
+*END
+
+*D_NET *5 0.1
+*CONN
+*I *10:X O
+*END
+
+*D_NET *9 0.1
+*CONN
+*P FrameData I
+*I *7:D I
+*END
+"""
+
+
+def write_spef(tmp_path, nets=NETS):
+    spef = tmp_path / "LUT4AB.spef"
+    spef.write_text(HEADER + nets)
+    return str(spef)
+
+
+def test_parse_spef(tmp_path):
+    spef = write_spef(tmp_path)
+    (header_end, names, nets, connections) = parse_spef(spef)
+
+    assert header_end == len(HEADER)
+    assert names[b"*6"] == b"Inst_LUT4AB_switch_matrix"
+    # The ports aren't part of the name map
+    assert len(names) == 10
+    assert [net for (net, _, _) in nets] == [b"*1", b"*2", b"*3", b"*4", b"*5", b"*9"]
+    assert connections[1] == ([b"*8"], [b"*6"], False, False)
+    assert connections[2] == ([b"*6"], [], False, True)
+
+    # Each net spans from its *D_NET to its *END line
+    with open(spef, "rb") as f:
+        content = f.read()
+    (_, start, end) = nets[0]
+    assert content[start:end].startswith(b"*D_NET *1")
+    assert content[start:end].endswith(b"*END\n")
+
+
+def test_reduce_spef(tmp_path):
+    spef = write_spef(tmp_path)
+    output = str(tmp_path / "reduced.spef.gz")
+
+    # The configuration memory is static, so its nets aren't on a pip path
+    assert reduce_spef(spef, output) == (3, 6)
+
+    with gzip.open(output, "rt") as f:
+        reduced = f.read()
+    assert "*PORTS" in reduced
+    assert "*D_NET *3" in reduced and "*D_NET *4" not in reduced
+    assert "*6 Inst_LUT4AB_switch_matrix\n" in reduced
+    assert "*8 buf_1\n" in reduced
+    for name in ["ConfigBits[0]", "dangling", "ConfigMem", "tie_1"]:
+        assert name not in reduced
+
+    # Without any static instances, the configuration paths are kept as well
+    assert reduce_spef(spef, output, static_instances=r"^$") == (5, 6)
+
+
+def test_reduce_spef_without_paths(tmp_path):
+    nets = NETS.replace("*P E1END O\n", "")
+    spef = write_spef(tmp_path, nets)
+    output = str(tmp_path / "reduced.spef.gz")
+
+    # Every net is kept, only the blank lines between them are dropped
+    assert reduce_spef(spef, output) == (6, 6)
+    with gzip.open(output, "rt") as f:
+        assert f.read() == HEADER + nets.replace("\n\n", "\n")
+
+
+def test_get_reduced_spef(tmp_path):
+    spef = write_spef(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+
+    (reduced, cached) = get_reduced_spef(spef, cache_dir)
+    assert not cached and reduced.endswith("LUT4AB.spef.gz")
+    assert get_reduced_spef(spef, cache_dir) == (reduced, True)
+
+    # Changing the SPEF file or the static instances misses the cache
+    assert get_reduced_spef(spef, cache_dir, r"^$")[1] is False
+    write_spef(tmp_path, NETS.replace("0.05", "0.06"))
+    (changed, cached) = get_reduced_spef(spef, cache_dir)
+    assert not cached and changed != reduced
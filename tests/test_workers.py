@@ -0,0 +1,64 @@
+import shutil
+from unittest import mock
+
+import pytest
+
+from librelane_plugin_fabulous.fabulous_workers import (
+    ToolPool,
+    ToolWorker,
+    split_script,
+)
+
+
+def test_split_script():
+    (setup, body) = split_script(
+        "yosys -import\n"
+        "  read_liberty -lib cells.lib  \n"
+        "read_verilog tile.v\n"
+        "synth -top tile\n"
+        "exit\n"
+    )
+
+    assert setup == ["yosys -import", "read_liberty -lib cells.lib"]
+    assert body == "read_verilog tile.v\nsynth -top tile\n"
+
+
+def test_split_script_without_setup():
+    # Only whole commands are moved, not ones that mention the libraries
+    script = "puts {read_liberty x.lib}\nexit_early\n"
+    assert split_script(script) == ([], script)
+
+
+def test_tool_worker(tmp_path):
+    tclsh = shutil.which("tclsh")
+    if tclsh is None:
+        pytest.skip("tclsh is not available")
+
+    worker = ToolWorker([tclsh], str(tmp_path), "tclsh_0")
+    try:
+        assert worker.run("set x 6\n") == (0, "")
+        # The state of the shell is kept between scripts
+        assert worker.run("puts [expr $x * 7]\n") == (0, "42\n")
+        (status, output) = worker.run("error {no such cell}\n")
+        assert status == 1 and "no such cell" in output
+    finally:
+        worker.close()
+    assert (tmp_path / "tclsh_0.log").read_text().startswith("42\n")
+
+
+def test_tool_pool(tmp_path):
+    tclsh = shutil.which("tclsh")
+    if tclsh is None:
+        pytest.skip("tclsh is not available")
+
+    # Without TclX the worker can't fork, so the script is run in a new process
+    pool = ToolPool(str(tmp_path))
+    script = "proc read_liberty {args} {}\nread_liberty cells.lib\nputs [expr 6 * 7]\n"
+    with pool, mock.patch.object(pool, "acquire", wraps=pool.acquire) as acquire:
+        for _ in range(2):
+            result = pool.call([tclsh], script)
+            assert (result.returncode, result.stdout) == (0, "42\n")
+        assert acquire.call_count == 2
+
+    if pool.unsupported:
+        assert pool.unsupported == {(tclsh,)}